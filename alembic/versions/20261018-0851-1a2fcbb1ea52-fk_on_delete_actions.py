@@ -0,0 +1,45 @@
+"""fk on delete actions
+
+Revision ID: 1a2fcbb1ea52
+Revises: 47a3e03fa8b4
+Create Date: 2026-10-18 08:51:27.437052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a2fcbb1ea52'
+down_revision: Union[str, Sequence[str], None] = '47a3e03fa8b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Recreate the foreign keys with the ON DELETE actions from the DSL
+    # (relationship on_delete), keeping PostgreSQL's default names.
+    op.drop_constraint('family_invitation_inviter_id_fkey', 'family_invitation', type_='foreignkey')
+    op.drop_constraint('family_invitation_family_id_fkey', 'family_invitation', type_='foreignkey')
+    op.create_foreign_key('family_invitation_inviter_id_fkey', 'family_invitation', 'user', ['inviter_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('family_invitation_family_id_fkey', 'family_invitation', 'family', ['family_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('family_member_family_id_fkey', 'family_member', type_='foreignkey')
+    op.drop_constraint('family_member_user_id_fkey', 'family_member', type_='foreignkey')
+    op.create_foreign_key('family_member_family_id_fkey', 'family_member', 'family', ['family_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('family_member_user_id_fkey', 'family_member', 'user', ['user_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('family_member_user_id_fkey', 'family_member', type_='foreignkey')
+    op.drop_constraint('family_member_family_id_fkey', 'family_member', type_='foreignkey')
+    op.create_foreign_key('family_member_user_id_fkey', 'family_member', 'user', ['user_id'], ['id'])
+    op.create_foreign_key('family_member_family_id_fkey', 'family_member', 'family', ['family_id'], ['id'])
+    op.drop_constraint('family_invitation_family_id_fkey', 'family_invitation', type_='foreignkey')
+    op.drop_constraint('family_invitation_inviter_id_fkey', 'family_invitation', type_='foreignkey')
+    op.create_foreign_key('family_invitation_family_id_fkey', 'family_invitation', 'family', ['family_id'], ['id'])
+    op.create_foreign_key('family_invitation_inviter_id_fkey', 'family_invitation', 'user', ['inviter_id'], ['id'])
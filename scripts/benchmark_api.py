@@ -0,0 +1,302 @@
+"""Load benchmark of the generated routes: create, read, list, patch, delete.
+
+Starts the app with uvicorn against the configured Postgres (DB_* settings),
+seeds every benchmarked table straight through the database, then drives
+each workload with `--concurrency` concurrent clients and reports RPS and
+p50/p95/p99 latency. Use a dedicated database: the run creates rows and
+deletes them (seeded and created) at the end.
+
+SQLite is not supported: the generated routers rely on Postgres (COPY in
+bulk loads, EXPLAIN/pg_class counts, ON DELETE actions).
+
+Results are written as JSON, so two runs can be compared.
+
+Usage:
+    ./bin/benchmark --requests 2000 --concurrency 32 --output results/main.json
+    ./bin/benchmark --compare results/main.json results/branch.json --max-regression 10
+
+Creating users hashes passwords at the configured cost; export a lower
+PASSWORD_SCRYPT_N to benchmark the rest of the create path.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+import httpx
+from sqlalchemy import delete, insert
+from sqlmodel import Session
+
+from caramello.api.generated import ROUTERS
+from caramello.database.session import get_engine
+from caramello.models import Family, FamilyInvitation, User
+
+
+@dataclass
+class Context:
+    """Ids shared by the payload factories, and the rows to clean up."""
+
+    run: str = field(default_factory=lambda: uuid4().hex[:8])
+    user_ids: list[int] = field(default_factory=list)
+    family_ids: list[int] = field(default_factory=list)
+    seeded: dict[str, list[UUID]] = field(default_factory=dict)
+    created: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _expires_at() -> str:
+    return (datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=7)).isoformat()
+
+
+# Per table: model, create payload factory and PATCH payload factory.
+TABLES: dict[str, tuple[Any, Callable[[int, Context], dict], Callable[[int], dict]]] = {
+    "user": (
+        User,
+        lambda i, ctx: {
+            "full_name": f"Bench User {i}",
+            "email": f"bench_{ctx.run}_{i}@example.com",
+            "password": "benchmark",
+        },
+        lambda i: {"full_name": f"Patched User {i}"},
+    ),
+    "family": (
+        Family,
+        lambda i, ctx: {"name": f"Bench Family {i}"},
+        lambda i: {"description": f"Patched {i}"},
+    ),
+    "family_invitation": (
+        FamilyInvitation,
+        lambda i, ctx: {
+            "family_id": ctx.family_ids[i % len(ctx.family_ids)],
+            "inviter_id": ctx.user_ids[i % len(ctx.user_ids)],
+            "invitee_email": f"invitee_{ctx.run}_{i}@example.com",
+            "expires_at": _expires_at(),
+        },
+        lambda i: {"expires_at": _expires_at()},
+    ),
+}
+
+
+def seed(ctx: Context, rows: int) -> None:
+    """Inserts `rows` rows per table directly (no password hashing)."""
+    with Session(get_engine()) as session:
+        for table, (model, make_payload, _) in TABLES.items():
+            values = [
+                model.model_validate(make_payload(i, ctx)).model_dump(exclude={"id"})
+                for i in range(rows)
+            ]
+            for value in values:
+                value.pop("password", None)
+            inserted = session.execute(insert(model).returning(model.id, model.uuid), values).all()
+            ctx.seeded[table] = [row.uuid for row in inserted]
+            if table == "user":
+                ctx.user_ids = [row.id for row in inserted]
+            elif table == "family":
+                ctx.family_ids = [row.id for row in inserted]
+        session.commit()
+
+
+def cleanup(ctx: Context) -> None:
+    """Deletes the seeded and created rows (children first)."""
+    with Session(get_engine()) as session:
+        for table in reversed(list(TABLES)):
+            model = TABLES[table][0]
+            uuids = ctx.seeded.get(table, []) + [UUID(u) for u in ctx.created.get(table, [])]
+            if uuids:
+                session.execute(delete(model).where(model.uuid.in_(uuids)))
+        session.commit()
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def run_workload(
+    requests: int,
+    concurrency: int,
+    send: Callable[[int], Awaitable[httpx.Response]],
+) -> dict[str, Any]:
+    """Sends `requests` requests from `concurrency` clients; returns the stats."""
+    latencies: list[float] = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def client() -> None:
+        nonlocal errors
+        for i in indexes:
+            start = time.perf_counter()
+            response = await send(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def benchmark(url: str, ctx: Context, args: argparse.Namespace) -> dict[str, dict]:
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        for prefix in ROUTERS:
+            table = prefix.strip("/")
+            if table not in TABLES:
+                print(f"  {table}: no payload factory, skipped")
+                continue
+            _, make_payload, make_patch = TABLES[table]
+            seeded = [str(u) for u in ctx.seeded[table]]
+            created = ctx.created.setdefault(table, [])
+
+            async def create(i: int) -> httpx.Response:
+                response = await client.post(f"{prefix}/", json=make_payload(args.seed_rows + i, ctx))
+                if response.status_code == 200:
+                    created.append(response.json()["uuid"])
+                return response
+
+            workloads = {
+                "create": create,
+                "read": lambda i: client.get(f"{prefix}/{random.choice(seeded)}"),
+                "list": lambda i: client.get(f"{prefix}/", params={"limit": 100}),
+                "patch": lambda i: client.patch(f"{prefix}/{random.choice(seeded)}", json=make_patch(i)),
+                "delete": lambda i: client.delete(f"{prefix}/{created.pop()}"),
+            }
+            for name, send in workloads.items():
+                requests = min(args.requests, len(created)) if name == "delete" else args.requests
+                if name in ("read", "list"):
+                    await run_workload(args.warmup, args.concurrency, send)
+                stats = await run_workload(requests, args.concurrency, send)
+                results[f"{table}.{name}"] = stats
+                print(
+                    f"  {table + '.' + name:<26} {stats['rps']:>9.1f} rps  p50 {stats['p50_ms']:>7.2f} ms"
+                    f"  p95 {stats['p95_ms']:>7.2f} ms  p99 {stats['p99_ms']:>7.2f} ms  errors {stats['errors']}"
+                )
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    """Starts uvicorn and waits until the app answers."""
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "caramello.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30 s")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path: Path, new_path: Path, max_regression: Optional[float]) -> int:
+    """Prints RPS and p95 deltas between two result files."""
+    base = json.loads(base_path.read_text())["results"]
+    new = json.loads(new_path.read_text())["results"]
+    regressions = []
+    print(f"{'workload':<28}{'rps':>22}{'p95 ms':>26}")
+    for name in sorted(base.keys() & new.keys()):
+        rps_delta = (new[name]["rps"] - base[name]["rps"]) / base[name]["rps"] * 100
+        p95_delta = (new[name]["p95_ms"] - base[name]["p95_ms"]) / base[name]["p95_ms"] * 100
+        print(
+            f"{name:<28}{base[name]['rps']:>9.1f} -> {new[name]['rps']:>8.1f} {rps_delta:>+6.1f}%"
+            f"{base[name]['p95_ms']:>9.2f} -> {new[name]['p95_ms']:>8.2f} {p95_delta:>+6.1f}%"
+        )
+        if max_regression is not None and (rps_delta < -max_regression or p95_delta > max_regression):
+            regressions.append(name)
+    if regressions:
+        print(f"Regressed by more than {max_regression}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks the generated routes.")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per workload (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (default: 1)")
+    parser.add_argument("--seed-rows", type=int, default=1000, help="Rows seeded per table (default: 1000)")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured read/list requests (default: 50)")
+    parser.add_argument("--url", help="Benchmark an already running server instead of starting one")
+    parser.add_argument("--output", type=Path, help="JSON results file (default: benchmark-results/<UTC time>.json)")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASE", "NEW"), help="Compare two result files")
+    parser.add_argument("--max-regression", type=float, help="With --compare: fail above this RPS/p95 change (%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.max_regression)
+
+    ctx = Context()
+    seed(ctx, args.seed_rows)
+    server = None
+    try:
+        url = args.url
+        if url is None:
+            port = free_port()
+            server = start_server(port, args.workers)
+            url = f"http://127.0.0.1:{port}"
+        print(f"{args.requests} requests/workload, {args.concurrency} clients, {url}")
+        results = asyncio.run(benchmark(url, ctx, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        cleanup(ctx)
+
+    started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = args.output or Path("benchmark-results") / f"{started}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "timestamp": started,
+        "git_commit": git_commit(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "seed_rows": args.seed_rows,
+    }
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+    print(f"Results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Compares the cost of serializing one list page, per response path.
+
+- fastapi: the handler returns the page and FastAPI validates it against
+  `response_model`, runs `jsonable_encoder` and encodes with stdlib json.
+- pydantic: `Serializer` (validate once, `TypeAdapter.dump_json`).
+- orjson: `Serializer` with JSON_RENDERER=orjson (skipped if not installed).
+
+No database is needed: rows are built in memory.
+
+Usage:
+    python scripts/benchmark_serialization.py --rows 100 --iterations 500
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from caramello.api import serialization
+from caramello.api.serialization import Serializer
+from caramello.core.config import settings
+from caramello.models import User
+from caramello.models.user import UserPage
+
+
+def build_page(rows: int) -> dict:
+    now = datetime.utcnow()
+    items = [
+        User(
+            id=i,
+            uuid=uuid4(),
+            full_name=f"User {i}",
+            email=f"user{i}@example.com",
+            phone_number="+5511999999999",
+            google_id=f"gid_{i}",
+            avatar_url=f"https://example.com/avatars/{i}.png",
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(rows)
+    ]
+    return {"items": items, "next_cursor": "eyJrIjpbXX0", "next": "http://testserver/user/?cursor=eyJrIjpbXX0"}
+
+
+def fastapi_path(page: dict) -> Callable[[], bytes]:
+    field = create_model_field(name="Response_read_users", type_=UserPage, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def run() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=page, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    return run
+
+
+def serializer_path(page: dict) -> Callable[[], bytes]:
+    serializer = Serializer(UserPage)
+    return lambda: serializer.dump(page)
+
+
+def measure(run: Callable[[], bytes], iterations: int) -> float:
+    """Returns the mean time per page, in microseconds."""
+    run()  # warm-up (schema caches, imports)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        run()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks list page serialization.")
+    parser.add_argument("--rows", type=int, default=100, help="Items per page (default: 100)")
+    parser.add_argument("--iterations", type=int, default=500, help="Pages serialized per path (default: 500)")
+    args = parser.parse_args()
+
+    page = build_page(args.rows)
+    results = {}
+
+    settings.JSON_RENDERER = "pydantic"
+    results["fastapi"] = measure(fastapi_path(page), args.iterations)
+    results["pydantic"] = measure(serializer_path(page), args.iterations)
+    if serialization.orjson is not None:
+        settings.JSON_RENDERER = "orjson"
+        results["orjson"] = measure(serializer_path(page), args.iterations)
+
+    baseline = results["fastapi"]
+    print(f"{args.rows} rows/page, {args.iterations} iterations")
+    for name, micros in results.items():
+        print(f"  {name:<10} {micros:>10.1f} µs/page  {baseline / micros:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Measures cold-start cost: import time and time to first request.
+
+- import: `python -X importtime -c "import caramello.main"`, reporting the
+  cumulative time of `caramello.main` and the slowest caramello modules.
+- first request: wall time of a fresh interpreter that builds the app
+  (`create_app()`), runs its lifespan and serves one request, with eager
+  and with lazy router mounting.
+
+Each measurement runs in a new process, `--runs` times (median reported).
+The first request hits the database, so it must be reachable.
+
+`--max-import-ms` / `--max-first-request-ms` make the script exit with
+status 1 when a median goes over budget, to catch regressions in CI.
+
+Usage:
+    python scripts/benchmark_startup.py --runs 5 --path "/user/?limit=1"
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_REQUEST = """
+from fastapi.testclient import TestClient
+from caramello.main import create_app
+
+app = create_app(lazy_routers={lazy})
+with TestClient(app) as client:
+    response = client.get({path!r})
+assert response.status_code < 500, response.status_code
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times() -> dict[str, tuple[int, int]]:
+    """Runs one cold import and returns {module: (self_us, cumulative_us)}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import caramello.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return times
+
+
+def first_request_ms(path: str, lazy: bool) -> float:
+    """Wall time of a fresh process from interpreter start to the first response."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-W", "ignore", "-c", FIRST_REQUEST.format(lazy=lazy, path=path)], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks application cold start.")
+    parser.add_argument("--runs", type=int, default=5, help="Processes started per measurement (default: 5)")
+    parser.add_argument("--path", default="/user/?limit=1", help="Path of the first request (default: /user/?limit=1)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest caramello modules listed (default: 10)")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if importing caramello.main takes longer")
+    parser.add_argument("--max-first-request-ms", type=float, help="Fail if the lazy first request takes longer")
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    import_ms = statistics.median(run["caramello.main"][1] for run in runs) / 1000
+    print(f"import caramello.main: {import_ms:.1f} ms (median of {args.runs})")
+    last = runs[-1]
+    slowest = sorted(
+        (module for module in last if module.startswith("caramello")),
+        key=lambda module: last[module][1],
+        reverse=True,
+    )
+    for module in slowest[: args.top]:
+        print(f"  {module:<50} {last[module][1] / 1000:>8.1f} ms cumulative")
+
+    results = {}
+    for lazy in (False, True):
+        label = "lazy" if lazy else "eager"
+        results[label] = statistics.median(first_request_ms(args.path, lazy) for _ in range(args.runs))
+        print(f"first request ({label} routers): {results[label]:.1f} ms (median of {args.runs})")
+
+    failures = []
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import {import_ms:.1f} ms > {args.max_import_ms} ms")
+    if args.max_first_request_ms is not None and results["lazy"] > args.max_first_request_ms:
+        failures.append(f"first request {results['lazy']:.1f} ms > {args.max_first_request_ms} ms")
+    if failures:
+        print("Over budget: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
+import argparse
+import hashlib
+import json
+import re
+import sys
 import yaml
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, Any, List, Set
-from caramello.core.config import settings
+from typing import Dict, Any, List, Optional, Set
 
 # Define base paths
 ROOT_DIR = Path(__file__).parent.parent
@@ -11,6 +17,8 @@ ENTITIES_DIR = DSL_DIR / "entities"
 MODELS_OUTPUT_DIR = ROOT_DIR / "src" / "caramello" / "models"
 API_OUTPUT_DIR = ROOT_DIR / "src" / "caramello" / "api" / "generated"
 TESTS_OUTPUT_DIR = ROOT_DIR / "tests" / "generated"
+# Digests of the last run's inputs and outputs (incremental generation)
+GENERATION_MANIFEST = DSL_DIR / ".generation-manifest.json"
 
 # Standard Python types that don't need special imports or quotes
 STANDARD_TYPES = {"int", "str", "bool", "float", "list", "dict"}
@@ -83,8 +91,12 @@ def get_field_definition(field: Dict[str, Any], is_optional: bool = False, force
         field_args.append("primary_key=True")
     if field.get('foreign_key'):
         field_args.append(f"foreign_key='{field['foreign_key']}'")
+    if field.get('ondelete'):
+        field_args.append(f"ondelete='{field['ondelete']}'")
     if field.get('unique'):
         field_args.append("unique=True")
+    if field.get('index'):
+        field_args.append("index=True")
     if field.get('max_length'):
         field_args.append(f"max_length={field['max_length']}")
     
@@ -110,6 +122,176 @@ def get_field_definition(field: Dict[str, Any], is_optional: bool = False, force
     field_def = f"    {fname}: {type_str} = Field({', '.join(field_args)})"
     return field_def
 
+def get_sort_key(entity_data: Dict[str, Any]) -> List[str]:
+    """Returns the keyset pagination sort key, always ending with the unique `id`."""
+    field_names = {f['name'] for f in entity_data.get('fields', [])}
+    pagination = entity_data.get('pagination') or {}
+    sort_key = pagination.get('sort_key')
+    if sort_key is None:
+        sort_key = 'created_at' if 'created_at' in field_names else 'id'
+    if sort_key not in field_names:
+        raise ValueError(f"{entity_data['name']}: unknown pagination sort_key '{sort_key}'")
+    return [sort_key, 'id'] if sort_key != 'id' else ['id']
+
+def is_index_expression(column: str) -> bool:
+    """Index entries like 'lower(email)' are SQL expressions, not column names."""
+    return not column.isidentifier()
+
+def get_index_name(table_name: str, index: Dict[str, Any]) -> str:
+    if index.get('name'):
+        return index['name']
+    parts = [re.sub(r"\W+", "_", c).strip("_") for c in index['columns']]
+    prefix = "uq" if index.get('unique') else "ix"
+    return f"{prefix}_{table_name}_{'_'.join(parts)}"
+
+def generate_index(table_name: str, index: Dict[str, Any]) -> str:
+    columns = [
+        f"text(\"{c}\")" if is_index_expression(c) else f"'{c}'"
+        for c in index['columns']
+    ]
+    args = [f"'{get_index_name(table_name, index)}'"] + columns
+    if index.get('unique'):
+        args.append("unique=True")
+    if index.get('where'):
+        args.append(f"postgresql_where=text(\"{index['where']}\")")
+    return f"Index({', '.join(args)})"
+
+def generate_table_args(entity_data: Dict[str, Any]) -> List[str]:
+    table_name = entity_data['table_name']
+    field_names = {f['name'] for f in entity_data.get('fields', [])}
+    args = []
+    if not entity_data.get('is_link_model'):
+        sort_key = get_sort_key(entity_data)
+        if len(sort_key) > 1:
+            args.append(generate_index(table_name, {'columns': sort_key}))
+    for index in entity_data.get('indexes', []):
+        unknown = [c for c in index['columns'] if not is_index_expression(c) and c not in field_names]
+        if unknown:
+            raise ValueError(f"{entity_data['name']}: index on unknown field(s) {unknown}")
+        args.append(generate_index(table_name, index))
+    return args
+
+def get_indexed_columns(entity_data: Dict[str, Any]) -> Set[str]:
+    """Columns leading a full (non-partial) index.
+
+    Only these can back a generated filter or sort: any other column would
+    let a client trigger a sequential scan.
+    """
+    indexed = {
+        f['name'] for f in entity_data.get('fields', [])
+        if f.get('primary_key') or f.get('unique') or f.get('index')
+    }
+    if not entity_data.get('is_link_model'):
+        indexed.add(get_sort_key(entity_data)[0])
+    for index in entity_data.get('indexes', []):
+        leading = index['columns'][0]
+        if not index.get('where') and not is_index_expression(leading):
+            indexed.add(leading)
+    return indexed
+
+def get_filterable_fields(entity_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fields marked `filterable`, each checked for a backing index."""
+    indexed = get_indexed_columns(entity_data)
+    filterable = [f for f in entity_data.get('fields', []) if f.get('filterable')]
+    for f in filterable:
+        if f['name'] not in indexed:
+            raise ValueError(
+                f"{entity_data['name']}.{f['name']}: filterable needs an index "
+                f"(index: true, unique, or leading column of an indexes entry)"
+            )
+    return filterable
+
+def get_sortable_fields(entity_data: Dict[str, Any]) -> List[str]:
+    """Sortable field names, the pagination sort key first.
+
+    Each one is paginated by keyset on (field, id), so it must lead an index
+    and be non-nullable (NULLs break the row comparison).
+    """
+    indexed = get_indexed_columns(entity_data)
+    sortable = [get_sort_key(entity_data)[0]]
+    for f in entity_data.get('fields', []):
+        if not f.get('sortable') or f['name'] in sortable:
+            continue
+        if f['name'] not in indexed:
+            raise ValueError(
+                f"{entity_data['name']}.{f['name']}: sortable needs an index "
+                f"(index: true, unique, or leading column of an indexes entry)"
+            )
+        if f.get('nullable', True) and not f.get('primary_key'):
+            raise ValueError(f"{entity_data['name']}.{f['name']}: sortable fields must be non-nullable")
+        sortable.append(f['name'])
+    return sortable
+
+def generate_filters(entity_data: Dict[str, Any]) -> str:
+    """Emits the `{name}_filters` dependency turning query parameters into
+    WHERE clauses: equality for every filterable field, plus `_gte`/`_lt`
+    bounds for datetimes."""
+    name = entity_data['name']
+    var_name = name.lower()
+    params = []
+    body = []
+    for f in get_filterable_fields(entity_data):
+        fname = f['name']
+        ftype = map_type_to_python(f['type']).strip("'")
+        if ftype == "EmailStr":
+            ftype = "str"
+        if ftype == "datetime":
+            params.append(f"    {fname}_gte: Optional[datetime] = None,")
+            params.append(f"    {fname}_lt: Optional[datetime] = None,")
+            body.append(f"    if {fname}_gte is not None:\n        clauses.append({name}.{fname} >= {fname}_gte)")
+            body.append(f"    if {fname}_lt is not None:\n        clauses.append({name}.{fname} < {fname}_lt)")
+        else:
+            params.append(f"    {fname}: Optional[{ftype}] = None,")
+            body.append(f"    if {fname} is not None:\n        clauses.append({name}.{fname} == {fname})")
+    signature = f"def {var_name}_filters(\n" + "\n".join(params) + "\n) -> list[Any]:" if params else f"def {var_name}_filters() -> list[Any]:"
+    lines = [
+        signature,
+        '    """WHERE clauses for the filterable fields (each backed by an index)."""',
+        "    clauses: list[Any] = []",
+        *body,
+        "    return clauses",
+    ]
+    return "\n".join(lines)
+
+ON_DELETE_ACTIONS = {"cascade": "CASCADE", "restrict": "RESTRICT", "set_null": "SET NULL"}
+
+def resolve_on_delete(entities: Dict[str, Dict[str, Any]]) -> None:
+    """Copies each relationship's `on_delete` onto the child foreign key field.
+
+    The FK lives on the other entity (or on the link model), so this needs
+    every entity loaded up front. The action is stored as `ondelete` on the
+    child field dict, which `get_field_definition` turns into the DB-level
+    `ON DELETE` clause.
+    """
+    for data in entities.values():
+        for rel in data.get('relationships', []):
+            on_delete = rel.get('on_delete')
+            if not on_delete:
+                continue
+            if on_delete not in ON_DELETE_ACTIONS:
+                raise ValueError(f"{data['name']}.{rel['name']}: unknown on_delete '{on_delete}'")
+            if rel.get('foreign_key'):
+                child_name, _, fk_name = rel['foreign_key'].partition('.')
+                target = None
+            elif rel.get('link_model'):
+                child_name, fk_name = rel['link_model'], None
+                target = f"{data['table_name']}.id"
+            else:
+                raise ValueError(f"{data['name']}.{rel['name']}: on_delete needs foreign_key or link_model")
+            child = entities.get(child_name)
+            if child is None:
+                raise ValueError(f"{data['name']}.{rel['name']}: unknown entity '{child_name}'")
+            matches = [
+                f for f in child.get('fields', [])
+                if f['name'] == fk_name or (target and f.get('foreign_key') == target)
+            ]
+            if len(matches) != 1:
+                raise ValueError(f"{data['name']}.{rel['name']}: cannot find the foreign key on {child_name}")
+            fk = matches[0]
+            if on_delete == 'set_null' and (fk.get('primary_key') or not fk.get('nullable', True)):
+                raise ValueError(f"{child_name}.{fk['name']}: set_null needs a nullable foreign key")
+            fk['ondelete'] = ON_DELETE_ACTIONS[on_delete]
+
 def generate_relationships(relationships: List[Dict], entity_name: str) -> List[str]:
     lines = []
     for rel in relationships:
@@ -121,6 +303,11 @@ def generate_relationships(relationships: List[Dict], entity_name: str) -> List[
             args.append(f"back_populates='{rel['back_populates']}'")
         if rel.get('link_model'):
             args.append(f"link_model={rel['link_model']}")
+        # The database cascades; the ORM must not load children to do it.
+        if rel.get('on_delete') == 'restrict':
+            args.append("passive_deletes='all'")
+        elif rel.get('on_delete'):
+            args.append("passive_deletes=True")
             
         lines.append(f"    {rname}: {rtype} = Relationship({', '.join(args)})")
     return lines
@@ -139,6 +326,15 @@ def generate_models(entity_data: Dict[str, Any]) -> str:
         "from sqlmodel import SQLModel, Field, Relationship",
         "from pydantic import EmailStr"
     ]
+
+    if not entity_data.get('is_link_model'):
+        imports.append("from caramello.schemas.bulk import BulkItemError")
+
+    table_args = generate_table_args(entity_data)
+    if any("text(" in arg for arg in table_args):
+        imports.append("from sqlalchemy import Index, text")
+    elif table_args:
+        imports.append("from sqlalchemy import Index")
     
     # Check for link_model imports
     for rel in relationships:
@@ -176,7 +372,14 @@ def generate_models(entity_data: Dict[str, Any]) -> str:
     # -- MODEL (TABLE) --
     code += f"class {name}(SQLModel, table=True):\n"
     code += f"    \"\"\"{description}\"\"\"\n"
-    code += f"    __tablename__ = \"{table_name}\"\n\n"
+    code += f"    __tablename__ = \"{table_name}\"\n"
+    if len(table_args) == 1:
+        code += f"    __table_args__ = ({table_args[0]},)\n"
+    elif table_args:
+        code += "    __table_args__ = (\n"
+        code += "".join(f"        {arg},\n" for arg in table_args)
+        code += "    )\n"
+    code += "\n"
     
     for f in fields:
         code += get_field_definition(f) + "\n"
@@ -198,9 +401,16 @@ def generate_models(entity_data: Dict[str, Any]) -> str:
         # We need types but without Field(table_args...)
         # Just use simple annotation
         ftype = map_type_to_python(f['type'])
+        # Read is output-only: emails were validated on write, and
+        # re-running email validation on every response row dominates
+        # serialization. Keep the OpenAPI format, skip the validator.
+        default = ""
+        if ftype == "EmailStr":
+            ftype = "str"
+            default = " = Field(schema_extra={'json_schema_extra': {'format': 'email'}})"
         if f.get('nullable', False) and not ftype.startswith("Optional"):
             ftype = f"Optional[{ftype}]"
-        code += f"    {f['name']}: {ftype}\n"
+        code += f"    {f['name']}: {ftype}{default}\n"
     code += "\n"
 
     # -- CREATE MODEL --
@@ -251,72 +461,456 @@ def generate_models(entity_data: Dict[str, Any]) -> str:
         code += f"    {fname}: {ftype} = None\n"
     code += "\n"
 
+    # -- PAGE MODEL --
+    # Cursor-paginated list response
+    if not entity_data.get('is_link_model'):
+        code += f"class {name}Page(SQLModel):\n"
+        code += f"    items: list[{name}Read]\n"
+        code += f"    next_cursor: Optional[str] = None\n"
+        code += f"    next: Optional[str] = None\n"
+        code += "\n"
+
+        # -- BULK RESULT MODEL --
+        code += f"class {name}BulkResult(SQLModel):\n"
+        code += f"    created: list[{name}Read]\n"
+        code += f"    errors: list[BulkItemError] = []\n"
+        code += "\n"
+
+        # -- EXPANDED READ MODELS --
+        # Responses with ?expand=; the nested Read schemas live in other
+        # modules and are resolved by models/__init__.py (model_rebuild).
+        expansions = get_expansions(entity_data)
+        if expansions:
+            code += f"class {name}ReadExpanded({name}Read):\n"
+            for e in expansions:
+                target = f"list['{e['target']}Read']" if e['many'] else f"'{e['target']}Read'"
+                code += f"    {e['name']}: Optional[{target}] = None\n"
+            code += "\n"
+            code += f"class {name}PageExpanded(SQLModel):\n"
+            code += f"    items: list[{name}ReadExpanded]\n"
+            code += f"    next_cursor: Optional[str] = None\n"
+            code += f"    next: Optional[str] = None\n"
+            code += "\n"
+
     return code
 
-def generate_router(entity_data: Dict[str, Any]) -> str:
+def get_expansions(entity_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relationships exposed through `?expand=`: name, target entity and
+    whether it is a collection (`list[X]`)."""
+    if entity_data.get('is_link_model'):
+        return []
+    expansions = []
+    for rel in entity_data.get('relationships', []):
+        match = re.fullmatch(r"(?:list|List)\[(\w+)\]", rel['type'])
+        target = match.group(1) if match else rel['type']
+        expansions.append({'name': rel['name'], 'target': target, 'many': bool(match)})
+    return expansions
+
+QUERY_BUDGET_KEYS = ('create', 'read', 'read_expanded', 'list', 'update', 'delete')
+
+def get_query_budget(entity_data: Dict[str, Any]) -> Dict[str, int]:
+    """SQL statements allowed per endpoint (DSL `query_budget`).
+
+    Every endpoint defaults to a single statement; an expanded read adds
+    one eager-load query per collection relationship (selectinload).
+    """
+    declared = entity_data.get('query_budget', {})
+    unknown = set(declared) - set(QUERY_BUDGET_KEYS)
+    if unknown:
+        raise ValueError(f"{entity_data['name']}: unknown query_budget key(s): {', '.join(sorted(unknown))}")
+    collections = sum(1 for e in get_expansions(entity_data) if e['many'])
+    budget = {key: 1 for key in QUERY_BUDGET_KEYS}
+    budget['read_expanded'] = 1 + collections
+    budget.update(declared)
+    return budget
+
+def get_version_field(entity_data: Dict[str, Any]) -> str | None:
+    """Returns the field bumped on every update (on_update: now_utc), if any."""
+    for f in entity_data.get('fields', []):
+        if f.get('on_update') == 'now_utc':
+            return f['name']
+    return None
+
+def generate_router(entity_data: Dict[str, Any], use_async: bool = False) -> str:
     name = entity_data['name']
     var_name = name.lower()
     table_name = entity_data['table_name']
     
-    return f"""from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
-from typing import List
-from uuid import UUID
-from caramello.database.session import get_session
-from caramello.models.{var_name} import {name}, {name}Read, {name}Create, {name}Update
+    # Sortable fields map to their keyset columns: (field, id)
+    sortable = get_sortable_fields(entity_data)
+    sort_entries = []
+    for field_name in sortable:
+        columns = [field_name, 'id'] if field_name != 'id' else ['id']
+        rendered = ", ".join(f"{name}.{c}" for c in columns) + ("," if len(columns) == 1 else "")
+        sort_entries.append(f"    \"{field_name}\": ({rendered}),\n")
+    sort_keys = "SORT_KEYS = {\n" + "".join(sort_entries) + "}\n"
+    sort_values = ", ".join(f"\"{v}\"" for field_name in sortable for v in (field_name, f"-{field_name}"))
+    default_sort = sortable[0]
+    filters = generate_filters(entity_data)
+
+    # Sync and async routers share one template; only these tokens differ.
+    if use_async:
+        session_import = "from sqlmodel import select\nfrom sqlmodel.ext.asyncio.session import AsyncSession"
+        session_type = "AsyncSession"
+        get_session = "get_async_session"
+        get_read_session = "get_async_read_session"
+        def_ = "async def"
+        aw = "await "
+        bulk_insert_call = "await session.run_sync(bulk_insert, "
+        check_references_call = "await session.run_sync(check_references, "
+        stream_partitions = "astream_partitions"
+        count_call = "await session.run_sync(count_rows, "
+        exec_ = "(await session.exec(statement))"
+    else:
+        session_import = "from sqlmodel import Session, select"
+        session_type = "Session"
+        get_session = "get_session"
+        get_read_session = "get_read_session"
+        def_ = "def"
+        aw = ""
+        bulk_insert_call = "bulk_insert(session, "
+        check_references_call = "check_references(session, "
+        stream_partitions = "stream_partitions"
+        count_call = "count_rows(session, "
+        exec_ = "session.exec(statement)"
+
+    # Weak ETags: (uuid, version) when the entity has an on_update timestamp,
+    # otherwise a hash of the whole Read payload (created_at alone would not
+    # change on PATCH).
+    # A sparse fieldset (`selected`) is always part of the tag.
+    version_field = get_version_field(entity_data)
+    if version_field:
+        etag_parts = f"{var_name}.uuid, {var_name}.{version_field}, selected"
+        sparse_etag_parts = etag_parts
+        cached_etag_parts = f"cached[\"uuid\"], cached[\"{version_field}\"], selected"
+        etag_columns = repr(("uuid", version_field))
+    else:
+        etag_parts = f"{name}Read.model_validate({var_name}).model_dump(mode=\"json\"), selected"
+        sparse_etag_parts = "payload, selected"
+        cached_etag_parts = "payload, selected"
+        etag_columns = "()"
+    # Sparse list queries also need the sort key, for the next cursor.
+    list_columns = f"(*sort_columns, {name}.{version_field})" if version_field else "sort_columns"
+
+    # Fields refreshed on every PATCH (on_update: now_utc)
+    on_update_lines = "".join(
+        f"    values[\"{f['name']}\"] = datetime.utcnow()\n"
+        for f in entity_data.get('fields', []) if f.get('on_update') == 'now_utc'
+    )
+    datetime_import = "\nfrom datetime import datetime" if on_update_lines or "datetime" in filters else ""
+
+    # The Create/Update schemas expose `password` instead of `hashed_password`;
+    # it is not a column, so it stays out of the INSERT/UPDATE. It is hashed
+    # by an async dependency in the process pool (caramello.core.security),
+    # so neither the event loop nor the threadpool runs scrypt.
+    has_password = any(f['name'] == 'hashed_password' for f in entity_data.get('fields', []))
+    update_exclude = ", exclude={\"password\"}" if has_password else ""
+    create_values = f"{var_name}_in.model_dump(exclude_unset=True)"
+    security_import = password_deps = create_password_param = update_password_param = ""
+    update_password_lines = bulk_password_lines = bulk_password_param = ""
+    bulk_payload = "bulk_payload"
+    if has_password:
+        # Bulk payloads are capped by BULK_MAX_PASSWORD_ITEMS before any
+        # hashing, and hashed from the event loop: a sync handler never
+        # blocks a threadpool slot on the process pool.
+        bulk_payload = "password_bulk_payload"
+        security_import = "\nfrom caramello.core.security import hash_password_async, hash_passwords_async"
+        password_deps = (
+            f"\n\n# Plain passwords are hashed in the process pool before the handler runs.\n"
+            f"async def {var_name}_create_password({var_name}_in: {name}Create) -> str:\n"
+            f"    return await hash_password_async({var_name}_in.password)\n\n"
+            f"async def {var_name}_update_password({var_name}_in: {name}Update) -> Optional[str]:\n"
+            f"    return await hash_password_async({var_name}_in.password) if {var_name}_in.password else None\n\n"
+            f"async def {var_name}_bulk_passwords(payload: list[dict[str, Any]] = Depends({bulk_payload})) -> list[Optional[str]]:\n"
+            f"    # By payload index; an item without a string password fails validation anyway.\n"
+            f"    passwords = [item.get(\"password\") if isinstance(item.get(\"password\"), str) else None for item in payload]\n"
+            f"    return await hash_passwords_async(passwords)"
+        )
+        bulk_password_param = f"    hashes: list[Optional[str]] = Depends({var_name}_bulk_passwords),\n"
+        create_values = f"{{**{create_values}, \"hashed_password\": hashed_password}}"
+        create_password_param = f", hashed_password: str = Depends({var_name}_create_password)"
+        update_password_param = f", hashed_password: Optional[str] = Depends({var_name}_update_password)"
+        update_password_lines = (
+            "    if hashed_password:\n"
+            "        values[\"hashed_password\"] = hashed_password\n"
+        )
+        bulk_password_lines = (
+            "    for index, row in zip(indexes, rows):\n"
+            "        row[\"hashed_password\"] = hashes[index]\n"
+        )
+
+    # Foreign keys are checked before the INSERT: a bad reference fails only
+    # its own item, in partial mode as well.
+    has_foreign_keys = any(f.get('foreign_key') for f in entity_data.get('fields', []))
+    bulk_reference_lines = ""
+    bulk_names = ["BulkMode", bulk_payload, "conflict_errors", "validate_bulk_items"]
+    if has_foreign_keys:
+        bulk_reference_lines = (
+            f"    indexes, rows, reference_errors = {check_references_call}{name}, indexes, rows)\n"
+            f"    errors += reference_errors\n"
+        )
+        bulk_names.append("check_references")
+    bulk_import = ", ".join(sorted(bulk_names))
+
+    # UPDATE ... RETURNING both finds and returns the row. Without an
+    # on_update field an empty PATCH has nothing to SET, so it falls back
+    # to a plain SELECT of the same columns.
+    update_statement = (
+        f"    statement = (\n"
+        f"        update({name}).where({name}.uuid == uuid).values(**values).returning(*{name}.__table__.c)\n"
+        f"    )\n"
+    )
+    if not on_update_lines:
+        update_statement = (
+            f"    if values:\n"
+            f"        statement = (\n"
+            f"            update({name}).where({name}.uuid == uuid).values(**values).returning(*{name}.__table__.c)\n"
+            f"        )\n"
+            f"    else:\n"
+            f"        statement = select(*{name}.__table__.c).where({name}.uuid == uuid)\n"
+        )
+
+    # ?expand= on the read endpoints, one eager loader per relationship
+    expansions = get_expansions(entity_data)
+    if expansions:
+        related = sorted({e['target'] for e in expansions} - {name})
+        expand_import = "\nfrom caramello.api.expand import Expansion, expanded_payload, expanded_response, load_options, parse_expand"
+        related_imports = "".join(f"\nfrom caramello.models.{t.lower()} import {t}Read" for t in related)
+        expand_models = f", {name}ReadExpanded, {name}PageExpanded"
+        expand_setup = (
+            "\n# Expandable relationships (?expand=), each eagerly loaded in at most one extra query.\n"
+            "EXPANSIONS = {\n"
+            + "".join(
+                f"    \"{e['name']}\": Expansion({name}.{e['name']}, {e['target']}Read, many={e['many']}),\n"
+                for e in expansions
+            )
+            + "}\n"
+            f"READ_FIELDS = list({name}Read.model_fields)\n"
+        )
+        expand_names = ", ".join(e['name'] for e in expansions)
+        expand_param = f"    expand: Optional[str] = Query(default=None, description=\"Comma-separated relationships to include: {expand_names}\"),\n"
+        expand_parse = "    expanded = parse_expand(expand, EXPANSIONS)\n"
+        list_model = f"{name}PageExpanded"
+        read_model = f"{name}ReadExpanded"
+        list_if = (
+            f"    if expanded:\n"
+            f"        statement = select({name}).options(*load_options(expanded, EXPANSIONS))\n"
+            f"    elif selected:"
+        )
+        list_expand_return = (
+            f"    if expanded:\n"
+            f"        page[\"items\"] = [expanded_payload(row, selected or READ_FIELDS, expanded, EXPANSIONS) for row in page[\"items\"]]\n"
+            f"        return expanded_response(page, request, response)\n"
+        )
+        read_expand = (
+            f"    if expanded:\n"
+            f"        statement = select({name}).where({name}.uuid == uuid).options(*load_options(expanded, EXPANSIONS))\n"
+            f"        {var_name} = {exec_}.first()\n"
+            f"        if not {var_name}:\n"
+            f"            raise HTTPException(status_code=404, detail=\"{name} not found\")\n"
+            f"        payload = expanded_payload({var_name}, selected or READ_FIELDS, expanded, EXPANSIONS)\n"
+            f"        return expanded_response(payload, request, response)\n"
+        )
+    else:
+        expand_import = related_imports = expand_models = expand_setup = expand_param = expand_parse = ""
+        list_expand_return = read_expand = ""
+        list_model = f"{name}Page"
+        read_model = f"{name}Read"
+        list_if = "    if selected:"
+
+    # Optional read-through cache on GET /{uuid}, invalidated by PATCH/DELETE
+    cache = entity_data.get('cache')
+    if cache:
+        cache_import = "\nfrom caramello.core.cache import CacheBackend, get_cache"
+        # Looked up per request, not at import: the backend comes from the
+        # settings, which need the environment.
+        cache_setup = (
+            f"\ndef {var_name}_cache() -> CacheBackend:\n"
+            f"    return get_cache(\"{name}\", ttl={cache.get('ttl', 60)}, max_entries={cache.get('max_entries', 1000)})\n"
+        )
+        cache_lookup = (
+            f"    cached = {var_name}_cache().get(str(uuid))\n"
+            f"    if cached is not None:\n"
+            f"        payload = project(cached, selected) if selected else cached\n"
+            f"        not_modified = conditional_response(request, response, make_etag({cached_etag_parts}))\n"
+            f"        if not_modified:\n"
+            f"            return not_modified\n"
+            f"        return sparse_response(payload, response)\n"
+            f"    # Taken before the SELECT: a PATCH/DELETE that invalidates the entry\n"
+            f"    # meanwhile makes the fill below a no-op.\n"
+            f"    generation = {var_name}_cache().generation(str(uuid))\n"
+        )
+        # Replica reads may predate the PATCH/DELETE that invalidated the
+        # entry, so only primary reads fill the cache.
+        cache_store = (
+            f"    if on_primary(session):\n"
+            f"        {var_name}_cache().set(\n"
+            f"            str(uuid), {name}Read.model_validate({var_name}).model_dump(mode=\"json\"), generation=generation\n"
+            f"        )\n"
+        )
+        session_imports = f"{get_read_session}, {get_session}, on_primary"
+        cache_invalidate = f"    {var_name}_cache().delete(str(uuid))\n"
+    else:
+        cache_import = cache_setup = cache_lookup = cache_store = cache_invalidate = ""
+        session_imports = f"{get_read_session}, {get_session}"
+
+    return f"""from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+{session_import}
+from typing import Any, Literal, Optional
+from uuid import UUID{datetime_import}
+from caramello.api.bulk import {bulk_import}
+from caramello.api.conditional import conditional_response, make_etag, page_etag{expand_import}
+from caramello.api.export import ExportFormat, export_response
+from caramello.api.fields import parse_fields, project, select_fields, sparse_response
+from caramello.api.pagination import apply_cursor, build_page, parse_sort, sort_order
+from caramello.api.serialization import Serializer{cache_import}{security_import}
+from caramello.database.bulk import bulk_insert
+from caramello.database.count import CountMode, count_rows
+from caramello.database.export import {stream_partitions}
+from caramello.database.session import {session_imports}
+from caramello.models.{var_name} import {name}, {name}Read, {name}Create, {name}Update, {name}Page, {name}BulkResult{expand_models}{related_imports}
 
 router = APIRouter(prefix="/{table_name}", tags=["{name}"])
 
+# Validate once and dump straight to JSON bytes (see caramello.api.serialization)
+read_serializer = Serializer({name}Read)
+page_serializer = Serializer({name}Page)
+bulk_serializer = Serializer({name}BulkResult)
+{expand_setup}{cache_setup}
+# Sortable fields and their keyset columns (each backed by an index).
+{sort_keys}
+{filters}{password_deps}
+
 @router.post("/", response_model={name}Read)
-def create_{var_name}({var_name}_in: {name}Create, session: Session = Depends(get_session)):
-    db_obj = {name}.model_validate({var_name}_in)
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
-
-@router.get("/", response_model=List[{name}Read])
-def read_{var_name}s(
-    session: Session = Depends(get_session),
-    offset: int = 0,
-    limit: int = Query(default=100, le=100)
+{def_} create_{var_name}({var_name}_in: {name}Create{create_password_param}, session: {session_type} = Depends({get_session})):
+    db_obj = {name}.model_validate({create_values})
+    statement = insert({name}).values(**db_obj.model_dump(exclude={{"id"}})).returning(*{name}.__table__.c)
+    created = {exec_}.mappings().one()
+    {aw}session.commit()
+    return read_serializer.response(created)
+
+@router.post("/bulk", response_model={name}BulkResult)
+{def_} create_{var_name}s_bulk(
+    payload: list[dict[str, Any]] = Depends({bulk_payload}),
+{bulk_password_param}    mode: BulkMode = "atomic",
+    session: {session_type} = Depends({get_session})
+):
+    # atomic: any invalid or conflicting item rejects the whole batch.
+    # partial: valid items are created, the others are reported in `errors`.
+    indexes, rows, errors = validate_bulk_items(payload, {name}Create, {name})
+{bulk_reference_lines}    if errors and mode == "atomic":
+        raise HTTPException(status_code=422, detail=errors)
+{bulk_password_lines}    try:
+        # Unique conflicts are skipped and reported per item (no database
+        # text reaches the client); atomic mode then rejects the batch.
+        created = {bulk_insert_call}{name}, rows, skip_conflicts=True)
+    except IntegrityError:
+        {aw}session.rollback()
+        raise HTTPException(status_code=409, detail="Conflicting items")
+    conflicts = conflict_errors(indexes, rows, created)
+    if conflicts and mode == "atomic":
+        {aw}session.rollback()
+        raise HTTPException(status_code=409, detail=conflicts)
+    {aw}session.commit()
+    errors += conflicts
+    return bulk_serializer.response({{"created": created, "errors": sorted(errors, key=lambda error: error["index"])}})
+
+@router.get("/", response_model={list_model})
+{def_} read_{var_name}s(
+    request: Request,
+    response: Response,
+    session: {session_type} = Depends({get_read_session}),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=100),
+    sort: Literal[{sort_values}] = "{default_sort}",
+    count: CountMode = Query(default="none", description="Total in X-Total-Count: exact (COUNT), estimated (planner statistics) or none"),
+    filters: list[Any] = Depends({var_name}_filters),
+{expand_param}    fields: Optional[str] = Query(default=None, description="Comma-separated {name}Read fields to return")
 ):
-    return session.exec(select({name}).offset(offset).limit(limit)).all()
+    selected = parse_fields(fields, {name}Read)
+{expand_parse}    sort_field, descending = parse_sort(sort)
+    sort_columns = SORT_KEYS[sort_field]
+{list_if}
+        statement = select_fields({name}, selected, {list_columns})
+    else:
+        statement = select({name})
+    statement = apply_cursor(statement.where(*filters), sort_columns, cursor, limit, descending)
+    rows = {exec_}.all()
+    page = build_page(rows, sort_columns, limit, request, response, descending)
+    if count != "none":
+        response.headers["X-Total-Count"] = str({count_call}{name}, filters, count))
+{list_expand_return}    not_modified = conditional_response(request, response, page_etag(page, {version_field!r}, {name}Read, selected))
+    if not_modified:
+        return not_modified
+    if selected:
+        page["items"] = [project(row, selected) for row in page["items"]]
+        return sparse_response(page, response)
+    return page_serializer.response(page, response)
 
-@router.get("/{{uuid}}", response_model={name}Read)
-def read_{var_name}(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select({name}).where({name}.uuid == uuid)
-    {var_name} = session.exec(statement).first()
+@router.get("/export")
+{def_} export_{var_name}s(
+    format: ExportFormat = "ndjson",
+    sort: Literal[{sort_values}] = "{default_sort}",
+    filters: list[Any] = Depends({var_name}_filters)
+):
+    # Column-only SELECT of the Read fields, streamed from a server-side
+    # cursor on its own connection (no request session, no ORM objects).
+    sort_field, descending = parse_sort(sort)
+    columns = list({name}Read.model_fields)
+    statement = select_fields({name}, columns).where(*filters).order_by(*sort_order(SORT_KEYS[sort_field], descending))
+    return export_response({stream_partitions}(statement), columns, format, "{table_name}")
+
+@router.get("/{{uuid}}", response_model={read_model})
+{def_} read_{var_name}(
+    uuid: UUID,
+    request: Request,
+    response: Response,
+    session: {session_type} = Depends({get_read_session}),
+{expand_param}    fields: Optional[str] = Query(default=None, description="Comma-separated {name}Read fields to return")
+):
+    selected = parse_fields(fields, {name}Read)
+{expand_parse}{read_expand}{cache_lookup}    if selected:
+        statement = select_fields({name}, selected, {etag_columns}).where({name}.uuid == uuid)
+    else:
+        statement = select({name}).where({name}.uuid == uuid)
+    {var_name} = {exec_}.first()
     if not {var_name}:
         raise HTTPException(status_code=404, detail="{name} not found")
-    return {var_name}
+    if selected:
+        payload = project({var_name}, selected)
+        not_modified = conditional_response(request, response, make_etag({sparse_etag_parts}))
+        if not_modified:
+            return not_modified
+        return sparse_response(payload, response)
+{cache_store}    not_modified = conditional_response(request, response, make_etag({etag_parts}))
+    if not_modified:
+        return not_modified
+    return read_serializer.response({var_name}, response)
 
 @router.patch("/{{uuid}}", response_model={name}Read)
-def update_{var_name}(uuid: UUID, {var_name}_in: {name}Update, session: Session = Depends(get_session)):
-    statement = select({name}).where({name}.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+{def_} update_{var_name}(uuid: UUID, {var_name}_in: {name}Update{update_password_param}, session: {session_type} = Depends({get_session})):
+    values = {var_name}_in.model_dump(exclude_unset=True{update_exclude})
+{update_password_lines}{on_update_lines}{update_statement}    updated = {exec_}.mappings().first()
+    if not updated:
         raise HTTPException(status_code=404, detail="{name} not found")
-        
-    hero_data = {var_name}_in.model_dump(exclude_unset=True)
-    for key, value in hero_data.items():
-        setattr(db_obj, key, value)
-        
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    {aw}session.commit()
+{cache_invalidate}    return read_serializer.response(updated)
 
 @router.delete("/{{uuid}}")
-def delete_{var_name}(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select({name}).where({name}.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+{def_} delete_{var_name}(uuid: UUID, session: {session_type} = Depends({get_session})):
+    # Children are handled by the FK ON DELETE actions (DSL on_delete).
+    statement = delete({name}).where({name}.uuid == uuid).returning({name}.id)
+    try:
+        deleted = {exec_}.first()
+    except IntegrityError:
+        {aw}session.rollback()
+        raise HTTPException(status_code=409, detail="{name} is still referenced")
+    if not deleted:
         raise HTTPException(status_code=404, detail="{name} not found")
-        
-    session.delete(db_obj)
-    session.commit()
-    return {{"ok": True}}
+    {aw}session.commit()
+{cache_invalidate}    return {{"ok": True}}
 """
 
 def generate_test(entity_data: Dict[str, Any]) -> str:
@@ -343,16 +937,118 @@ def generate_test(entity_data: Dict[str, Any]) -> str:
             else:
                 sample_data[f['name']] = val
     
-    return f"""import pytest
+    # Equality filters are exercised with the sample values; datetime
+    # bounds with a lower bound no row can reach.
+    filterable = get_filterable_fields(entity_data)
+    eq_filters = [f['name'] for f in filterable if f['type'] != 'datetime' and f['name'] in sample_data]
+    range_filters = [f['name'] for f in filterable if f['type'] == 'datetime']
+    sortable = get_sortable_fields(entity_data)
+
+    # ?expand= returns every requested relationship, even when empty
+    expand_test = ""
+    expansions = get_expansions(entity_data)
+    if expansions:
+        expand_names = [e['name'] for e in expansions]
+        expand_test = f"""
+def test_read_{var_name}_expanded(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+    expand = ",".join({expand_names!r})
+
+    response = client.get(f"/{table_name}/{{uuid}}", params={{"expand": expand}})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uuid"] == uuid
+    assert all(name in body for name in {expand_names!r})
+    etag = response.headers["etag"]
+    not_modified = client.get(f"/{table_name}/{{uuid}}", params={{"expand": expand}}, headers={{"If-None-Match": etag}})
+    assert not_modified.status_code == 304
+
+    page = client.get("/{table_name}/", params={{"expand": expand, "limit": 5}}).json()
+    assert all(name in item for item in page["items"] for name in {expand_names!r})
+    assert client.get("/{table_name}/", params={{"expand": "nope"}}).status_code == 400
+"""
+
+    # Statements per endpoint, bounded by the DSL query_budget. The PATCH
+    # (and cache) tests change the first plain string field.
+    budget = get_query_budget(entity_data)
+    patch_field = next(
+        (f['name'] for f in entity_data.get('fields', [])
+         if f['type'] == 'str' and not f.get('unique') and f['name'] != 'hashed_password'),
+        None,
+    )
+    patch_data = {patch_field: "budget"} if patch_field else {}
+    expanded_budget = ""
+    if expansions:
+        expanded_budget = f"""
+    with query_counter() as queries:
+        assert client.get(f"/{table_name}/{{uuid}}", params={{"expand": ",".join({[e['name'] for e in expansions]!r})}}).status_code == 200
+    queries.assert_budget({budget['read_expanded']}, "read_expanded")
+"""
+    budget_test = f"""
+def test_{var_name}_query_budget(client: TestClient, query_counter):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+
+    with query_counter() as queries:
+        uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+    queries.assert_budget({budget['create']}, "create")
+
+    with query_counter() as queries:
+        assert client.get(f"/{table_name}/{{uuid}}").status_code == 200
+    queries.assert_budget({budget['read']}, "read")
+{expanded_budget}
+    with query_counter() as queries:
+        assert client.get("/{table_name}/").status_code == 200
+    queries.assert_budget({budget['list']}, "list")
+
+    with query_counter() as queries:
+        assert client.patch(f"/{table_name}/{{uuid}}", json={patch_data!r}).status_code == 200
+    queries.assert_budget({budget['update']}, "update")
+
+    with query_counter() as queries:
+        assert client.delete(f"/{table_name}/{{uuid}}").status_code == 200
+    queries.assert_budget({budget['delete']}, "delete")
+"""
+
+    # PATCH must invalidate the cached GET /{uuid} entry
+    cache_test = ""
+    if entity_data.get('cache'):
+        cache_test = f"""
+def test_update_{var_name}_invalidates_cache(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+
+    assert client.get(f"/{table_name}/{{uuid}}").status_code == 200  # cached
+    client.patch(f"/{table_name}/{{uuid}}", json={{"{patch_field}": "updated"}})
+    response = client.get(f"/{table_name}/{{uuid}}")
+    assert response.json()["{patch_field}"] == "updated"
+
+    client.delete(f"/{table_name}/{{uuid}}")
+    assert client.get(f"/{table_name}/{{uuid}}").status_code == 404
+"""
+
+    return f"""import csv
+import io
+import json
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 from uuid import uuid4
 from caramello.main import app
 from caramello.models.{var_name} import {name}
 
-@pytest.fixture(name="client")
+@pytest.fixture(name="client", scope="module")
 def client_fixture():
-    return TestClient(app)
+    # One event loop for the whole module: in async mode each loop gets its
+    # own engine and connection pool.
+    with TestClient(app) as client:
+        yield client
 
 def test_create_{var_name}(client: TestClient):
     # Dynamic sample data
@@ -370,6 +1066,36 @@ def test_create_{var_name}(client: TestClient):
     data = response.json()
     assert data["uuid"] is not None
 
+def test_create_{var_name}_bulk(client: TestClient):
+    items = []
+    for _ in range(2):
+        data = {sample_data}
+        if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+        items.append(data)
+
+    response = client.post("/{table_name}/bulk", json=items)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["created"]) == 2
+    assert body["errors"] == []
+
+def test_create_{var_name}_bulk_partial(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+
+    # Atomic mode rejects the whole batch...
+    response = client.post("/{table_name}/bulk", json=[data, {{}}])
+    assert response.status_code == 422
+
+    # ...partial mode creates the valid item and reports the other one.
+    response = client.post("/{table_name}/bulk", params={{"mode": "partial"}}, json=[data, {{}}])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["created"]) == 1
+    assert [error["index"] for error in body["errors"]] == [1]
+
 def test_read_{var_name}(client: TestClient):
     # Dynamic sample data
     data = {sample_data}
@@ -388,6 +1114,24 @@ def test_read_{var_name}(client: TestClient):
     assert response.status_code == 200
     assert response.json()["uuid"] == uuid
 
+def test_read_{var_name}_not_modified(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+
+    response = client.get(f"/{table_name}/{{uuid}}")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(f"/{table_name}/{{uuid}}", headers={{"If-None-Match": etag}})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/{table_name}/", params={{"limit": 5}})
+    response = client.get("/{table_name}/", params={{"limit": 5}}, headers={{"If-None-Match": response.headers["etag"]}})
+    assert response.status_code == 304
+
 def test_read_{var_name}_list(client: TestClient):
     # Dynamic sample data
     data = {sample_data}
@@ -397,56 +1141,352 @@ def test_read_{var_name}_list(client: TestClient):
     client.post("/{table_name}/", json=data)
     response = client.get("/{table_name}/")
     assert response.status_code == 200
-    assert len(response.json()) > 0
-"""
+    assert len(response.json()["items"]) > 0
+
+def test_read_{var_name}_list_cursor(client: TestClient):
+    # Dynamic sample data
+    data = {sample_data}
+    for _ in range(2):
+        if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+        client.post("/{table_name}/", json=data)
+
+    first = client.get("/{table_name}/", params={{"limit": 1}})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["items"]) == 1
+    assert page["next_cursor"] is not None
+    assert 'rel="next"' in first.headers["link"]
+
+    second = client.get("/{table_name}/", params={{"limit": 1, "cursor": page["next_cursor"]}})
+    assert second.status_code == 200
+    assert second.json()["items"][0]["uuid"] != page["items"][0]["uuid"]
+
+def test_read_{var_name}_list_sorted(client: TestClient):
+    for _ in range(2):
+        data = {sample_data}
+        if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+        client.post("/{table_name}/", json=data)
+
+    for field in {sortable!r}:
+        page = client.get("/{table_name}/", params={{"limit": 1, "sort": f"-{{field}}"}}).json()
+        second = client.get("/{table_name}/", params={{"limit": 1, "sort": f"-{{field}}", "cursor": page["next_cursor"]}})
+        assert second.status_code == 200
+        assert second.json()["items"][0][field] <= page["items"][0][field]
+        # A cursor only resumes the sort it was built for.
+        assert client.get("/{table_name}/", params={{"sort": field, "cursor": page["next_cursor"]}}).status_code == 400
+    assert client.get("/{table_name}/", params={{"sort": "uuid"}}).status_code == 422
+
+def test_read_{var_name}_list_filtered(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    client.post("/{table_name}/", json=data)
+
+    params = {{name: data[name] for name in {eq_filters!r}}}
+    response = client.get("/{table_name}/", params=params)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items
+    assert all(item[name] == value for item in items for name, value in params.items())
+    for name in {range_filters!r}:
+        response = client.get("/{table_name}/", params={{f"{{name}}_gte": "2999-01-01T00:00:00"}})
+        assert response.json()["items"] == []
+
+def test_export_{var_name}s(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+
+    response = client.get("/{table_name}/export", params={{"sort": "-{sortable[0]}"}})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert uuid in {{row["uuid"] for row in rows}}
+    assert client.get(f"/{table_name}/{{uuid}}").json() in rows
+
+    response = client.get("/{table_name}/export", params={{"format": "csv"}})
+    assert response.status_code == 200
+    header, *records = list(csv.reader(io.StringIO(response.text)))
+    assert header == list(client.get(f"/{table_name}/{{uuid}}").json())
+    assert len(records) == len(rows)
+
+def test_read_{var_name}_list_count(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    client.post("/{table_name}/", json=data)
+
+    assert "x-total-count" not in client.get("/{table_name}/").headers
+    exact = client.get("/{table_name}/", params={{"count": "exact", "limit": 1}})
+    assert int(exact.headers["x-total-count"]) >= 1
+    estimated = client.get("/{table_name}/", params={{"count": "estimated", "limit": 1}})
+    assert int(estimated.headers["x-total-count"]) >= 0
+    filtered = client.get("/{table_name}/", params={{"count": "estimated", **{{name: data[name] for name in {eq_filters!r}}}}})
+    assert int(filtered.headers["x-total-count"]) >= 0
+
+def test_read_{var_name}_list_invalid_cursor(client: TestClient):
+    response = client.get("/{table_name}/", params={{"cursor": "not-a-cursor"}})
+    assert response.status_code == 400
+
+def test_read_{var_name}_fields(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+
+    response = client.get(f"/{table_name}/{{uuid}}", params={{"fields": "uuid"}})
+    assert response.status_code == 200
+    assert response.json() == {{"uuid": uuid}}
+    # The full read fills the cache (if enabled); the sparse one is then projected from it.
+    full = client.get(f"/{table_name}/{{uuid}}")
+    cached = client.get(f"/{table_name}/{{uuid}}", params={{"fields": "uuid"}})
+    assert cached.json() == {{"uuid": uuid}}
+    assert cached.headers["etag"] == response.headers["etag"] != full.headers["etag"]
+
+    page = client.get("/{table_name}/", params={{"fields": "uuid", "limit": 1}})
+    assert page.status_code == 200
+    assert list(page.json()["items"][0]) == ["uuid"]
+    assert client.get("/{table_name}/", params={{"fields": "uuid,nope"}}).status_code == 400
+
+def test_delete_{var_name}(client: TestClient):
+    data = {sample_data}
+    if "email" in data: data["email"] = f"test_{{uuid4()}}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{{uuid4()}}"
+    uuid = client.post("/{table_name}/", json=data).json()["uuid"]
+
+    response = client.delete(f"/{table_name}/{{uuid}}")
+    assert response.status_code == 200
+    assert client.get(f"/{table_name}/{{uuid}}").status_code == 404
+    assert client.delete(f"/{table_name}/{{uuid}}").status_code == 404
+
+def test_update_{var_name}_not_found(client: TestClient):
+    response = client.patch(f"/{table_name}/{{uuid4()}}", json={{}})
+    assert response.status_code == 404
+{budget_test}{expand_test}{cache_test}"""
+
+def generate_models_init(entities: List[Dict[str, Any]]) -> str:
+    """models/__init__.py: imports every table model (so SQLAlchemy can
+    resolve relationships) and resolves the forward references of the
+    expanded Read schemas once all modules are loaded."""
+    lines = []
+    expanded = []
+    for e in entities:
+        names = [e['name']]
+        if get_expansions(e):
+            names += [f"{e['name']}Read", f"{e['name']}ReadExpanded", f"{e['name']}PageExpanded"]
+            expanded.append(e['name'])
+        elif not e.get('is_link_model'):
+            names.append(f"{e['name']}Read")
+        lines.append(f"from .{e['name'].lower()} import {', '.join(names)}")
+    if expanded:
+        reads = [e['name'] for e in entities if not e.get('is_link_model')]
+        namespace = ", ".join(f"\"{n}Read\": {n}Read" for n in reads)
+        lines += [
+            "",
+            "# Expanded Read schemas reference other entities' Read schemas.",
+            f"_read_schemas = {{{namespace}}}",
+        ]
+        for n in expanded:
+            lines.append(f"{n}ReadExpanded.model_rebuild(_types_namespace=_read_schemas)")
+            lines.append(f"{n}PageExpanded.model_rebuild()")
+    return "\n".join(lines) + "\n"
+
+def generate_routers_init(entities: List[Dict[str, Any]]) -> str:
+    """api/generated/__init__.py: registry of the generated routers by
+    prefix. Only module paths are listed, so importing the registry does not
+    import any router (see caramello.api.registry for lazy mounting)."""
+    entries = "".join(
+        f"    \"/{e['table_name']}\": \"caramello.api.generated.{e['name'].lower()}_router\",\n"
+        for e in entities if not e.get('is_link_model')
+    )
+    return f"# Generated from the DSL manifest: prefix -> router module.\nROUTERS = {{\n{entries}}}\n"
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generates models, routers and tests from the DSL.")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Emit 'async def' routers on AsyncSession (overrides x-caramello-async in the manifest).",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Write nothing; exit with status 1 if any generated file is out of date (CI).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate every entity, ignoring the generation manifest.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to generate changed entities (default: CPU count).",
+    )
+    return parser.parse_args()
+
+# -- Incremental generation --------------------------------------------------
+# Every run records in GENERATION_MANIFEST the digests of its inputs (DSL
+# files, generator source, async flag) and of the files it produced. A run
+# whose inputs and outputs still match is a no-op that never parses the
+# entities; otherwise only entities whose resolved definition changed (or
+# whose outputs were edited/removed) are regenerated, and files are only
+# rewritten when their content differs, so mtimes, bytecode and reloaders
+# are left alone.
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def file_digest(path: Path) -> Optional[str]:
+    try:
+        return digest(path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+def relative(path: Path) -> str:
+    return path.relative_to(ROOT_DIR).as_posix()
+
+def input_digests(manifest_path: Path, entity_ids: List[str], use_async: bool) -> Dict[str, Any]:
+    return {
+        "generator": file_digest(Path(__file__).resolve()),
+        "async": use_async,
+        "manifest": file_digest(manifest_path),
+        "entities": {entity_file: file_digest(ENTITIES_DIR / entity_file) for entity_file in entity_ids},
+    }
+
+def read_generation_manifest() -> Dict[str, Any]:
+    try:
+        return json.loads(GENERATION_MANIFEST.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def outputs_intact(outputs: Dict[str, str]) -> bool:
+    """Whether every recorded output still exists with the recorded content."""
+    return all(file_digest(ROOT_DIR / path) == expected for path, expected in outputs.items())
+
+def generate_entity(data: Dict[str, Any], use_async: bool) -> Dict[str, str]:
+    """Renders one entity's files: {path relative to the repo: content}.
+
+    Module-level and side-effect free, so it can run in a worker process.
+    """
+    name = data['name'].lower()
+    files = {relative(MODELS_OUTPUT_DIR / f"{name}.py"): generate_models(data)}
+    if not data.get('is_link_model', False):
+        # Routers and tests only for main entities
+        files[relative(API_OUTPUT_DIR / f"{name}_router.py")] = generate_router(data, use_async=use_async)
+        files[relative(TESTS_OUTPUT_DIR / f"test_{name}.py")] = generate_test(data)
+    return files
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Atomically replaces `path` with `content`, unless it already has it."""
+    encoded = content.encode('utf-8')
+    if path.exists() and path.read_bytes() == encoded:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(encoded)
+    os.replace(tmp_path, path)
+    return True
+
+def main() -> int:
+    args = parse_args()
 
-def main():
-    print("🚀 Starting Code Generation...")
-    
-    MODELS_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    API_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    TESTS_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    
-    (MODELS_OUTPUT_DIR / "__init__.py").touch()
-    (API_OUTPUT_DIR / "__init__.py").touch()
-    (TESTS_OUTPUT_DIR / "__init__.py").touch()
-    
     manifest_path = DSL_DIR / "manifest.yaml"
     manifest = load_yaml(manifest_path)
     
     if not manifest:
-        return
+        return 1
 
     entity_ids = manifest.get('x-caramello-entities', [])
+    use_async = args.use_async or manifest.get('x-caramello-async', False)
+    inputs = input_digests(manifest_path, entity_ids, use_async)
+    previous = {} if args.force else read_generation_manifest()
+    recorded = {
+        **previous.get('shared', {}),
+        **{path: d for entry in previous.get('entities', {}).values() for path, d in entry['outputs'].items()},
+    }
+    if previous.get('inputs') == inputs and outputs_intact(recorded):
+        print("✅ Generated code is up to date.")
+        return 0
+
+    print("🚀 Starting Code Generation...")
+    if use_async:
+        print("⚡ Async mode: routers will use AsyncSession.")
     
-    for entity_file in entity_ids:
+    # Load every entity first: relationship options such as on_delete
+    # end up on fields of other entities.
+    loaded = [(entity_file, load_yaml(ENTITIES_DIR / entity_file)) for entity_file in entity_ids]
+    loaded = [(entity_file, data) for entity_file, data in loaded if data]
+    resolve_on_delete({data['name']: data for _, data in loaded})
+
+    # An entity is regenerated when its resolved definition, the generator
+    # or the async flag changed, or when one of its outputs was touched.
+    entities: Dict[str, Dict[str, Any]] = {}
+    changed = []
+    for entity_file, data in loaded:
+        key = json.dumps([data, inputs['generator'], use_async], sort_keys=True, default=str)
+        entry = previous.get('entities', {}).get(entity_file)
+        entities[entity_file] = {"digest": digest(key.encode()), "outputs": entry['outputs'] if entry else {}}
+        if not entry or entry['digest'] != entities[entity_file]['digest'] or not outputs_intact(entry['outputs']):
+            changed.append((entity_file, data))
+
+    for entity_file, _ in changed:
         print(f"Processing {entity_file}...")
-        entity_path = ENTITIES_DIR / entity_file
-        data = load_yaml(entity_path)
-        if not data: continue
-        
-        name = data['name']
-        is_link = data.get('is_link_model', False)
-        
-        # 1. Model
-        model_code = generate_models(data)
-        with open(MODELS_OUTPUT_DIR / f"{name.lower()}.py", 'w') as f:
-            f.write(model_code)
-            
-        if is_link:
-            continue
-            
-        # 2. Router (Only for Main Entities)
-        router_code = generate_router(data)
-        with open(API_OUTPUT_DIR / f"{name.lower()}_router.py", 'w') as f:
-            f.write(router_code)
-            
-        # 3. Tests
-        test_code = generate_test(data)
-        with open(TESTS_OUTPUT_DIR / f"test_{name.lower()}.py", 'w') as f:
-            f.write(test_code)
-            
-    print("✅ Generation Complete.")
+    datas = [data for _, data in changed]
+    if args.jobs > 1 and len(datas) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(datas))) as executor:
+            rendered = list(executor.map(generate_entity, datas, repeat(use_async)))
+    else:
+        rendered = [generate_entity(data, use_async) for data in datas]
+
+    files: Dict[str, str] = {}
+    for (entity_file, _), entity_files in zip(changed, rendered):
+        files.update(entity_files)
+        entities[entity_file]['outputs'] = {path: digest(content.encode()) for path, content in entity_files.items()}
+    # Shared files depend on every entity; they are cheap to render.
+    shared = {
+        relative(MODELS_OUTPUT_DIR / "__init__.py"): generate_models_init([data for _, data in loaded]),
+        relative(API_OUTPUT_DIR / "__init__.py"): generate_routers_init([data for _, data in loaded]),
+        relative(TESTS_OUTPUT_DIR / "__init__.py"): "",
+    }
+    files.update(shared)
+    # Outputs of entities removed from the manifest
+    stale = [
+        path
+        for entity_file, entry in previous.get('entities', {}).items() if entity_file not in entities
+        for path in entry['outputs'] if (ROOT_DIR / path).exists()
+    ]
+
+    if args.check:
+        outdated = [path for path, content in files.items() if file_digest(ROOT_DIR / path) != digest(content.encode())]
+        for path in outdated + stale:
+            print(f"❌ Out of date: {path}")
+        if outdated or stale:
+            print("Run ./bin/generate_code to update the generated code.")
+            return 1
+        print("✅ Generated code is up to date.")
+        return 0
+
+    written = [path for path, content in files.items() if write_if_changed(ROOT_DIR / path, content)]
+    for path in stale:
+        (ROOT_DIR / path).unlink()
+    write_if_changed(GENERATION_MANIFEST, json.dumps({
+        "inputs": inputs,
+        "entities": entities,
+        "shared": {path: digest(content.encode()) for path, content in shared.items()},
+    }, indent=2, sort_keys=True) + "\n")
+
+    for path in written:
+        print(f"  wrote {path}")
+    for path in stale:
+        print(f"  removed {path}")
+    print(f"✅ Generation Complete ({len(written)} file(s) written, {len(files) - len(written)} unchanged).")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Expires pending family invitations past `expires_at`, in batches.
+
+Meant for cron (or a one-off run); the app can also sweep in-process with
+INVITATION_SWEEP_INTERVAL. Safe to run alongside other sweeps.
+
+Usage:
+    ./bin/sweep_invitations
+    ./bin/sweep_invitations --batch-size 500 --max-batches 20
+    ./bin/sweep_invitations --interval 60   # keep sweeping every minute
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from caramello.services.family_invitation import sweep_expired_invitations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Expires pending invitations past their expiry.")
+    parser.add_argument("--batch-size", type=int, help="Invitations per transaction (default: INVITATION_SWEEP_BATCH_SIZE)")
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches (default: until none is left)")
+    parser.add_argument("--interval", type=float, help="Sweep again every INTERVAL seconds instead of exiting")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    while True:
+        expired = sweep_expired_invitations(args.batch_size, args.max_batches)
+        print(f"Expired {expired} invitation(s)")
+        if args.interval is None:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
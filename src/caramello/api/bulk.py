@@ -0,0 +1,103 @@
+"""Validation and error reporting shared by the generated bulk endpoints."""
+
+from typing import Any, Literal, Sequence
+
+from fastapi import Body, HTTPException
+from pydantic import ValidationError
+from sqlalchemy import RowMapping, select
+from sqlmodel import Session, SQLModel
+
+from caramello.core.config import get_settings
+
+BulkMode = Literal["atomic", "partial"]
+
+
+def _check_size(payload: list[dict[str, Any]], limit: int) -> list[dict[str, Any]]:
+    if len(payload) > limit:
+        raise HTTPException(status_code=422, detail=f"At most {limit} items per request")
+    return payload
+
+
+def bulk_payload(payload: list[dict[str, Any]] = Body(...)) -> list[dict[str, Any]]:
+    """The request body of a bulk endpoint, rejected with 422 above
+    BULK_MAX_ITEMS items (read per request, not when the router is imported)."""
+    return _check_size(payload, get_settings().BULK_MAX_ITEMS)
+
+
+def password_bulk_payload(payload: list[dict[str, Any]] = Body(...)) -> list[dict[str, Any]]:
+    """`bulk_payload` of the entities with a password: every item costs a
+    scrypt hash, so the limit is the much smaller BULK_MAX_PASSWORD_ITEMS,
+    checked before anything is hashed."""
+    return _check_size(payload, get_settings().BULK_MAX_PASSWORD_ITEMS)
+
+
+def validate_bulk_items(
+    payload: Sequence[dict[str, Any]],
+    create_schema: type[SQLModel],
+    model: type[SQLModel],
+) -> tuple[list[int], list[dict[str, Any]], list[dict[str, Any]]]:
+    """Validates every item in a single pass, collecting per-item errors.
+
+    Returns:
+        The payload index of each valid item, the column values to insert
+        for it (defaults such as `uuid` already applied), and one
+        `{"index", "detail"}` error per invalid item.
+    """
+    indexes: list[int] = []
+    rows: list[dict[str, Any]] = []
+    errors: list[dict[str, Any]] = []
+    for index, item in enumerate(payload):
+        try:
+            item_in = create_schema.model_validate(item)
+            db_obj = model.model_validate(item_in.model_dump(exclude_unset=True))
+        except ValidationError as e:
+            detail = e.errors(include_url=False, include_context=False, include_input=False)
+            errors.append({"index": index, "detail": detail})
+            continue
+        indexes.append(index)
+        rows.append(db_obj.model_dump(exclude={"id"}))
+    return indexes, rows, errors
+
+
+def check_references(
+    session: Session,
+    model: type[SQLModel],
+    indexes: Sequence[int],
+    rows: Sequence[dict[str, Any]],
+) -> tuple[list[int], list[dict[str, Any]], list[dict[str, Any]]]:
+    """Sets aside the items whose foreign keys point at no existing row,
+    with one SELECT per foreign key, so a bad reference fails only its own
+    item instead of the whole INSERT.
+
+    Returns:
+        The payload indexes and rows that passed, and one
+        `{"index", "detail"}` error per item that did not.
+    """
+    missing: dict[int, str] = {}
+    for foreign_key in model.__table__.foreign_keys:
+        name = foreign_key.parent.name
+        values = {row[name] for row in rows if row.get(name) is not None}
+        if not values:
+            continue
+        statement = select(foreign_key.column).where(foreign_key.column.in_(values))
+        found = set(session.connection().execute(statement).scalars())
+        for position, row in enumerate(rows):
+            if row.get(name) is not None and row[name] not in found:
+                missing.setdefault(position, f"References a missing {foreign_key.column.table.name}")
+    kept = [position for position in range(len(rows)) if position not in missing]
+    errors = [{"index": indexes[position], "detail": detail} for position, detail in missing.items()]
+    return [indexes[position] for position in kept], [rows[position] for position in kept], errors
+
+
+def conflict_errors(
+    indexes: Sequence[int],
+    rows: Sequence[dict[str, Any]],
+    created: Sequence[RowMapping],
+) -> list[dict[str, Any]]:
+    """Reports the rows skipped by `ON CONFLICT DO NOTHING` (matched by uuid)."""
+    created_uuids = {row["uuid"] for row in created}
+    return [
+        {"index": index, "detail": "Conflicts with an existing row"}
+        for index, row in zip(indexes, rows)
+        if row["uuid"] not in created_uuids
+    ]
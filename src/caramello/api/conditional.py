@@ -0,0 +1,76 @@
+"""Weak ETags and conditional GET (If-None-Match / 304) for the generated reads."""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response
+from sqlmodel import SQLModel
+
+from caramello.api.fields import project
+
+
+def _json_default(value: Any) -> str:
+    # Same text Pydantic emits in JSON mode, so an ETag computed from a
+    # cached payload matches the one computed from the ORM object.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def make_etag(*parts: Any) -> str:
+    """Builds a weak ETag from the values that identify a representation."""
+    raw = json.dumps(parts, default=_json_default, sort_keys=True, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def page_etag(
+    page: dict[str, Any],
+    version_field: Optional[str],
+    read_schema: type[SQLModel],
+    fields: Optional[Sequence[str]] = None,
+) -> str:
+    """Builds the ETag of a list page.
+
+    With a version field the tag is (max version, row count, next cursor),
+    which needs no serialization. Entities without one fall back to hashing
+    the serialized items. A sparse fieldset is part of the tag, since each
+    projection is a different representation.
+    """
+    items = page["items"]
+    if version_field:
+        latest = max((getattr(item, version_field) for item in items), default=None)
+        return make_etag(latest, len(items), page["next_cursor"], fields)
+    if fields:
+        payload = [project(item, fields) for item in items]
+    else:
+        payload = [read_schema.model_validate(item).model_dump(mode="json") for item in items]
+    return make_etag(payload, page["next_cursor"], fields)
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): the W/ prefix is ignored.
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_response(
+    request: Request, response: Response, etag: str
+) -> Optional[Response]:
+    """Sets the ETag header and short-circuits when the client is up to date.
+
+    Returns:
+        A 304 response if `If-None-Match` matches `etag`, else None.
+    """
+    response.headers["ETag"] = etag
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -0,0 +1,43 @@
+"""Read-your-writes window for deployments with read replicas.
+
+Replicas lag behind the primary, so a client reading right after a write
+may not see it. When DB_READ_YOUR_WRITES_SECONDS is set, every successful
+write response carries a cookie with the end of the window; while it holds,
+`get_read_session` sends that client's reads to the primary. Clients that
+do not keep cookies read from the replicas as before.
+"""
+
+import math
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from caramello.database.replicas import READ_YOUR_WRITES_COOKIE
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReadYourWritesMiddleware:
+    """Sets the read-your-writes cookie on successful write responses."""
+
+    def __init__(self, app: ASGIApp, seconds: float) -> None:
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.seconds
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={math.ceil(self.seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,75 @@
+"""Relationship expansion (`?expand=members,invitations`) for the generated reads.
+
+Each expandable relationship is eagerly loaded with one loader option, so a
+page costs a constant number of queries whatever its size: `selectinload`
+(one extra SELECT ... WHERE fk IN (...) per relationship) for collections,
+`joinedload` (same SELECT) for many-to-one. The payload is then built only
+from loaded attributes, so no lazy load can happen while serializing.
+"""
+
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import InstrumentedAttribute, joinedload, selectinload
+from sqlmodel import SQLModel
+
+from caramello.api.conditional import conditional_response, make_etag
+from caramello.api.fields import project
+from caramello.api.serialization import Serializer, render_json
+
+
+class Expansion:
+    """An expandable relationship: its loader option and nested serializer."""
+
+    def __init__(
+        self, attribute: InstrumentedAttribute, read_schema: type[SQLModel], many: bool
+    ) -> None:
+        self.key = attribute.key
+        self.option = selectinload(attribute) if many else joinedload(attribute)
+        self.serializer = Serializer(list[read_schema] if many else Optional[read_schema])
+
+
+def parse_expand(expand: Optional[str], expansions: dict[str, Expansion]) -> list[str]:
+    """Parses the comma-separated `expand` parameter.
+
+    Raises:
+        HTTPException: 400 if a name is not an expandable relationship.
+    """
+    if not expand:
+        return []
+    names = list(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+    unknown = [name for name in names if name not in expansions]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expansion(s): {', '.join(unknown)}")
+    return names
+
+
+def load_options(names: Sequence[str], expansions: dict[str, Expansion]) -> list[Any]:
+    """Loader options for the requested relationships."""
+    return [expansions[name].option for name in names]
+
+
+def expanded_payload(
+    obj: Any,
+    fields: Sequence[str],
+    names: Sequence[str],
+    expansions: dict[str, Expansion],
+) -> dict[str, Any]:
+    """The entity's own fields plus each requested relationship, serialized
+    with the related entity's Read schema."""
+    payload = project(obj, fields)
+    for name in names:
+        payload[name] = expansions[name].serializer.dump_python(getattr(obj, name))
+    return payload
+
+
+def expanded_response(payload: Any, request: Request, response: Response) -> Response:
+    """Renders an expanded payload, honouring If-None-Match.
+
+    The parent's version field does not change when related rows do, so the
+    ETag is a hash of the whole payload.
+    """
+    not_modified = conditional_response(request, response, make_etag(payload))
+    if not_modified:
+        return not_modified
+    return Response(render_json(payload), media_type="application/json", headers=dict(response.headers))
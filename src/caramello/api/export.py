@@ -0,0 +1,91 @@
+"""NDJSON/CSV encoding shared by the generated streaming export endpoints."""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, Literal, Sequence, Union
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _encode_value(value: Any) -> Any:
+    # Same text as the JSON read endpoints (UUIDs as strings, ISO datetimes).
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def encode_ndjson(rows: Sequence[Row]) -> str:
+    """One JSON object per line."""
+    return "".join(
+        json.dumps({key: _encode_value(value) for key, value in row._mapping.items()}) + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Sequence[Row]) -> str:
+    """CSV records without header (NULL becomes an empty field)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_encode_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def csv_header(columns: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+
+def _chunks(
+    partitions: Iterator[Sequence[Row]], columns: Sequence[str], fmt: ExportFormat
+) -> Iterator[str]:
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    if fmt == "csv":
+        yield csv_header(columns)
+    for rows in partitions:
+        yield encode(rows)
+
+
+async def _achunks(
+    partitions: AsyncIterator[Sequence[Row]], columns: Sequence[str], fmt: ExportFormat
+) -> AsyncIterator[str]:
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    if fmt == "csv":
+        yield csv_header(columns)
+    async for rows in partitions:
+        yield encode(rows)
+
+
+def export_response(
+    partitions: Union[Iterator[Sequence[Row]], AsyncIterator[Sequence[Row]]],
+    columns: Sequence[str],
+    fmt: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """Streams the row batches as NDJSON or CSV, one chunk per batch.
+
+    Args:
+        partitions: Row batches from `stream_partitions` (sync handlers) or
+            `astream_partitions` (async handlers).
+        columns: Selected column names, in order (CSV header).
+        fmt: Output format.
+        filename: Download name, without extension.
+    """
+    if hasattr(partitions, "__aiter__"):
+        chunks = _achunks(partitions, columns, fmt)
+    else:
+        chunks = _chunks(partitions, columns, fmt)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,64 @@
+"""Sparse fieldsets (`?fields=uuid,full_name`) for the generated read endpoints."""
+
+from collections.abc import Mapping
+from typing import Any, Iterable, Optional, Sequence, Union
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, select
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import SQLModel
+
+from caramello.api.serialization import render_json
+
+
+def parse_fields(
+    fields: Optional[str], read_schema: type[SQLModel]
+) -> Optional[list[str]]:
+    """Parses the comma-separated `fields` parameter.
+
+    Returns:
+        The requested field names in order, or None when the parameter is
+        absent or empty (full representation).
+
+    Raises:
+        HTTPException: 400 if a name is not a field of `read_schema`.
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in read_schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return names or None
+
+
+def select_fields(
+    model: type[SQLModel],
+    names: Sequence[str],
+    required: Iterable[Union[str, InstrumentedAttribute]] = (),
+) -> Select:
+    """Column-only SELECT of the requested fields plus those the handler
+    needs itself (sort key for the cursor, uuid and version for the ETag),
+    given as names or model attributes.
+
+    A plain SQLAlchemy `select` is used on purpose: SQLModel's would return
+    bare scalars when a single column is selected.
+    """
+    required_names = [getattr(column, "key", column) for column in required]
+    return select(*[getattr(model, name) for name in dict.fromkeys([*names, *required_names])])
+
+
+def project(item: Any, names: Sequence[str]) -> dict[str, Any]:
+    """Keeps only the requested fields of a row, ORM object or cached payload."""
+    if isinstance(item, Mapping):
+        return {name: item[name] for name in names}
+    return {name: getattr(item, name) for name in names}
+
+
+def sparse_response(payload: Any, response: Response) -> Response:
+    """Serializes a projected (or cached) payload directly, skipping the
+    response model.
+
+    Headers already set on the injected response (ETag, Link) are kept.
+    """
+    return Response(render_json(payload), media_type="application/json", headers=dict(response.headers))
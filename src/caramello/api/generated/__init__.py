@@ -0,0 +1,6 @@
+# Generated from the DSL manifest: prefix -> router module.
+ROUTERS = {
+    "/user": "caramello.api.generated.user_router",
+    "/family": "caramello.api.generated.family_router",
+    "/family_invitation": "caramello.api.generated.familyinvitation_router",
+}
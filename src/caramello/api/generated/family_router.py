@@ -1,59 +1,224 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
-from typing import List
+from typing import Any, Literal, Optional
 from uuid import UUID
-from caramello.database.session import get_session
-from caramello.models.family import Family, FamilyRead, FamilyCreate, FamilyUpdate
+from datetime import datetime
+from caramello.api.bulk import BulkMode, bulk_payload, conflict_errors, validate_bulk_items
+from caramello.api.conditional import conditional_response, make_etag, page_etag
+from caramello.api.expand import Expansion, expanded_payload, expanded_response, load_options, parse_expand
+from caramello.api.export import ExportFormat, export_response
+from caramello.api.fields import parse_fields, project, select_fields, sparse_response
+from caramello.api.pagination import apply_cursor, build_page, parse_sort, sort_order
+from caramello.api.serialization import Serializer
+from caramello.core.cache import CacheBackend, get_cache
+from caramello.database.bulk import bulk_insert
+from caramello.database.count import CountMode, count_rows
+from caramello.database.export import stream_partitions
+from caramello.database.session import get_read_session, get_session, on_primary
+from caramello.models.family import Family, FamilyRead, FamilyCreate, FamilyUpdate, FamilyPage, FamilyBulkResult, FamilyReadExpanded, FamilyPageExpanded
+from caramello.models.familyinvitation import FamilyInvitationRead
+from caramello.models.user import UserRead
 
 router = APIRouter(prefix="/family", tags=["Family"])
 
+# Validate once and dump straight to JSON bytes (see caramello.api.serialization)
+read_serializer = Serializer(FamilyRead)
+page_serializer = Serializer(FamilyPage)
+bulk_serializer = Serializer(FamilyBulkResult)
+
+# Expandable relationships (?expand=), each eagerly loaded in at most one extra query.
+EXPANSIONS = {
+    "members": Expansion(Family.members, UserRead, many=True),
+    "invitations": Expansion(Family.invitations, FamilyInvitationRead, many=True),
+}
+READ_FIELDS = list(FamilyRead.model_fields)
+
+def family_cache() -> CacheBackend:
+    return get_cache("Family", ttl=60, max_entries=10000)
+
+# Sortable fields and their keyset columns (each backed by an index).
+SORT_KEYS = {
+    "created_at": (Family.created_at, Family.id),
+}
+
+def family_filters(
+    status: Optional[str] = None,
+    created_at_gte: Optional[datetime] = None,
+    created_at_lt: Optional[datetime] = None,
+) -> list[Any]:
+    """WHERE clauses for the filterable fields (each backed by an index)."""
+    clauses: list[Any] = []
+    if status is not None:
+        clauses.append(Family.status == status)
+    if created_at_gte is not None:
+        clauses.append(Family.created_at >= created_at_gte)
+    if created_at_lt is not None:
+        clauses.append(Family.created_at < created_at_lt)
+    return clauses
+
 @router.post("/", response_model=FamilyRead)
 def create_family(family_in: FamilyCreate, session: Session = Depends(get_session)):
-    db_obj = Family.model_validate(family_in)
-    session.add(db_obj)
+    db_obj = Family.model_validate(family_in.model_dump(exclude_unset=True))
+    statement = insert(Family).values(**db_obj.model_dump(exclude={"id"})).returning(*Family.__table__.c)
+    created = session.exec(statement).mappings().one()
     session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    return read_serializer.response(created)
 
-@router.get("/", response_model=List[FamilyRead])
+@router.post("/bulk", response_model=FamilyBulkResult)
+def create_familys_bulk(
+    payload: list[dict[str, Any]] = Depends(bulk_payload),
+    mode: BulkMode = "atomic",
+    session: Session = Depends(get_session)
+):
+    # atomic: any invalid or conflicting item rejects the whole batch.
+    # partial: valid items are created, the others are reported in `errors`.
+    indexes, rows, errors = validate_bulk_items(payload, FamilyCreate, Family)
+    if errors and mode == "atomic":
+        raise HTTPException(status_code=422, detail=errors)
+    try:
+        # Unique conflicts are skipped and reported per item (no database
+        # text reaches the client); atomic mode then rejects the batch.
+        created = bulk_insert(session, Family, rows, skip_conflicts=True)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Conflicting items")
+    conflicts = conflict_errors(indexes, rows, created)
+    if conflicts and mode == "atomic":
+        session.rollback()
+        raise HTTPException(status_code=409, detail=conflicts)
+    session.commit()
+    errors += conflicts
+    return bulk_serializer.response({"created": created, "errors": sorted(errors, key=lambda error: error["index"])})
+
+@router.get("/", response_model=FamilyPageExpanded)
 def read_familys(
-    session: Session = Depends(get_session),
-    offset: int = 0,
-    limit: int = Query(default=100, le=100)
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=100),
+    sort: Literal["created_at", "-created_at"] = "created_at",
+    count: CountMode = Query(default="none", description="Total in X-Total-Count: exact (COUNT), estimated (planner statistics) or none"),
+    filters: list[Any] = Depends(family_filters),
+    expand: Optional[str] = Query(default=None, description="Comma-separated relationships to include: members, invitations"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated FamilyRead fields to return")
 ):
-    return session.exec(select(Family).offset(offset).limit(limit)).all()
+    selected = parse_fields(fields, FamilyRead)
+    expanded = parse_expand(expand, EXPANSIONS)
+    sort_field, descending = parse_sort(sort)
+    sort_columns = SORT_KEYS[sort_field]
+    if expanded:
+        statement = select(Family).options(*load_options(expanded, EXPANSIONS))
+    elif selected:
+        statement = select_fields(Family, selected, (*sort_columns, Family.updated_at))
+    else:
+        statement = select(Family)
+    statement = apply_cursor(statement.where(*filters), sort_columns, cursor, limit, descending)
+    rows = session.exec(statement).all()
+    page = build_page(rows, sort_columns, limit, request, response, descending)
+    if count != "none":
+        response.headers["X-Total-Count"] = str(count_rows(session, Family, filters, count))
+    if expanded:
+        page["items"] = [expanded_payload(row, selected or READ_FIELDS, expanded, EXPANSIONS) for row in page["items"]]
+        return expanded_response(page, request, response)
+    not_modified = conditional_response(request, response, page_etag(page, 'updated_at', FamilyRead, selected))
+    if not_modified:
+        return not_modified
+    if selected:
+        page["items"] = [project(row, selected) for row in page["items"]]
+        return sparse_response(page, response)
+    return page_serializer.response(page, response)
 
-@router.get("/{uuid}", response_model=FamilyRead)
-def read_family(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select(Family).where(Family.uuid == uuid)
+@router.get("/export")
+def export_familys(
+    format: ExportFormat = "ndjson",
+    sort: Literal["created_at", "-created_at"] = "created_at",
+    filters: list[Any] = Depends(family_filters)
+):
+    # Column-only SELECT of the Read fields, streamed from a server-side
+    # cursor on its own connection (no request session, no ORM objects).
+    sort_field, descending = parse_sort(sort)
+    columns = list(FamilyRead.model_fields)
+    statement = select_fields(Family, columns).where(*filters).order_by(*sort_order(SORT_KEYS[sort_field], descending))
+    return export_response(stream_partitions(statement), columns, format, "family")
+
+@router.get("/{uuid}", response_model=FamilyReadExpanded)
+def read_family(
+    uuid: UUID,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    expand: Optional[str] = Query(default=None, description="Comma-separated relationships to include: members, invitations"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated FamilyRead fields to return")
+):
+    selected = parse_fields(fields, FamilyRead)
+    expanded = parse_expand(expand, EXPANSIONS)
+    if expanded:
+        statement = select(Family).where(Family.uuid == uuid).options(*load_options(expanded, EXPANSIONS))
+        family = session.exec(statement).first()
+        if not family:
+            raise HTTPException(status_code=404, detail="Family not found")
+        payload = expanded_payload(family, selected or READ_FIELDS, expanded, EXPANSIONS)
+        return expanded_response(payload, request, response)
+    cached = family_cache().get(str(uuid))
+    if cached is not None:
+        payload = project(cached, selected) if selected else cached
+        not_modified = conditional_response(request, response, make_etag(cached["uuid"], cached["updated_at"], selected))
+        if not_modified:
+            return not_modified
+        return sparse_response(payload, response)
+    # Taken before the SELECT: a PATCH/DELETE that invalidates the entry
+    # meanwhile makes the fill below a no-op.
+    generation = family_cache().generation(str(uuid))
+    if selected:
+        statement = select_fields(Family, selected, ('uuid', 'updated_at')).where(Family.uuid == uuid)
+    else:
+        statement = select(Family).where(Family.uuid == uuid)
     family = session.exec(statement).first()
     if not family:
         raise HTTPException(status_code=404, detail="Family not found")
-    return family
+    if selected:
+        payload = project(family, selected)
+        not_modified = conditional_response(request, response, make_etag(family.uuid, family.updated_at, selected))
+        if not_modified:
+            return not_modified
+        return sparse_response(payload, response)
+    if on_primary(session):
+        family_cache().set(
+            str(uuid), FamilyRead.model_validate(family).model_dump(mode="json"), generation=generation
+        )
+    not_modified = conditional_response(request, response, make_etag(family.uuid, family.updated_at, selected))
+    if not_modified:
+        return not_modified
+    return read_serializer.response(family, response)
 
 @router.patch("/{uuid}", response_model=FamilyRead)
 def update_family(uuid: UUID, family_in: FamilyUpdate, session: Session = Depends(get_session)):
-    statement = select(Family).where(Family.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+    values = family_in.model_dump(exclude_unset=True)
+    values["updated_at"] = datetime.utcnow()
+    statement = (
+        update(Family).where(Family.uuid == uuid).values(**values).returning(*Family.__table__.c)
+    )
+    updated = session.exec(statement).mappings().first()
+    if not updated:
         raise HTTPException(status_code=404, detail="Family not found")
-        
-    hero_data = family_in.model_dump(exclude_unset=True)
-    for key, value in hero_data.items():
-        setattr(db_obj, key, value)
-        
-    session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    family_cache().delete(str(uuid))
+    return read_serializer.response(updated)
 
 @router.delete("/{uuid}")
 def delete_family(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select(Family).where(Family.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+    # Children are handled by the FK ON DELETE actions (DSL on_delete).
+    statement = delete(Family).where(Family.uuid == uuid).returning(Family.id)
+    try:
+        deleted = session.exec(statement).first()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Family is still referenced")
+    if not deleted:
         raise HTTPException(status_code=404, detail="Family not found")
-        
-    session.delete(db_obj)
     session.commit()
+    family_cache().delete(str(uuid))
     return {"ok": True}
@@ -1,59 +1,221 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
-from typing import List
+from typing import Any, Literal, Optional
 from uuid import UUID
-from caramello.database.session import get_session
-from caramello.models.familyinvitation import FamilyInvitation, FamilyInvitationRead, FamilyInvitationCreate, FamilyInvitationUpdate
+from datetime import datetime
+from caramello.api.bulk import BulkMode, bulk_payload, check_references, conflict_errors, validate_bulk_items
+from caramello.api.conditional import conditional_response, make_etag, page_etag
+from caramello.api.expand import Expansion, expanded_payload, expanded_response, load_options, parse_expand
+from caramello.api.export import ExportFormat, export_response
+from caramello.api.fields import parse_fields, project, select_fields, sparse_response
+from caramello.api.pagination import apply_cursor, build_page, parse_sort, sort_order
+from caramello.api.serialization import Serializer
+from caramello.database.bulk import bulk_insert
+from caramello.database.count import CountMode, count_rows
+from caramello.database.export import stream_partitions
+from caramello.database.session import get_read_session, get_session
+from caramello.models.familyinvitation import FamilyInvitation, FamilyInvitationRead, FamilyInvitationCreate, FamilyInvitationUpdate, FamilyInvitationPage, FamilyInvitationBulkResult, FamilyInvitationReadExpanded, FamilyInvitationPageExpanded
+from caramello.models.family import FamilyRead
+from caramello.models.user import UserRead
 
 router = APIRouter(prefix="/family_invitation", tags=["FamilyInvitation"])
 
+# Validate once and dump straight to JSON bytes (see caramello.api.serialization)
+read_serializer = Serializer(FamilyInvitationRead)
+page_serializer = Serializer(FamilyInvitationPage)
+bulk_serializer = Serializer(FamilyInvitationBulkResult)
+
+# Expandable relationships (?expand=), each eagerly loaded in at most one extra query.
+EXPANSIONS = {
+    "family": Expansion(FamilyInvitation.family, FamilyRead, many=False),
+    "inviter": Expansion(FamilyInvitation.inviter, UserRead, many=False),
+}
+READ_FIELDS = list(FamilyInvitationRead.model_fields)
+
+# Sortable fields and their keyset columns (each backed by an index).
+SORT_KEYS = {
+    "created_at": (FamilyInvitation.created_at, FamilyInvitation.id),
+    "expires_at": (FamilyInvitation.expires_at, FamilyInvitation.id),
+}
+
+def familyinvitation_filters(
+    family_id: Optional[int] = None,
+    inviter_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_at_gte: Optional[datetime] = None,
+    created_at_lt: Optional[datetime] = None,
+    expires_at_gte: Optional[datetime] = None,
+    expires_at_lt: Optional[datetime] = None,
+) -> list[Any]:
+    """WHERE clauses for the filterable fields (each backed by an index)."""
+    clauses: list[Any] = []
+    if family_id is not None:
+        clauses.append(FamilyInvitation.family_id == family_id)
+    if inviter_id is not None:
+        clauses.append(FamilyInvitation.inviter_id == inviter_id)
+    if status is not None:
+        clauses.append(FamilyInvitation.status == status)
+    if created_at_gte is not None:
+        clauses.append(FamilyInvitation.created_at >= created_at_gte)
+    if created_at_lt is not None:
+        clauses.append(FamilyInvitation.created_at < created_at_lt)
+    if expires_at_gte is not None:
+        clauses.append(FamilyInvitation.expires_at >= expires_at_gte)
+    if expires_at_lt is not None:
+        clauses.append(FamilyInvitation.expires_at < expires_at_lt)
+    return clauses
+
 @router.post("/", response_model=FamilyInvitationRead)
 def create_familyinvitation(familyinvitation_in: FamilyInvitationCreate, session: Session = Depends(get_session)):
-    db_obj = FamilyInvitation.model_validate(familyinvitation_in)
-    session.add(db_obj)
+    db_obj = FamilyInvitation.model_validate(familyinvitation_in.model_dump(exclude_unset=True))
+    statement = insert(FamilyInvitation).values(**db_obj.model_dump(exclude={"id"})).returning(*FamilyInvitation.__table__.c)
+    created = session.exec(statement).mappings().one()
+    session.commit()
+    return read_serializer.response(created)
+
+@router.post("/bulk", response_model=FamilyInvitationBulkResult)
+def create_familyinvitations_bulk(
+    payload: list[dict[str, Any]] = Depends(bulk_payload),
+    mode: BulkMode = "atomic",
+    session: Session = Depends(get_session)
+):
+    # atomic: any invalid or conflicting item rejects the whole batch.
+    # partial: valid items are created, the others are reported in `errors`.
+    indexes, rows, errors = validate_bulk_items(payload, FamilyInvitationCreate, FamilyInvitation)
+    indexes, rows, reference_errors = check_references(session, FamilyInvitation, indexes, rows)
+    errors += reference_errors
+    if errors and mode == "atomic":
+        raise HTTPException(status_code=422, detail=errors)
+    try:
+        # Unique conflicts are skipped and reported per item (no database
+        # text reaches the client); atomic mode then rejects the batch.
+        created = bulk_insert(session, FamilyInvitation, rows, skip_conflicts=True)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Conflicting items")
+    conflicts = conflict_errors(indexes, rows, created)
+    if conflicts and mode == "atomic":
+        session.rollback()
+        raise HTTPException(status_code=409, detail=conflicts)
     session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    errors += conflicts
+    return bulk_serializer.response({"created": created, "errors": sorted(errors, key=lambda error: error["index"])})
 
-@router.get("/", response_model=List[FamilyInvitationRead])
+@router.get("/", response_model=FamilyInvitationPageExpanded)
 def read_familyinvitations(
-    session: Session = Depends(get_session),
-    offset: int = 0,
-    limit: int = Query(default=100, le=100)
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=100),
+    sort: Literal["created_at", "-created_at", "expires_at", "-expires_at"] = "created_at",
+    count: CountMode = Query(default="none", description="Total in X-Total-Count: exact (COUNT), estimated (planner statistics) or none"),
+    filters: list[Any] = Depends(familyinvitation_filters),
+    expand: Optional[str] = Query(default=None, description="Comma-separated relationships to include: family, inviter"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated FamilyInvitationRead fields to return")
 ):
-    return session.exec(select(FamilyInvitation).offset(offset).limit(limit)).all()
+    selected = parse_fields(fields, FamilyInvitationRead)
+    expanded = parse_expand(expand, EXPANSIONS)
+    sort_field, descending = parse_sort(sort)
+    sort_columns = SORT_KEYS[sort_field]
+    if expanded:
+        statement = select(FamilyInvitation).options(*load_options(expanded, EXPANSIONS))
+    elif selected:
+        statement = select_fields(FamilyInvitation, selected, sort_columns)
+    else:
+        statement = select(FamilyInvitation)
+    statement = apply_cursor(statement.where(*filters), sort_columns, cursor, limit, descending)
+    rows = session.exec(statement).all()
+    page = build_page(rows, sort_columns, limit, request, response, descending)
+    if count != "none":
+        response.headers["X-Total-Count"] = str(count_rows(session, FamilyInvitation, filters, count))
+    if expanded:
+        page["items"] = [expanded_payload(row, selected or READ_FIELDS, expanded, EXPANSIONS) for row in page["items"]]
+        return expanded_response(page, request, response)
+    not_modified = conditional_response(request, response, page_etag(page, None, FamilyInvitationRead, selected))
+    if not_modified:
+        return not_modified
+    if selected:
+        page["items"] = [project(row, selected) for row in page["items"]]
+        return sparse_response(page, response)
+    return page_serializer.response(page, response)
 
-@router.get("/{uuid}", response_model=FamilyInvitationRead)
-def read_familyinvitation(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select(FamilyInvitation).where(FamilyInvitation.uuid == uuid)
+@router.get("/export")
+def export_familyinvitations(
+    format: ExportFormat = "ndjson",
+    sort: Literal["created_at", "-created_at", "expires_at", "-expires_at"] = "created_at",
+    filters: list[Any] = Depends(familyinvitation_filters)
+):
+    # Column-only SELECT of the Read fields, streamed from a server-side
+    # cursor on its own connection (no request session, no ORM objects).
+    sort_field, descending = parse_sort(sort)
+    columns = list(FamilyInvitationRead.model_fields)
+    statement = select_fields(FamilyInvitation, columns).where(*filters).order_by(*sort_order(SORT_KEYS[sort_field], descending))
+    return export_response(stream_partitions(statement), columns, format, "family_invitation")
+
+@router.get("/{uuid}", response_model=FamilyInvitationReadExpanded)
+def read_familyinvitation(
+    uuid: UUID,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    expand: Optional[str] = Query(default=None, description="Comma-separated relationships to include: family, inviter"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated FamilyInvitationRead fields to return")
+):
+    selected = parse_fields(fields, FamilyInvitationRead)
+    expanded = parse_expand(expand, EXPANSIONS)
+    if expanded:
+        statement = select(FamilyInvitation).where(FamilyInvitation.uuid == uuid).options(*load_options(expanded, EXPANSIONS))
+        familyinvitation = session.exec(statement).first()
+        if not familyinvitation:
+            raise HTTPException(status_code=404, detail="FamilyInvitation not found")
+        payload = expanded_payload(familyinvitation, selected or READ_FIELDS, expanded, EXPANSIONS)
+        return expanded_response(payload, request, response)
+    if selected:
+        statement = select_fields(FamilyInvitation, selected, ()).where(FamilyInvitation.uuid == uuid)
+    else:
+        statement = select(FamilyInvitation).where(FamilyInvitation.uuid == uuid)
     familyinvitation = session.exec(statement).first()
     if not familyinvitation:
         raise HTTPException(status_code=404, detail="FamilyInvitation not found")
-    return familyinvitation
+    if selected:
+        payload = project(familyinvitation, selected)
+        not_modified = conditional_response(request, response, make_etag(payload, selected))
+        if not_modified:
+            return not_modified
+        return sparse_response(payload, response)
+    not_modified = conditional_response(request, response, make_etag(FamilyInvitationRead.model_validate(familyinvitation).model_dump(mode="json"), selected))
+    if not_modified:
+        return not_modified
+    return read_serializer.response(familyinvitation, response)
 
 @router.patch("/{uuid}", response_model=FamilyInvitationRead)
 def update_familyinvitation(uuid: UUID, familyinvitation_in: FamilyInvitationUpdate, session: Session = Depends(get_session)):
-    statement = select(FamilyInvitation).where(FamilyInvitation.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+    values = familyinvitation_in.model_dump(exclude_unset=True)
+    if values:
+        statement = (
+            update(FamilyInvitation).where(FamilyInvitation.uuid == uuid).values(**values).returning(*FamilyInvitation.__table__.c)
+        )
+    else:
+        statement = select(*FamilyInvitation.__table__.c).where(FamilyInvitation.uuid == uuid)
+    updated = session.exec(statement).mappings().first()
+    if not updated:
         raise HTTPException(status_code=404, detail="FamilyInvitation not found")
-        
-    hero_data = familyinvitation_in.model_dump(exclude_unset=True)
-    for key, value in hero_data.items():
-        setattr(db_obj, key, value)
-        
-    session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    return read_serializer.response(updated)
 
 @router.delete("/{uuid}")
 def delete_familyinvitation(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select(FamilyInvitation).where(FamilyInvitation.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+    # Children are handled by the FK ON DELETE actions (DSL on_delete).
+    statement = delete(FamilyInvitation).where(FamilyInvitation.uuid == uuid).returning(FamilyInvitation.id)
+    try:
+        deleted = session.exec(statement).first()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="FamilyInvitation is still referenced")
+    if not deleted:
         raise HTTPException(status_code=404, detail="FamilyInvitation not found")
-        
-    session.delete(db_obj)
     session.commit()
     return {"ok": True}
@@ -1,59 +1,246 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
-from typing import List
+from typing import Any, Literal, Optional
 from uuid import UUID
-from caramello.database.session import get_session
-from caramello.models.user import User, UserRead, UserCreate, UserUpdate
+from datetime import datetime
+from caramello.api.bulk import BulkMode, conflict_errors, password_bulk_payload, validate_bulk_items
+from caramello.api.conditional import conditional_response, make_etag, page_etag
+from caramello.api.expand import Expansion, expanded_payload, expanded_response, load_options, parse_expand
+from caramello.api.export import ExportFormat, export_response
+from caramello.api.fields import parse_fields, project, select_fields, sparse_response
+from caramello.api.pagination import apply_cursor, build_page, parse_sort, sort_order
+from caramello.api.serialization import Serializer
+from caramello.core.cache import CacheBackend, get_cache
+from caramello.core.security import hash_password_async, hash_passwords_async
+from caramello.database.bulk import bulk_insert
+from caramello.database.count import CountMode, count_rows
+from caramello.database.export import stream_partitions
+from caramello.database.session import get_read_session, get_session, on_primary
+from caramello.models.user import User, UserRead, UserCreate, UserUpdate, UserPage, UserBulkResult, UserReadExpanded, UserPageExpanded
+from caramello.models.family import FamilyRead
+from caramello.models.familyinvitation import FamilyInvitationRead
 
 router = APIRouter(prefix="/user", tags=["User"])
 
+# Validate once and dump straight to JSON bytes (see caramello.api.serialization)
+read_serializer = Serializer(UserRead)
+page_serializer = Serializer(UserPage)
+bulk_serializer = Serializer(UserBulkResult)
+
+# Expandable relationships (?expand=), each eagerly loaded in at most one extra query.
+EXPANSIONS = {
+    "families": Expansion(User.families, FamilyRead, many=True),
+    "sent_invitations": Expansion(User.sent_invitations, FamilyInvitationRead, many=True),
+}
+READ_FIELDS = list(UserRead.model_fields)
+
+def user_cache() -> CacheBackend:
+    return get_cache("User", ttl=60, max_entries=10000)
+
+# Sortable fields and their keyset columns (each backed by an index).
+SORT_KEYS = {
+    "created_at": (User.created_at, User.id),
+    "updated_at": (User.updated_at, User.id),
+}
+
+def user_filters(
+    email: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    created_at_gte: Optional[datetime] = None,
+    created_at_lt: Optional[datetime] = None,
+) -> list[Any]:
+    """WHERE clauses for the filterable fields (each backed by an index)."""
+    clauses: list[Any] = []
+    if email is not None:
+        clauses.append(User.email == email)
+    if is_active is not None:
+        clauses.append(User.is_active == is_active)
+    if created_at_gte is not None:
+        clauses.append(User.created_at >= created_at_gte)
+    if created_at_lt is not None:
+        clauses.append(User.created_at < created_at_lt)
+    return clauses
+
+# Plain passwords are hashed in the process pool before the handler runs.
+async def user_create_password(user_in: UserCreate) -> str:
+    return await hash_password_async(user_in.password)
+
+async def user_update_password(user_in: UserUpdate) -> Optional[str]:
+    return await hash_password_async(user_in.password) if user_in.password else None
+
+async def user_bulk_passwords(payload: list[dict[str, Any]] = Depends(password_bulk_payload)) -> list[Optional[str]]:
+    # By payload index; an item without a string password fails validation anyway.
+    passwords = [item.get("password") if isinstance(item.get("password"), str) else None for item in payload]
+    return await hash_passwords_async(passwords)
+
 @router.post("/", response_model=UserRead)
-def create_user(user_in: UserCreate, session: Session = Depends(get_session)):
-    db_obj = User.model_validate(user_in)
-    session.add(db_obj)
+def create_user(user_in: UserCreate, hashed_password: str = Depends(user_create_password), session: Session = Depends(get_session)):
+    db_obj = User.model_validate({**user_in.model_dump(exclude_unset=True), "hashed_password": hashed_password})
+    statement = insert(User).values(**db_obj.model_dump(exclude={"id"})).returning(*User.__table__.c)
+    created = session.exec(statement).mappings().one()
+    session.commit()
+    return read_serializer.response(created)
+
+@router.post("/bulk", response_model=UserBulkResult)
+def create_users_bulk(
+    payload: list[dict[str, Any]] = Depends(password_bulk_payload),
+    hashes: list[Optional[str]] = Depends(user_bulk_passwords),
+    mode: BulkMode = "atomic",
+    session: Session = Depends(get_session)
+):
+    # atomic: any invalid or conflicting item rejects the whole batch.
+    # partial: valid items are created, the others are reported in `errors`.
+    indexes, rows, errors = validate_bulk_items(payload, UserCreate, User)
+    if errors and mode == "atomic":
+        raise HTTPException(status_code=422, detail=errors)
+    for index, row in zip(indexes, rows):
+        row["hashed_password"] = hashes[index]
+    try:
+        # Unique conflicts are skipped and reported per item (no database
+        # text reaches the client); atomic mode then rejects the batch.
+        created = bulk_insert(session, User, rows, skip_conflicts=True)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Conflicting items")
+    conflicts = conflict_errors(indexes, rows, created)
+    if conflicts and mode == "atomic":
+        session.rollback()
+        raise HTTPException(status_code=409, detail=conflicts)
     session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    errors += conflicts
+    return bulk_serializer.response({"created": created, "errors": sorted(errors, key=lambda error: error["index"])})
 
-@router.get("/", response_model=List[UserRead])
+@router.get("/", response_model=UserPageExpanded)
 def read_users(
-    session: Session = Depends(get_session),
-    offset: int = 0,
-    limit: int = Query(default=100, le=100)
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=100),
+    sort: Literal["created_at", "-created_at", "updated_at", "-updated_at"] = "created_at",
+    count: CountMode = Query(default="none", description="Total in X-Total-Count: exact (COUNT), estimated (planner statistics) or none"),
+    filters: list[Any] = Depends(user_filters),
+    expand: Optional[str] = Query(default=None, description="Comma-separated relationships to include: families, sent_invitations"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated UserRead fields to return")
 ):
-    return session.exec(select(User).offset(offset).limit(limit)).all()
+    selected = parse_fields(fields, UserRead)
+    expanded = parse_expand(expand, EXPANSIONS)
+    sort_field, descending = parse_sort(sort)
+    sort_columns = SORT_KEYS[sort_field]
+    if expanded:
+        statement = select(User).options(*load_options(expanded, EXPANSIONS))
+    elif selected:
+        statement = select_fields(User, selected, (*sort_columns, User.updated_at))
+    else:
+        statement = select(User)
+    statement = apply_cursor(statement.where(*filters), sort_columns, cursor, limit, descending)
+    rows = session.exec(statement).all()
+    page = build_page(rows, sort_columns, limit, request, response, descending)
+    if count != "none":
+        response.headers["X-Total-Count"] = str(count_rows(session, User, filters, count))
+    if expanded:
+        page["items"] = [expanded_payload(row, selected or READ_FIELDS, expanded, EXPANSIONS) for row in page["items"]]
+        return expanded_response(page, request, response)
+    not_modified = conditional_response(request, response, page_etag(page, 'updated_at', UserRead, selected))
+    if not_modified:
+        return not_modified
+    if selected:
+        page["items"] = [project(row, selected) for row in page["items"]]
+        return sparse_response(page, response)
+    return page_serializer.response(page, response)
 
-@router.get("/{uuid}", response_model=UserRead)
-def read_user(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select(User).where(User.uuid == uuid)
+@router.get("/export")
+def export_users(
+    format: ExportFormat = "ndjson",
+    sort: Literal["created_at", "-created_at", "updated_at", "-updated_at"] = "created_at",
+    filters: list[Any] = Depends(user_filters)
+):
+    # Column-only SELECT of the Read fields, streamed from a server-side
+    # cursor on its own connection (no request session, no ORM objects).
+    sort_field, descending = parse_sort(sort)
+    columns = list(UserRead.model_fields)
+    statement = select_fields(User, columns).where(*filters).order_by(*sort_order(SORT_KEYS[sort_field], descending))
+    return export_response(stream_partitions(statement), columns, format, "user")
+
+@router.get("/{uuid}", response_model=UserReadExpanded)
+def read_user(
+    uuid: UUID,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
+    expand: Optional[str] = Query(default=None, description="Comma-separated relationships to include: families, sent_invitations"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated UserRead fields to return")
+):
+    selected = parse_fields(fields, UserRead)
+    expanded = parse_expand(expand, EXPANSIONS)
+    if expanded:
+        statement = select(User).where(User.uuid == uuid).options(*load_options(expanded, EXPANSIONS))
+        user = session.exec(statement).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        payload = expanded_payload(user, selected or READ_FIELDS, expanded, EXPANSIONS)
+        return expanded_response(payload, request, response)
+    cached = user_cache().get(str(uuid))
+    if cached is not None:
+        payload = project(cached, selected) if selected else cached
+        not_modified = conditional_response(request, response, make_etag(cached["uuid"], cached["updated_at"], selected))
+        if not_modified:
+            return not_modified
+        return sparse_response(payload, response)
+    # Taken before the SELECT: a PATCH/DELETE that invalidates the entry
+    # meanwhile makes the fill below a no-op.
+    generation = user_cache().generation(str(uuid))
+    if selected:
+        statement = select_fields(User, selected, ('uuid', 'updated_at')).where(User.uuid == uuid)
+    else:
+        statement = select(User).where(User.uuid == uuid)
     user = session.exec(statement).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    if selected:
+        payload = project(user, selected)
+        not_modified = conditional_response(request, response, make_etag(user.uuid, user.updated_at, selected))
+        if not_modified:
+            return not_modified
+        return sparse_response(payload, response)
+    if on_primary(session):
+        user_cache().set(
+            str(uuid), UserRead.model_validate(user).model_dump(mode="json"), generation=generation
+        )
+    not_modified = conditional_response(request, response, make_etag(user.uuid, user.updated_at, selected))
+    if not_modified:
+        return not_modified
+    return read_serializer.response(user, response)
 
 @router.patch("/{uuid}", response_model=UserRead)
-def update_user(uuid: UUID, user_in: UserUpdate, session: Session = Depends(get_session)):
-    statement = select(User).where(User.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+def update_user(uuid: UUID, user_in: UserUpdate, hashed_password: Optional[str] = Depends(user_update_password), session: Session = Depends(get_session)):
+    values = user_in.model_dump(exclude_unset=True, exclude={"password"})
+    if hashed_password:
+        values["hashed_password"] = hashed_password
+    values["updated_at"] = datetime.utcnow()
+    statement = (
+        update(User).where(User.uuid == uuid).values(**values).returning(*User.__table__.c)
+    )
+    updated = session.exec(statement).mappings().first()
+    if not updated:
         raise HTTPException(status_code=404, detail="User not found")
-        
-    hero_data = user_in.model_dump(exclude_unset=True)
-    for key, value in hero_data.items():
-        setattr(db_obj, key, value)
-        
-    session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    user_cache().delete(str(uuid))
+    return read_serializer.response(updated)
 
 @router.delete("/{uuid}")
 def delete_user(uuid: UUID, session: Session = Depends(get_session)):
-    statement = select(User).where(User.uuid == uuid)
-    db_obj = session.exec(statement).first()
-    if not db_obj:
+    # Children are handled by the FK ON DELETE actions (DSL on_delete).
+    statement = delete(User).where(User.uuid == uuid).returning(User.id)
+    try:
+        deleted = session.exec(statement).first()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="User is still referenced")
+    if not deleted:
         raise HTTPException(status_code=404, detail="User not found")
-        
-    session.delete(db_obj)
     session.commit()
+    user_cache().delete(str(uuid))
     return {"ok": True}
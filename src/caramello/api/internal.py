@@ -0,0 +1,37 @@
+from anyio import to_thread
+from fastapi import APIRouter
+
+from caramello.core.cache import cache_stats
+from caramello.database.pool import pool_status
+from caramello.database.session import get_engines
+from caramello.database.slow_queries import slow_query_stats
+
+router = APIRouter(prefix="/internal", tags=["Internal"], include_in_schema=False)
+
+# Endpoints here are 'async def' on purpose: they only read in-memory
+# counters, and must keep answering when the threadpool is saturated.
+
+@router.get("/pool")
+async def read_pool_status() -> dict:
+    """Live connection pool and threadpool usage."""
+    limiter = to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return {
+        "database": {name: pool_status(e.pool) for name, e in get_engines().items()},
+        "threadpool": {
+            "total": int(stats.total_tokens),
+            "busy": stats.borrowed_tokens,
+            "waiting": stats.tasks_waiting,
+        },
+    }
+
+@router.get("/cache")
+async def read_cache_stats() -> dict:
+    """Hit, miss and eviction counters of the read-through caches."""
+    return cache_stats()
+
+@router.get("/slow-queries")
+async def read_slow_queries() -> list[dict]:
+    """Statements over SLOW_QUERY_THRESHOLD_MS, aggregated by normalized
+    statement, most total time first."""
+    return slow_query_stats()
@@ -0,0 +1,65 @@
+"""Request metrics middleware and the Prometheus `/metrics` endpoint.
+
+Requests are labelled by route template (`/user/{uuid}`, not the concrete
+path) to keep label cardinality bounded; paths that match no API route are
+counted as `unmatched`. Database figures come from the engine's cursor
+events (caramello.database.metrics).
+"""
+
+import time
+
+from fastapi import APIRouter, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from caramello.core.metrics import (
+    http_request_db_queries,
+    http_request_db_seconds,
+    http_request_duration_seconds,
+    http_requests_total,
+    registry,
+    track_request,
+)
+
+router = APIRouter(tags=["Internal"], include_in_schema=False)
+
+
+class MetricsMiddleware:
+    """Records duration, status and database work of every HTTP request.
+
+    A plain ASGI middleware (not BaseHTTPMiddleware): it adds no task or
+    response buffering per request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        with track_request(scope) as stats:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                labels = (stats.route or "unmatched", scope["method"])
+                http_requests_total.inc(*labels, str(status))
+                http_request_duration_seconds.observe(time.perf_counter() - start, *labels)
+                http_request_db_queries.observe(stats.queries, *labels)
+                http_request_db_seconds.observe(stats.db_seconds, *labels)
+
+
+# 'async def': rendering only reads in-memory counters.
+@router.get("/metrics")
+async def read_metrics() -> Response:
+    """Metrics in the Prometheus text exposition format."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
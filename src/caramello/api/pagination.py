@@ -0,0 +1,126 @@
+"""Keyset (cursor) pagination helpers used by the generated list endpoints."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def parse_sort(sort: str) -> tuple[str, bool]:
+    """Splits a `sort` parameter such as `-created_at` into (field, descending)."""
+    return sort.removeprefix("-"), sort.startswith("-")
+
+
+def sort_order(
+    columns: Sequence[InstrumentedAttribute], descending: bool = False
+) -> list[Any]:
+    """ORDER BY clauses for the sort key, all in the same direction."""
+    return [column.desc() for column in columns] if descending else list(columns)
+
+
+def encode_cursor(
+    columns: Sequence[InstrumentedAttribute], row: Any, descending: bool = False
+) -> str:
+    """Builds an opaque cursor pointing right after the given row.
+
+    Args:
+        columns: Sort key columns, in order (the last one must be unique).
+        row: ORM object whose sort key values start the next page.
+        descending: Sort direction the cursor is valid for.
+
+    Returns:
+        A URL-safe token carrying the column names, direction and values.
+    """
+    payload = {
+        "k": [column.key for column in columns],
+        "d": descending,
+        "v": [_encode_value(getattr(row, column.key)) for column in columns],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, columns: Sequence[InstrumentedAttribute], descending: bool = False
+) -> tuple[Any, ...]:
+    """Decodes a cursor back into typed sort key values.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or was built for
+            another sort key or direction.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != [column.key for column in columns] or payload["d"] != descending:
+            raise ValueError("cursor sort key mismatch")
+        values = []
+        for column, value in zip(columns, payload["v"], strict=True):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                value = python_type(value)
+            values.append(value)
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(values)
+
+
+def apply_cursor(
+    statement: Select,
+    columns: Sequence[InstrumentedAttribute],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """Orders by the sort key and seeks past the cursor.
+
+    All sort key columns share the direction, so a descending page is a
+    backward scan of the same (sort key, id) index.
+
+    One extra row is fetched so `build_page` can tell whether a next
+    page exists without issuing a second query.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns, descending)
+        if descending:
+            statement = statement.where(tuple_(*columns) < tuple_(*values))
+        else:
+            statement = statement.where(tuple_(*columns) > tuple_(*values))
+    return statement.order_by(*sort_order(columns, descending)).limit(limit + 1)
+
+
+def build_page(
+    rows: Sequence[Any],
+    columns: Sequence[InstrumentedAttribute],
+    limit: int,
+    request: Request,
+    response: Response,
+    descending: bool = False,
+) -> dict[str, Any]:
+    """Trims the look-ahead row and builds the page payload.
+
+    When there is a next page, a `Link: <...>; rel="next"` header is also
+    set on the response.
+    """
+    items = list(rows[:limit])
+    next_cursor = None
+    next_url = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(columns, items[-1], descending)
+        next_url = str(request.url.include_query_params(cursor=next_cursor))
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return {"items": items, "next_cursor": next_cursor, "next": next_url}
@@ -0,0 +1,82 @@
+"""Mounting of the generated routers, eagerly or on first use.
+
+The generator lists every router in `caramello.api.generated.ROUTERS`
+(prefix -> module path) without importing it. Eager mounting imports them
+all when the app is built. Lazy mounting (LAZY_ROUTERS=true) installs one
+placeholder route per prefix instead: the first request under a prefix
+imports its module and swaps the placeholder for the real routes, so a
+fresh worker only pays for the routers it actually serves. Building the
+OpenAPI schema mounts everything first.
+"""
+
+import importlib
+from typing import Mapping
+
+from fastapi import APIRouter, FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+
+def _load_router(module: str) -> APIRouter:
+    return importlib.import_module(module).router
+
+
+class LazyRouter(BaseRoute):
+    """Placeholder for a router that is imported on the first matching request."""
+
+    def __init__(self, app: FastAPI, prefix: str, module: str) -> None:
+        self.app = app
+        self.prefix = prefix
+        self.module = module
+
+    def matches(self, scope: Scope) -> tuple[Match, Scope]:
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: str) -> None:
+        # Not mounted yet: url_path_for() callers must mount first.
+        raise NoMatchFound(name, path_params)
+
+    def mount(self) -> None:
+        """Replaces this placeholder with the router's routes (idempotent)."""
+        routes = self.app.router.routes
+        if self not in routes:
+            return
+        router = _load_router(self.module)
+        routes.remove(self)
+        self.app.include_router(router)
+        self.app.openapi_schema = None
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.mount()
+        # Dispatch again, now against the real routes.
+        await self.app.router(scope, receive, send)
+
+
+def mount_all(app: FastAPI) -> None:
+    """Mounts every router still pending on `app`."""
+    for route in list(app.router.routes):
+        if isinstance(route, LazyRouter):
+            route.mount()
+
+
+def include_routers(app: FastAPI, routers: Mapping[str, str], lazy: bool = False) -> None:
+    """Registers the routers of a `{prefix: module}` registry on `app`."""
+    if not lazy:
+        for module in routers.values():
+            app.include_router(_load_router(module))
+        return
+
+    for prefix, module in routers.items():
+        app.router.routes.append(LazyRouter(app, prefix, module))
+
+    openapi = app.openapi
+
+    def lazy_openapi() -> dict:
+        mount_all(app)
+        return openapi()
+
+    app.openapi = lazy_openapi
@@ -0,0 +1,67 @@
+"""Prebuilt response serializers used by the generated routers.
+
+Returning a model instance from a handler makes FastAPI validate it against
+`response_model`, convert it to a dict, run `jsonable_encoder` over it and
+finally encode it with the stdlib `json`. `Serializer` validates once (from
+attributes) and dumps straight to JSON bytes, returning a ready `Response`
+that FastAPI passes through untouched. `response_model` stays on the routes
+for the OpenAPI schema.
+
+With `JSON_RENDERER=orjson` the bytes come from orjson instead of
+pydantic-core, and orjson also backs the app's default response class.
+"""
+
+from typing import Any, Optional
+
+import pydantic_core
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from caramello.core.config import get_settings
+
+try:
+    import orjson
+except ImportError:  # optional: uv pip install ".[orjson]"
+    orjson = None
+
+
+def use_orjson() -> bool:
+    """Whether orjson renders responses (JSON_RENDERER=orjson)."""
+    if get_settings().JSON_RENDERER != "orjson":
+        return False
+    if orjson is None:
+        raise RuntimeError("JSON_RENDERER=orjson requires the 'orjson' package")
+    return True
+
+
+def render_json(value: Any) -> bytes:
+    """Encodes plain Python data (UUIDs and datetimes included) to JSON."""
+    if use_orjson():
+        return orjson.dumps(value)
+    return pydantic_core.to_json(value)
+
+
+class Serializer:
+    """Validates and serializes one response schema."""
+
+    def __init__(self, schema: Any) -> None:
+        self.adapter = TypeAdapter(schema)
+
+    def dump(self, value: Any) -> bytes:
+        """Validates `value` (ORM objects, rows or dicts) and returns JSON bytes."""
+        validated = self.adapter.validate_python(value, from_attributes=True)
+        if use_orjson():
+            return orjson.dumps(self.adapter.dump_python(validated))
+        return self.adapter.dump_json(validated)
+
+    def dump_python(self, value: Any) -> Any:
+        """Validates `value` and returns JSON-compatible Python data, for
+        embedding in a larger payload."""
+        validated = self.adapter.validate_python(value, from_attributes=True)
+        return self.adapter.dump_python(validated, mode="json")
+
+    def response(self, value: Any, response: Optional[Response] = None) -> Response:
+        """Builds the JSON response, keeping headers already set on the
+        injected `response` (ETag, Link)."""
+        headers = dict(response.headers) if response is not None else None
+        return Response(self.dump(value), media_type="application/json", headers=headers)
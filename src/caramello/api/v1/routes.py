@@ -0,0 +1,7 @@
+from fastapi import APIRouter
+
+from caramello.api.v1 import users
+
+# Hand-written API, next to the generated CRUD routers.
+router = APIRouter(prefix="/v1")
+router.include_router(users.router)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from caramello.api.serialization import Serializer
+from caramello.database.session import get_read_session
+from caramello.repositories.family_invitation import list_pending_for_user
+from caramello.schemas.family_invitation import PendingInvitationRead
+
+router = APIRouter(prefix="/users", tags=["User"])
+
+invitations_serializer = Serializer(list[PendingInvitationRead])
+
+
+# Keyed by the user's uuid until the API has authentication; a `/me` route
+# can then resolve it from the logged-in user.
+@router.get("/{uuid}/invitations", response_model=list[PendingInvitationRead])
+def read_pending_invitations(uuid: UUID, session: Session = Depends(get_read_session)):
+    """Live invitations sent to the user's email, with the family name."""
+    invitations = list_pending_for_user(session, uuid, datetime.utcnow())
+    if invitations is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return invitations_serializer.response(invitations)
@@ -0,0 +1,178 @@
+"""In-process read-through cache used by the generated GET-by-uuid handlers.
+
+Backends only store JSON-compatible values (the serialized `{Name}Read`
+payload), so a networked, Redis-compatible backend can replace `MemoryCache`
+through the `CACHE_BACKEND` setting without touching the generated code.
+
+A read takes a `generation` token before loading the row and passes it to
+`set`; a `delete` in between (a concurrent PATCH or DELETE) makes that `set`
+a no-op, so a slow read cannot put back the row the write just invalidated.
+
+Invalidation is local to the process: with several workers, another worker
+may serve a stale entry until its TTL expires. Keep TTLs short.
+"""
+
+import importlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from caramello.core.config import get_settings
+
+
+class CacheBackend(ABC):
+    """Interface every cache backend implements."""
+
+    def __init__(self, name: str, ttl: float, max_entries: int) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value, or None on a miss."""
+
+    @abstractmethod
+    def generation(self, key: str) -> int:
+        """Token to take before loading the value passed to `set`."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        """Stores a value for `ttl` seconds, unless the key was deleted
+        since `generation` was taken."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drops a key (no-op when absent) and makes older generations stale."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drops every key."""
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        """Returns hit/miss/eviction counters and the current size."""
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything (CACHE_ENABLED=false)."""
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def generation(self, key: str) -> int:
+        return 0
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "size": 0}
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe LRU cache with a per-entry TTL.
+
+    Generations come from one counter bumped by every `delete`; the last
+    `max_entries` deleted keys remember theirs. Older ones are folded into
+    a floor, which only ever rejects a `set` too many, never one too few.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int) -> None:
+        super().__init__(name, ttl, max_entries)
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._deleted: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._clock
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and self._deleted.get(key, self._floor) > generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._clock += 1
+            self._deleted[key] = self._clock
+            self._deleted.move_to_end(key)
+            while len(self._deleted) > self.max_entries:
+                self._floor = self._deleted.popitem(last=False)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._deleted.clear()
+            self._clock += 1
+            self._floor = self._clock
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+            }
+
+
+_caches: dict[str, CacheBackend] = {}
+
+
+def _backend_class() -> type[CacheBackend]:
+    if not get_settings().CACHE_ENABLED:
+        return NullCache
+    module_name, _, class_name = get_settings().CACHE_BACKEND.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_cache(name: str, ttl: float, max_entries: int) -> CacheBackend:
+    """Returns the named cache, creating it with the configured backend."""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = _backend_class()(name, ttl, max_entries)
+    return cache
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Counters of every cache created in this process, by name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
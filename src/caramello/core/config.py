@@ -1,4 +1,5 @@
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Literal, Optional
 from pydantic import PostgresDsn, field_validator, ValidationInfo
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,6 +16,7 @@ class Settings(BaseSettings):
     # We construct the URL from individual components.
     # DATABASE_URL is not read from env directly anymore.
     DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None
     
     # Individual DB variables (Required)
     DB_HOST: str
@@ -23,13 +25,93 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # Connection Pool (applied to the sync and async engines)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = -1  # Seconds before a connection is replaced (-1 = never)
+    DB_POOL_PRE_PING: bool = False
+
+    # Read replicas (optional): read-only handlers use the healthy ones
+    # round-robin and fall back to the primary; writes stay on the primary.
+    DB_REPLICA_URLS: list[str] = []  # postgresql:// URLs (JSON list); asyncpg URLs are derived
+    DB_REPLICA_HEALTH_INTERVAL: float = 5.0  # Seconds between health probes of each replica
+    DB_REPLICA_CONNECT_TIMEOUT: int = 2  # Seconds before a replica connection attempt fails
+    DB_READ_YOUR_WRITES_SECONDS: float = 0  # After a write, that client's reads use the primary this long (0 = off)
+
+    # Worker threads that run the sync (def) handlers (AnyIO default: 40)
+    THREADPOOL_MAX_WORKERS: int = 40
+
+    # Bulk create endpoints
+    BULK_MAX_ITEMS: int = 10000  # Largest payload accepted by POST /{table}/bulk
+    BULK_MAX_PASSWORD_ITEMS: int = 100  # Same, for entities with a password (one scrypt hash per item)
+    BULK_COPY_THRESHOLD: int = 1000  # From this many rows on, load through COPY
+
+    # Read-through cache for GET /{table}/{uuid} (entities with a `cache:` block)
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "caramello.core.cache.MemoryCache"  # Dotted path to a CacheBackend
+
+    # Password hashing (scrypt). Raising the cost only affects new hashes;
+    # existing ones are upgraded on the next successful login.
+    PASSWORD_SCRYPT_N: int = 32768  # CPU/memory cost (power of 2)
+    PASSWORD_SCRYPT_R: int = 8  # Block size
+    PASSWORD_SCRYPT_P: int = 1  # Parallelization
+    PASSWORD_HASH_WORKERS: int = 2  # Processes dedicated to hashing
+
+    # JSON encoder of the responses: "pydantic" (pydantic-core) or "orjson" (needs the orjson extra)
+    JSON_RENDERER: Literal["pydantic", "orjson"] = "pydantic"
+
+    # Mount the generated routers on the first request to their prefix
+    # instead of at startup (faster cold start for autoscaled workers)
+    LAZY_ROUTERS: bool = False
+
+    # Operational endpoints (GET /metrics, /internal/*) have no authentication:
+    # mount them only where the app is reachable from the internal network alone
+    INTERNAL_ENDPOINTS_ENABLED: bool = False
+
+    # Prometheus metrics: per-route request/DB histograms at GET /metrics
+    # (served with INTERNAL_ENDPOINTS_ENABLED)
+    METRICS_ENABLED: bool = True
+
+    # Slow-query recorder: logs and aggregates statements over the threshold
+    # (GET /internal/slow-queries)
+    SLOW_QUERY_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0  # Fraction of slow SELECTs whose plan is captured
+    # Parameters whose values are logged (bind name without its _N suffix);
+    # every other value is masked, so new PII columns stay out of the log
+    SLOW_QUERY_LOG_PARAMETERS: list[str] = [
+        "id", "uuid", "limit", "offset", "status", "created_at", "updated_at", "expires_at",
+    ]
+    SLOW_QUERY_MAX_STATEMENTS: int = 200  # Distinct normalized statements kept
+
+    # Expiry of pending invitations (services/family_invitation.py)
+    INVITATION_SWEEP_INTERVAL: float = 0  # Seconds between in-process sweeps (0 = off; use bin/sweep_invitations)
+    INVITATION_SWEEP_BATCH_SIZE: int = 1000  # Invitations expired per transaction
+
+    # Streaming export endpoints (GET /{table}/export)
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per server-side cursor round-trip
+
     def model_post_init(self, __context):
         """
-        Construct DATABASE_URL from individual fields.
+        Construct DATABASE_URL (psycopg2) and ASYNC_DATABASE_URL (asyncpg)
+        from individual fields.
         """
         password = f":{self.DB_PASSWORD}" if self.DB_PASSWORD else ""
         port = f":{self.DB_PORT}" if self.DB_PORT else ""
-        self.DATABASE_URL = f"postgresql://{self.DB_USER}{password}@{self.DB_HOST}{port}/{self.DB_NAME}"
+        location = f"{self.DB_USER}{password}@{self.DB_HOST}{port}/{self.DB_NAME}"
+        self.DATABASE_URL = f"postgresql://{location}"
+        self.ASYNC_DATABASE_URL = f"postgresql+asyncpg://{location}"
+
+@lru_cache
+def get_settings() -> Settings:
+    """Returns the process-wide Settings, built (and .env read) on first use."""
+    return Settings()
 
-settings = Settings()
+def __getattr__(name: str) -> Any:
+    # `settings` is resolved lazily, so importing this module has no side
+    # effects; `from caramello.core.config import settings` keeps working.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
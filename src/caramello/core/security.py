@@ -0,0 +1,138 @@
+"""Password hashing (scrypt) in a dedicated, bounded process pool.
+
+Hashing is CPU-bound by design (~100 ms at the default cost). Running it in
+a handler would hold the GIL for the whole call and, for sync handlers, also
+a threadpool slot. Instead the work is sent to `PASSWORD_HASH_WORKERS`
+processes and awaited from the event loop, so a burst of sign-ups or logins
+queues up in the pool without starving the rest of the API.
+
+Hashes are self-describing (`scrypt$n$r$p$salt$hash`), so raising the cost
+settings only affects new hashes; `needs_rehash` tells the login flow when
+a stored hash should be upgraded.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+from caramello.core.config import get_settings
+
+_SALT_BYTES = 16
+_KEY_BYTES = 32
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def hash_password(password: str, n: int, r: int, p: int) -> str:
+    """Hashes a password with scrypt using the given cost parameters."""
+    salt = os.urandom(_SALT_BYTES)
+    key = hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=_KEY_BYTES
+    )
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Checks a password against a stored hash (constant-time comparison)."""
+    try:
+        algorithm, n, r, p, salt, key = hashed.split("$")
+        n, r, p = int(n), int(r), int(p)
+    except ValueError:
+        return False
+    if algorithm != "scrypt":
+        return False
+    expected = base64.b64decode(key)
+    actual = hashlib.scrypt(
+        password.encode(),
+        salt=base64.b64decode(salt),
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r * p,
+        dklen=len(expected),
+    )
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Whether a stored hash was made with other cost settings than the current ones."""
+    settings = get_settings()
+    current = (settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P)
+    try:
+        algorithm, n, r, p, _, _ = hashed.split("$")
+        return algorithm != "scrypt" or (int(n), int(r), int(p)) != current
+    except ValueError:
+        return True
+
+
+def get_password_executor() -> ProcessPoolExecutor:
+    """Returns the hashing pool, started on first use.
+
+    Workers are spawned rather than forked, so they never inherit the
+    parent's threads or open database connections.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=get_settings().PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def shutdown_password_executor() -> None:
+    """Stops the hashing pool (application shutdown). Blocks until the
+    workers exit: call it off the event loop."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+
+def _cost() -> tuple[int, int, int]:
+    settings = get_settings()
+    return settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P
+
+
+async def hash_password_async(password: str) -> str:
+    """Hashes a password in the process pool with the current cost settings."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), hash_password, password, *_cost())
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verifies a password in the process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), verify_password, password, hashed)
+
+
+async def hash_passwords_async(passwords: Sequence[Optional[str]]) -> list[Optional[str]]:
+    """Hashes a batch in the process pool (bulk create); None entries stay None.
+
+    At most `PASSWORD_HASH_WORKERS` hashes of the batch are queued at a
+    time, so single sign-ups and logins submitted meanwhile wait for one
+    chunk, not for the whole batch.
+    """
+    chunk = get_settings().PASSWORD_HASH_WORKERS
+
+    async def _hash(password: Optional[str]) -> Optional[str]:
+        return await hash_password_async(password) if password else None
+
+    hashes: list[Optional[str]] = []
+    for start in range(0, len(passwords), chunk):
+        hashes += await asyncio.gather(*(_hash(password) for password in passwords[start:start + chunk]))
+    return hashes
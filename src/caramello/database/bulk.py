@@ -0,0 +1,116 @@
+import io
+from datetime import datetime
+from typing import Any, Sequence
+
+from sqlalchemy import RowMapping, column, select, table
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, SQLModel
+
+from caramello.core.config import get_settings
+
+# PostgreSQL accepts at most 65535 bind parameters per statement.
+MAX_BIND_PARAMS = 30000
+
+
+def bulk_insert(
+    session: Session,
+    model: type[SQLModel],
+    rows: Sequence[dict[str, Any]],
+    *,
+    skip_conflicts: bool = False,
+) -> list[RowMapping]:
+    """Inserts many rows and returns them as stored (INSERT ... RETURNING).
+
+    Batches up to `BULK_COPY_THRESHOLD` rows go through multi-row
+    `INSERT ... VALUES`; larger ones are streamed with `COPY` into a
+    temporary staging table and moved with a single `INSERT ... SELECT`.
+    COPY is only used with psycopg2; other drivers (asyncpg, via
+    `AsyncSession.run_sync`) always take the VALUES path.
+
+    Args:
+        session: Open session; the caller owns the transaction.
+        model: Table model to insert into.
+        rows: Column values, all with the same keys.
+        skip_conflicts: Adds `ON CONFLICT DO NOTHING`; conflicting rows are
+            left out of the result instead of failing the statement.
+
+    Returns:
+        The inserted rows, including server-generated columns.
+    """
+    if not rows:
+        return []
+    use_copy = (
+        len(rows) >= get_settings().BULK_COPY_THRESHOLD
+        and session.get_bind().dialect.driver == "psycopg2"
+    )
+    if use_copy:
+        return _copy_insert(session, model, rows, skip_conflicts)
+    return _values_insert(session, model, rows, skip_conflicts)
+
+
+def _values_insert(
+    session: Session,
+    model: type[SQLModel],
+    rows: Sequence[dict[str, Any]],
+    skip_conflicts: bool,
+) -> list[RowMapping]:
+    target = model.__table__
+    chunk_size = max(1, MAX_BIND_PARAMS // len(rows[0]))
+    inserted: list[RowMapping] = []
+    for start in range(0, len(rows), chunk_size):
+        statement = insert(target).values(list(rows[start : start + chunk_size]))
+        if skip_conflicts:
+            statement = statement.on_conflict_do_nothing()
+        result = session.connection().execute(statement.returning(*target.c))
+        inserted.extend(result.mappings().all())
+    return inserted
+
+
+def _copy_value(value: Any) -> str:
+    """Formats a value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_insert(
+    session: Session,
+    model: type[SQLModel],
+    rows: Sequence[dict[str, Any]],
+    skip_conflicts: bool,
+) -> list[RowMapping]:
+    target = model.__table__
+    names = list(rows[0])
+    staging_name = f"_bulk_{target.name}"
+    quoted = ", ".join(f'"{name}"' for name in names)
+
+    connection = session.connection()
+    connection.exec_driver_sql(
+        f'CREATE TEMP TABLE "{staging_name}" ON COMMIT DROP AS '
+        f'SELECT {quoted} FROM "{target.name}" WITH NO DATA'
+    )
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[name]) for name in names))
+        buffer.write("\n")
+    buffer.seek(0)
+    with connection.connection.dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY "{staging_name}" ({quoted}) FROM STDIN', buffer)
+
+    staging = table(staging_name, *[column(name) for name in names])
+    statement = insert(target).from_select(names, select(*staging.c))
+    if skip_conflicts:
+        statement = statement.on_conflict_do_nothing()
+    result = connection.execute(statement.returning(*target.c))
+    return list(result.mappings().all())
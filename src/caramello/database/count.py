@@ -0,0 +1,65 @@
+import json
+from typing import Any, Literal, Sequence
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import Session, SQLModel
+
+CountMode = Literal["exact", "estimated", "none"]
+
+
+class _Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON) <statement>`, keeping the statement's binds."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any) -> None:
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def count_rows(
+    session: Session,
+    model: type[SQLModel],
+    filters: Sequence[Any],
+    mode: CountMode,
+) -> int:
+    """Counts the rows matching `filters`.
+
+    `exact` runs `COUNT(*)`, which reads every matching row (or index
+    entry). `estimated` never scans: without filters it reads the table's
+    row estimate from `pg_class.reltuples`, and with filters it asks the
+    planner (`EXPLAIN`) how many rows it expects. Estimates are as fresh as
+    the last ANALYZE (autovacuum keeps them close).
+
+    Args:
+        session: Open session.
+        model: Table model being listed.
+        filters: WHERE clauses of the list request.
+        mode: `exact` or `estimated`.
+    """
+    table = model.__table__
+    if mode == "exact":
+        statement = select(func.count()).select_from(table).where(*filters)
+        return session.execute(statement).scalar_one()
+
+    if not filters:
+        # reltuples is -1 until the table is first vacuumed or analyzed.
+        name = session.get_bind().dialect.identifier_preparer.format_table(table)
+        reltuples = session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": name},
+        ).scalar()
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    statement = select(literal_column("1")).select_from(table).where(*filters)
+    plan = session.execute(_Explain(statement)).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
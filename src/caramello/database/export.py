@@ -0,0 +1,30 @@
+from typing import AsyncIterator, Iterator, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.sql import Select
+
+from caramello.core.config import get_settings
+from caramello.database.session import get_async_read_engine, get_read_engine
+
+
+def stream_partitions(statement: Select) -> Iterator[Sequence[Row]]:
+    """Runs `statement` through a server-side cursor, one batch at a time.
+
+    The connection is opened here rather than taken from the request
+    session, so it lives exactly as long as the response is streamed.
+    Memory stays bounded by `EXPORT_BATCH_SIZE` rows whatever the table
+    size. Runs on a replica when there are any (DB_REPLICA_URLS).
+    """
+    with get_read_engine().connect() as connection:
+        result = connection.execution_options(yield_per=get_settings().EXPORT_BATCH_SIZE).execute(statement)
+        yield from result.partitions()
+
+
+async def astream_partitions(statement: Select) -> AsyncIterator[Sequence[Row]]:
+    """Async counterpart of `stream_partitions` (asyncpg cursor)."""
+    async with get_async_read_engine().connect() as connection:
+        result = await connection.stream(
+            statement.execution_options(yield_per=get_settings().EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield partition
@@ -0,0 +1,66 @@
+import time
+from typing import Any, Iterable
+
+from sqlalchemy import Engine, event
+
+from caramello.core.metrics import Gauge, current_request_stats, db_query_duration_seconds, registry
+from caramello.database.pool import pool_status
+from caramello.database.slow_queries import record_if_slow
+
+_START_TIMES = "caramello_query_start"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Times every statement run on `engine` (for async engines, pass
+    `sync_engine`), adds it to the current request's stats and hands it
+    to the slow-query recorder."""
+    if getattr(engine, "_caramello_instrumented", False):
+        return
+    engine._caramello_instrumented = True
+
+    def record(elapsed: float) -> None:
+        db_query_duration_seconds.observe(elapsed, name)
+        stats = current_request_stats()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    # Start times are keyed by cursor: a statement that fails never reaches
+    # after_cursor_execute, and its entry is dropped by handle_error instead
+    # of staying on the pooled connection.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault(_START_TIMES, {})[cursor] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        elapsed = time.perf_counter() - conn.info[_START_TIMES].pop(cursor)
+        record(elapsed)
+        record_if_slow(conn, statement, parameters, context, executemany, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        conn = context.connection
+        # ExceptionContext.cursor is not filled in; the execution context
+        # holds the cursor. Without either (the connect failed), nothing
+        # was timed.
+        cursor = getattr(context.execution_context, "cursor", None)
+        if conn is None or conn.invalidated or cursor is None:
+            return
+        started = conn.info.get(_START_TIMES, {}).pop(cursor, None)
+        if started is not None:
+            record(time.perf_counter() - started)
+
+
+def _pool_samples() -> Iterable[tuple[tuple[str, ...], float]]:
+    # Imported here: session.py imports this module to instrument its engines.
+    from caramello.database.session import get_engines
+
+    for name, engine in get_engines().items():
+        for state, value in pool_status(engine.pool).items():
+            yield (name, state), value
+
+
+registry.register(Gauge(
+    "db_pool_connections", "Connection pool status by engine (pool_status).", ("engine", "state"), _pool_samples
+))
@@ -0,0 +1,70 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from caramello.core.metrics import db_pool_checkout_wait_seconds
+
+
+class _WaiterTrackingMixin:
+    """Counts checkouts that found the pool exhausted and had to wait.
+
+    SQLAlchemy exposes checked-in/out and overflow counts, but not how many
+    callers are queued on `pool_timeout`, which is the first sign of an
+    undersized pool under load.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._waiters = 0
+        self._waiters_lock = threading.Lock()
+
+    def _is_exhausted(self) -> bool:
+        return (
+            self.checkedin() == 0
+            and self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+        )
+
+    def connect(self) -> PoolProxiedConnection:
+        # Every checkout is timed: near zero with an idle connection, the
+        # connect time when the pool grows, the queueing time when exhausted.
+        start = time.perf_counter()
+        try:
+            if not self._is_exhausted():
+                return super().connect()
+            with self._waiters_lock:
+                self._waiters += 1
+            try:
+                return super().connect()
+            finally:
+                with self._waiters_lock:
+                    self._waiters -= 1
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - start)
+
+    def waiters(self) -> int:
+        return self._waiters
+
+
+class InstrumentedQueuePool(_WaiterTrackingMixin, QueuePool):
+    """QueuePool for the sync (psycopg2) engine."""
+
+
+class InstrumentedAsyncQueuePool(_WaiterTrackingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool for the asyncpg engine."""
+
+
+def pool_status(pool: QueuePool) -> dict[str, int]:
+    """Returns a snapshot of the pool counters."""
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # Negative while the pool has not grown to `size` yet.
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, _WaiterTrackingMixin):
+        status["waiters"] = pool.waiters()
+    return status
@@ -0,0 +1,70 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from sqlalchemy import Engine, event
+
+# The same statement run this many times in one block is reported as N+1.
+N_PLUS_ONE_THRESHOLD = 3
+
+_PARAMETER = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_EXPANDED_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalizes a statement so runs that differ only in their parameters
+    (including expanded IN lists) compare equal."""
+    shape = _PARAMETER.sub("?", statement)
+    shape = _EXPANDED_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryLog:
+    """SQL statements executed inside a `count_queries()` block."""
+
+    statements: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes run at least `threshold` times (N+1 suspects)."""
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+    def assert_no_n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> None:
+        repeated = self.repeated(threshold)
+        if repeated:
+            details = "\n".join(f"  {count}x {shape}" for shape, count in repeated)
+            raise AssertionError(f"N+1 query pattern detected:\n{details}")
+
+    def assert_budget(self, budget: int, label: str = "block") -> None:
+        """Fails when more than `budget` statements ran, listing them."""
+        if len(self) > budget:
+            listed = "\n".join(f"  {statement_shape(statement)}" for statement in self.statements)
+            raise AssertionError(f"{label}: {len(self)} queries, budget is {budget}:\n{listed}")
+        self.assert_no_n_plus_one()
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Records every statement executed by any engine (sync or async)
+    while the block runs, whichever thread or event loop runs it.
+
+    Meant for tests: statements from concurrent, unrelated work are
+    recorded too.
+    """
+    log = QueryLog()
+
+    def record(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        log.statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield log
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
@@ -0,0 +1,184 @@
+import asyncio
+import itertools
+import logging
+import threading
+import weakref
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import create_engine
+
+from caramello.database.metrics import instrument_engine
+from caramello.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+logger = logging.getLogger("caramello.replicas")
+
+# Set on the responses to writes when DB_READ_YOUR_WRITES_SECONDS > 0; holds
+# the Unix time until which that client's reads go to the primary.
+READ_YOUR_WRITES_COOKIE = "caramello_primary_until"
+
+
+def async_url(url: str) -> str:
+    """The asyncpg URL of a postgresql:// replica URL."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+class ReplicaSet:
+    """Read replicas, picked round-robin among the healthy ones.
+
+    A daemon thread probes every replica each `health_interval` seconds on a
+    fresh connection (`SELECT 1`). A replica that fails the probe, or whose
+    connection fails during a request, leaves the rotation until a probe
+    succeeds again; with no healthy replica, reads go to the primary.
+
+    Engines are created on first use, like the primary's: one sync engine per
+    replica, and one async engine per replica and event loop. The monitor
+    starts with the first read and stops on `dispose()`.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        engine_options: dict[str, Any],
+        health_interval: float,
+        connect_timeout: int,
+    ) -> None:
+        self.urls = list(urls)
+        self.engine_options = engine_options
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self.healthy = [True] * len(self.urls)
+        self._cursor = itertools.count()
+        self._lock = threading.Lock()
+        self._engines: Optional[list[Engine]] = None
+        self._async_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, list[AsyncEngine]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def pick(self) -> Optional[int]:
+        """Index of the next healthy replica, or None when all are down."""
+        if self._monitor is None or not self._monitor.is_alive():
+            self.start_monitor()
+        start = next(self._cursor)
+        for offset in range(len(self.urls)):
+            index = (start + offset) % len(self.urls)
+            if self.healthy[index]:
+                return index
+        return None
+
+    def engine(self, index: int) -> Engine:
+        if self._engines is None:
+            with self._lock:
+                if self._engines is None:
+                    engines = []
+                    for i, url in enumerate(self.urls):
+                        engine = create_engine(
+                            url,
+                            poolclass=InstrumentedQueuePool,
+                            connect_args={"connect_timeout": self.connect_timeout},
+                            **self.engine_options,
+                        )
+                        self._watch(engine, f"replica_{i}", i)
+                        engines.append(engine)
+                    self._engines = engines
+        return self._engines[index]
+
+    def async_engine(self, index: int) -> AsyncEngine:
+        """The replica's asyncpg engine bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        engines = self._async_engines.get(loop)
+        if engines is None:
+            engines = []
+            for i, url in enumerate(self.urls):
+                engine = create_async_engine(
+                    async_url(url),
+                    poolclass=InstrumentedAsyncQueuePool,
+                    connect_args={"timeout": self.connect_timeout},
+                    **self.engine_options,
+                )
+                self._watch(engine.sync_engine, f"replica_{i}_async", i)
+                engines.append(engine)
+            self._async_engines[loop] = engines
+        return engines[index]
+
+    def created_engines(self) -> dict[str, Engine]:
+        """The engines created so far (async ones of the running loop), by name."""
+        engines = {f"replica_{i}": engine for i, engine in enumerate(self._engines or [])}
+        try:
+            async_engines = self._async_engines.get(asyncio.get_running_loop(), [])
+        except RuntimeError:
+            async_engines = []
+        for i, engine in enumerate(async_engines):
+            engines[f"replica_{i}_async"] = engine.sync_engine
+        return engines
+
+    def _watch(self, engine: Engine, name: str, index: int) -> None:
+        instrument_engine(engine, name)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context: Any) -> None:
+            # No connection: the connect itself failed.
+            if context.is_disconnect or context.connection is None:
+                self.set_health(index, False)
+
+    def set_health(self, index: int, healthy: bool) -> None:
+        if self.healthy[index] == healthy:
+            return
+        self.healthy[index] = healthy
+        if healthy:
+            logger.info("Replica %d is back in the read rotation", index)
+        else:
+            logger.warning("Replica %d is unreachable, left out of the read rotation", index)
+
+    def check(self) -> None:
+        """Probes every replica once and updates its health."""
+        for index, url in enumerate(self.urls):
+            probe = create_engine(url, poolclass=NullPool, connect_args={"connect_timeout": self.connect_timeout})
+            try:
+                with probe.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            except Exception:
+                self.set_health(index, False)
+            else:
+                self.set_health(index, True)
+            finally:
+                probe.dispose()
+
+    def start_monitor(self) -> None:
+        with self._lock:
+            if self._monitor is None or not self._monitor.is_alive():
+                # One event per thread: a monitor still finishing its last
+                # probe after stop_monitor() must not be revived.
+                self._stop = threading.Event()
+                self._monitor = threading.Thread(
+                    target=self._run, args=(self._stop,), name="caramello-replica-monitor", daemon=True
+                )
+                self._monitor.start()
+
+    def _run(self, stop: threading.Event) -> None:
+        while True:
+            self.check()
+            if stop.wait(self.health_interval):
+                return
+
+    def stop_monitor(self) -> None:
+        self._stop.set()
+
+    async def dispose(self) -> None:
+        """Stops the monitor and closes the pooled connections (application
+        shutdown); the engines stay usable afterwards and the monitor
+        restarts with the next read."""
+        self.stop_monitor()
+        for engine in self._engines or []:
+            engine.dispose()
+        try:
+            async_engines = self._async_engines.pop(asyncio.get_running_loop(), [])
+        except RuntimeError:
+            async_engines = []
+        for engine in async_engines:
+            await engine.dispose()
@@ -1,13 +1,241 @@
+import asyncio
+import threading
+import time
+import weakref
+from fastapi import Request
 from sqlmodel import SQLModel, Session, create_engine
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Engine
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from typing import Any, AsyncGenerator, Generator, Optional, Union
 
-from caramello.core.config import settings
+from caramello.core.config import Settings, get_settings
+from caramello.database.metrics import instrument_engine
+from caramello.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from caramello.database.replicas import READ_YOUR_WRITES_COOKIE, ReplicaSet
 
-engine = create_engine(settings.DATABASE_URL)
+_settings: Optional[Settings] = None
+
+def engine_settings() -> Settings:
+    """The Settings the engines are built from: those of the running app
+    (see `configure_engines`), else the process-wide ones."""
+    return _settings or get_settings()
+
+def pool_options() -> dict[str, Any]:
+    """Pool keyword arguments shared by every engine, taken from Settings."""
+    settings = engine_settings()
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+_async_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncEngine]" = (
+    weakref.WeakKeyDictionary()
+)
+
+def get_engine() -> Engine:
+    """Returns the sync engine, created on first use (app startup) rather
+    than on import, so importing the app never touches the database driver."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    engine_settings().DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options()
+                )
+                instrument_engine(_engine, "primary")
+    return _engine
+
+def __getattr__(name: str) -> Any:
+    # Backwards-compatible `from caramello.database.session import engine`.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
 
 def get_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+def get_async_engine() -> AsyncEngine:
+    """Returns the asyncpg engine bound to the running event loop.
+
+    asyncpg connections cannot cross event loops, so there is one engine per
+    loop: a single one per worker under uvicorn, a fresh one for each
+    TestClient portal. It is created lazily so that sync-only deployments
+    never need asyncpg installed.
+    """
+    loop = asyncio.get_running_loop()
+    async_engine = _async_engines.get(loop)
+    if async_engine is None:
+        async_engine = create_async_engine(
+            engine_settings().ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **pool_options()
+        )
+        instrument_engine(async_engine.sync_engine, "primary_async")
+        _async_engines[loop] = async_engine
+    return async_engine
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    # expire_on_commit=False: attributes must not be lazily refreshed after
+    # the handler returns, since that would need an awaitable context.
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+_replica_set: Optional[ReplicaSet] = None
+
+def get_replica_set() -> Optional[ReplicaSet]:
+    """Returns the read replicas of DB_REPLICA_URLS, or None without any."""
+    global _replica_set
+    settings = engine_settings()
+    if _replica_set is None and settings.DB_REPLICA_URLS:
+        with _engine_lock:
+            if _replica_set is None:
+                _replica_set = ReplicaSet(
+                    settings.DB_REPLICA_URLS,
+                    pool_options(),
+                    health_interval=settings.DB_REPLICA_HEALTH_INTERVAL,
+                    connect_timeout=settings.DB_REPLICA_CONNECT_TIMEOUT,
+                )
+    return _replica_set
+
+def reads_from_primary(request: Optional[Request]) -> bool:
+    """Whether the client wrote within its read-your-writes window
+    (see caramello.api.consistency)."""
+    until = request.cookies.get(READ_YOUR_WRITES_COOKIE) if request is not None else None
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+def _pick_replica(request: Optional[Request]) -> Optional[int]:
+    replicas = get_replica_set()
+    if replicas is None or reads_from_primary(request):
+        return None
+    return replicas.pick()
+
+def get_read_engine(request: Optional[Request] = None) -> Engine:
+    """Engine for a read-only request: the next healthy replica, or the
+    primary when there is none or the client has just written."""
+    index = _pick_replica(request)
+    return get_engine() if index is None else get_replica_set().engine(index)
+
+def get_async_read_engine(request: Optional[Request] = None) -> AsyncEngine:
+    """Async counterpart of `get_read_engine`."""
+    index = _pick_replica(request)
+    return get_async_engine() if index is None else get_replica_set().async_engine(index)
+
+def _replica_failed(error: Exception) -> bool:
+    # asyncpg raises OSError itself when the connection is refused.
+    if isinstance(error, OSError):
+        return True
+    return isinstance(error, OperationalError) or (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+class ReadSession(Session):
+    """Session of the read-only handlers.
+
+    When bound to a replica that fails (refused or dropped connection), the
+    replica leaves the rotation and the statement is run again on the
+    primary, so the request does not fail with it.
+    """
+
+    def _fail_over(self, error: Exception) -> bool:
+        if "replica" not in self.info or not _replica_failed(error):
+            return False
+        get_replica_set().set_health(self.info.pop("replica"), False)
+        self.rollback()
+        self.bind = self.info["primary"]
+        return True
+
+    def exec(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return super().exec(*args, **kwargs)
+        except (DBAPIError, OSError) as error:
+            if not self._fail_over(error):
+                raise
+        return super().exec(*args, **kwargs)
+
+    def execute(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return super().execute(*args, **kwargs)
+        except (DBAPIError, OSError) as error:
+            if not self._fail_over(error):
+                raise
+        return super().execute(*args, **kwargs)
+
+def on_primary(session: Union[Session, AsyncSession]) -> bool:
+    """Whether a read session runs on the primary. Only those reads may
+    fill caches: a lagging replica could store a row older than the write
+    that just invalidated it."""
+    return "replica" not in session.info
+
+def get_read_session(request: Request) -> Generator[Session, None, None]:
+    # Read-only handlers only: nothing written here would reach the primary.
+    index = _pick_replica(request)
+    primary = get_engine()
+    bind = primary if index is None else get_replica_set().engine(index)
+    with ReadSession(bind) as session:
+        session.info["primary"] = primary
+        if index is not None:
+            session.info["replica"] = index
+        yield session
+
+async def get_async_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    index = _pick_replica(request)
+    primary = get_async_engine()
+    bind = primary if index is None else get_replica_set().async_engine(index)
+    async with AsyncSession(bind, sync_session_class=ReadSession, expire_on_commit=False) as session:
+        # The sync session (which fails over) runs on the engine's sync facade.
+        session.info["primary"] = primary.sync_engine
+        if index is not None:
+            session.info["replica"] = index
         yield session
+
+def get_engines() -> dict[str, Engine]:
+    """Returns the engines created so far in this process, by name."""
+    engines = {"primary": _engine} if _engine is not None else {}
+    try:
+        async_engine = _async_engines.get(asyncio.get_running_loop())
+    except RuntimeError:
+        async_engine = None
+    if async_engine is not None:
+        engines["primary_async"] = async_engine.sync_engine
+    if _replica_set is not None:
+        engines.update(_replica_set.created_engines())
+    return engines
+
+async def dispose_engines() -> None:
+    """Closes the pooled connections of the engines created so far
+    (application shutdown). The engines stay usable afterwards."""
+    if _engine is not None:
+        _engine.dispose()
+    try:
+        async_engine = _async_engines.pop(asyncio.get_running_loop(), None)
+    except RuntimeError:
+        async_engine = None
+    if async_engine is not None:
+        await async_engine.dispose()
+    if _replica_set is not None:
+        await _replica_set.dispose()
+
+async def configure_engines(settings: Settings) -> None:
+    """Builds the engines from `settings` from now on (app startup, with
+    the Settings given to `create_app`). Engines created from other
+    Settings are closed and dropped first."""
+    global _settings, _engine, _replica_set
+    if settings is engine_settings():
+        return
+    await dispose_engines()
+    with _engine_lock:
+        _settings = settings
+        _engine = None
+        _async_engines.clear()
+        _replica_set = None
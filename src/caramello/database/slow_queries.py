@@ -0,0 +1,154 @@
+import json
+import logging
+import random
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from caramello.core.config import get_settings
+from caramello.core.metrics import current_request_stats
+from caramello.database.query_counter import statement_shape
+
+logger = logging.getLogger("caramello.slow_queries")
+
+_REDACTED = "***"
+_MAX_VALUE_LENGTH = 200
+_EXPLAIN_SAVEPOINT = "caramello_slow_query_explain"
+# SQLAlchemy numbers the bind parameters of a column: uuid_1, limit_1, ...
+_BIND_SUFFIX = re.compile(r"_\d+$")
+
+
+@dataclass
+class SlowQueryStats:
+    """Aggregate of the slow runs of one normalized statement."""
+
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+    last_seen: Optional[str] = None
+    last_route: Optional[str] = None
+    last_parameters: Any = None
+    last_plan: Any = None
+
+
+_stats: "OrderedDict[str, SlowQueryStats]" = OrderedDict()
+_stats_lock = threading.Lock()
+
+
+def _redact_value(name: Optional[str], value: Any) -> Any:
+    if name is None or _BIND_SUFFIX.sub("", name.lower()) not in get_settings().SLOW_QUERY_LOG_PARAMETERS:
+        return _REDACTED
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > _MAX_VALUE_LENGTH:
+        return value[:_MAX_VALUE_LENGTH] + "..."
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def redact_parameters(parameters: Any, context: Any, executemany: bool) -> Any:
+    """Parameters safe to log: only the values named in
+    SLOW_QUERY_LOG_PARAMETERS are kept (long ones truncated), every other
+    one is masked. Positional parameters are named through the compiled
+    statement; unnamed ones are masked."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, Mapping):
+        return {key: _redact_value(key, value) for key, value in parameters.items()}
+    if isinstance(parameters, Sequence):
+        names = getattr(getattr(context, "compiled", None), "positiontup", None) or []
+        return [
+            _redact_value(names[i] if i < len(names) else None, value)
+            for i, value in enumerate(parameters)
+        ]
+    return parameters
+
+
+def _explain(conn: Any, statement: str, parameters: Any) -> Any:
+    """`EXPLAIN (FORMAT JSON)` of a statement that just ran, on the same
+    DBAPI connection (no SQLAlchemy events fire). A savepoint keeps a
+    failing EXPLAIN from aborting the caller's transaction."""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+        except Exception:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            raise
+        cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def record_if_slow(
+    conn: Any, statement: str, parameters: Any, context: Any, executemany: bool, elapsed: float
+) -> None:
+    """Logs and aggregates a statement that ran over SLOW_QUERY_THRESHOLD_MS.
+
+    A SLOW_QUERY_EXPLAIN_SAMPLE_RATE fraction of slow SELECTs also gets its
+    plan captured (EXPLAIN without ANALYZE: the statement is not re-run).
+    """
+    elapsed_ms = elapsed * 1000
+    if not get_settings().SLOW_QUERY_ENABLED or elapsed_ms < get_settings().SLOW_QUERY_THRESHOLD_MS:
+        return
+    stats = current_request_stats()
+    route = stats.route if stats is not None else None
+    redacted = redact_parameters(parameters, context, executemany)
+
+    plan = None
+    if (
+        not executemany
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and random.random() < get_settings().SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    ):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception:
+            logger.exception("EXPLAIN of a slow query failed")
+
+    logger.warning(
+        "Slow query (%.1f ms) on %s: %s | parameters=%s",
+        elapsed_ms, route or "-", statement, redacted,
+        extra={"duration_ms": elapsed_ms, "route": route, "plan": plan},
+    )
+
+    shape = statement_shape(statement)
+    with _stats_lock:
+        entry = _stats.pop(shape, None) or SlowQueryStats(statement=shape)
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.last_ms = elapsed_ms
+        entry.last_seen = datetime.utcnow().isoformat()
+        entry.last_route = route
+        entry.last_parameters = redacted
+        if plan is not None:
+            entry.last_plan = plan
+        # Most recently seen last; the oldest statement goes first when full.
+        _stats[shape] = entry
+        while len(_stats) > get_settings().SLOW_QUERY_MAX_STATEMENTS:
+            _stats.popitem(last=False)
+
+
+def slow_query_stats() -> list[dict[str, Any]]:
+    """Aggregates by normalized statement, most total time first."""
+    with _stats_lock:
+        entries = [asdict(entry) for entry in _stats.values()]
+    for entry in entries:
+        entry["avg_ms"] = entry["total_ms"] / entry["count"]
+    return sorted(entries, key=lambda entry: entry["total_ms"], reverse=True)
+
+
+def reset_slow_query_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
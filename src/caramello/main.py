@@ -1,18 +1,94 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+from typing import Any, Optional
+from anyio import to_thread
 from fastapi import FastAPI
-from caramello.api.generated import user_router, family_router, familymember_router, familyinvitation_router
+from fastapi.responses import JSONResponse, ORJSONResponse
+from caramello.api import consistency, internal, metrics
+from caramello.api.generated import ROUTERS
+from caramello.api.registry import include_routers
+from caramello.core.config import Settings, get_settings
+from caramello.core.security import shutdown_password_executor
+from caramello.database.session import configure_engines, dispose_engines, get_engine
+from caramello.services.family_invitation import run_invitation_sweeper
 
-app = FastAPI(
-    title="Caramello Backend",
-    description="Backend API for Caramello",
-    version="0.1.0",
-)
+# Routers kept by hand next to the generated ones (the link model's CRUD, the v1 API).
+EXTRA_ROUTERS = {
+    "/family_members": "caramello.api.generated.familymember_router",
+    "/v1": "caramello.api.v1.routes",
+}
 
-# Include generated routers
-app.include_router(user_router.router)
-app.include_router(family_router.router)
-app.include_router(familymember_router.router)
-app.include_router(familyinvitation_router.router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    # Sync handlers run on AnyIO's default limiter; size it with the DB pool.
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_MAX_WORKERS
+    # The engine is created here, not on import (no connection is opened yet).
+    await configure_engines(settings)
+    get_engine()
+    sweeper = None
+    if settings.INVITATION_SWEEP_INTERVAL > 0:
+        sweeper = asyncio.create_task(
+            run_invitation_sweeper(settings.INVITATION_SWEEP_INTERVAL, settings.INVITATION_SWEEP_BATCH_SIZE)
+        )
+    yield
+    if sweeper is not None:
+        # Awaited so that a sweep in progress ends before the engines are disposed
+        sweeper.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper
+    # Waits for the workers to exit, so off the event loop
+    await to_thread.run_sync(shutdown_password_executor)
+    await dispose_engines()
 
-@app.get("/")
 def root():
     return {"message": "Welcome to Caramello API"}
+
+def create_app(settings: Optional[Settings] = None, lazy_routers: Optional[bool] = None) -> FastAPI:
+    """Builds the application.
+
+    Nothing here connects to the database; with lazy routers not even the
+    generated router modules are imported until they are first requested.
+    Run with `uvicorn --factory caramello.main:create_app`, or use
+    `caramello.main:app`. `settings` (default: the environment's) also
+    sizes the thread limiter and builds the engines at startup.
+    """
+    settings = settings or get_settings()
+    app = FastAPI(
+        title="Caramello Backend",
+        description="Backend API for Caramello",
+        version="0.1.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse if settings.JSON_RENDERER == "orjson" else JSONResponse,
+    )
+    # Read by the lifespan (thread limit, engines, sweeper)
+    app.state.settings = settings
+
+    # Generated routers (registry written by scripts/generate_code.py)
+    lazy = settings.LAZY_ROUTERS if lazy_routers is None else lazy_routers
+    include_routers(app, {**ROUTERS, **EXTRA_ROUTERS}, lazy=lazy)
+
+    # Operational endpoints (not part of the public schema, unauthenticated)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(metrics.MetricsMiddleware)
+    if settings.INTERNAL_ENDPOINTS_ENABLED:
+        app.include_router(internal.router)
+        if settings.METRICS_ENABLED:
+            app.include_router(metrics.router)
+    if settings.DB_REPLICA_URLS and settings.DB_READ_YOUR_WRITES_SECONDS > 0:
+        app.add_middleware(consistency.ReadYourWritesMiddleware, seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+    app.get("/")(root)
+    return app
+
+@lru_cache
+def get_app() -> FastAPI:
+    """The default application, built on first access."""
+    return create_app()
+
+def __getattr__(name: str) -> Any:
+    # `caramello.main:app` (uvicorn, tests) builds the app on first access.
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,13 @@
-from .user import User
-from .family import Family
+from .user import User, UserRead, UserReadExpanded, UserPageExpanded
+from .family import Family, FamilyRead, FamilyReadExpanded, FamilyPageExpanded
 from .familymember import FamilyMember
-from .familyinvitation import FamilyInvitation
+from .familyinvitation import FamilyInvitation, FamilyInvitationRead, FamilyInvitationReadExpanded, FamilyInvitationPageExpanded
+
+# Expanded Read schemas reference other entities' Read schemas.
+_read_schemas = {"UserRead": UserRead, "FamilyRead": FamilyRead, "FamilyInvitationRead": FamilyInvitationRead}
+UserReadExpanded.model_rebuild(_types_namespace=_read_schemas)
+UserPageExpanded.model_rebuild()
+FamilyReadExpanded.model_rebuild(_types_namespace=_read_schemas)
+FamilyPageExpanded.model_rebuild()
+FamilyInvitationReadExpanded.model_rebuild(_types_namespace=_read_schemas)
+FamilyInvitationPageExpanded.model_rebuild()
@@ -3,11 +3,17 @@ from uuid import UUID, uuid4
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import EmailStr
+from caramello.schemas.bulk import BulkItemError
+from sqlalchemy import Index
 from caramello.models.familymember import FamilyMember
 
 class Family(SQLModel, table=True):
     """Represents a family group in the system."""
     __tablename__ = "family"
+    __table_args__ = (
+        Index('ix_family_created_at_id', 'created_at', 'id'),
+        Index('ix_family_status_created_at_id', 'status', 'created_at', 'id'),
+    )
 
     id: Optional['int'] = Field(primary_key=True, default=None)
     uuid: UUID = Field(unique=True, default_factory=uuid4, nullable=False)
@@ -17,8 +23,8 @@ class Family(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
-    members: list['User'] = Relationship(back_populates='families', link_model=FamilyMember)
-    invitations: list['FamilyInvitation'] = Relationship(back_populates='family')
+    members: list['User'] = Relationship(back_populates='families', link_model=FamilyMember, passive_deletes=True)
+    invitations: list['FamilyInvitation'] = Relationship(back_populates='family', passive_deletes=True)
 
 class FamilyRead(SQLModel):
     uuid: UUID
@@ -38,3 +44,21 @@ class FamilyUpdate(SQLModel):
     description: Optional['str'] = None
     status: Optional['str'] = None
 
+class FamilyPage(SQLModel):
+    items: list[FamilyRead]
+    next_cursor: Optional[str] = None
+    next: Optional[str] = None
+
+class FamilyBulkResult(SQLModel):
+    created: list[FamilyRead]
+    errors: list[BulkItemError] = []
+
+class FamilyReadExpanded(FamilyRead):
+    members: Optional[list['UserRead']] = None
+    invitations: Optional[list['FamilyInvitationRead']] = None
+
+class FamilyPageExpanded(SQLModel):
+    items: list[FamilyReadExpanded]
+    next_cursor: Optional[str] = None
+    next: Optional[str] = None
+
@@ -3,19 +3,27 @@ from uuid import UUID, uuid4
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import EmailStr
+from caramello.schemas.bulk import BulkItemError
+from sqlalchemy import Index, text
 
 class FamilyInvitation(SQLModel, table=True):
     """Manages the invitation flow for families."""
     __tablename__ = "family_invitation"
+    __table_args__ = (
+        Index('ix_family_invitation_created_at_id', 'created_at', 'id'),
+        Index('ix_family_invitation_lower_invitee_email_status', text("lower(invitee_email)"), 'status'),
+        Index('ix_family_invitation_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_family_invitation_pending_expires_at', 'expires_at', postgresql_where=text("status = 'pending'")),
+    )
 
     id: Optional['int'] = Field(primary_key=True, default=None)
     uuid: UUID = Field(unique=True, default_factory=uuid4, nullable=False)
-    family_id: 'int' = Field(foreign_key='family.id', nullable=False)
-    inviter_id: 'int' = Field(foreign_key='user.id', nullable=False)
+    family_id: 'int' = Field(foreign_key='family.id', ondelete='CASCADE', index=True, nullable=False)
+    inviter_id: 'int' = Field(foreign_key='user.id', ondelete='CASCADE', index=True, nullable=False)
     invitee_email: EmailStr = Field(nullable=False)
     status: 'str' = Field(max_length=20, default='pending', nullable=False)
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    expires_at: datetime = Field(nullable=False)
+    expires_at: datetime = Field(index=True, nullable=False)
 
     family: 'Family' = Relationship(back_populates='invitations')
     inviter: 'User' = Relationship(back_populates='sent_invitations')
@@ -24,7 +32,7 @@ class FamilyInvitationRead(SQLModel):
     uuid: UUID
     family_id: 'int'
     inviter_id: 'int'
-    invitee_email: EmailStr
+    invitee_email: str = Field(schema_extra={'json_schema_extra': {'format': 'email'}})
     status: 'str'
     created_at: datetime
     expires_at: datetime
@@ -43,3 +51,21 @@ class FamilyInvitationUpdate(SQLModel):
     status: Optional['str'] = None
     expires_at: Optional[datetime] = None
 
+class FamilyInvitationPage(SQLModel):
+    items: list[FamilyInvitationRead]
+    next_cursor: Optional[str] = None
+    next: Optional[str] = None
+
+class FamilyInvitationBulkResult(SQLModel):
+    created: list[FamilyInvitationRead]
+    errors: list[BulkItemError] = []
+
+class FamilyInvitationReadExpanded(FamilyInvitationRead):
+    family: Optional['FamilyRead'] = None
+    inviter: Optional['UserRead'] = None
+
+class FamilyInvitationPageExpanded(SQLModel):
+    items: list[FamilyInvitationReadExpanded]
+    next_cursor: Optional[str] = None
+    next: Optional[str] = None
+
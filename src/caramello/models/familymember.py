@@ -8,8 +8,8 @@ class FamilyMember(SQLModel, table=True):
     """Association table connecting Users and Families, defining the role of each member."""
     __tablename__ = "family_member"
 
-    user_id: Optional['int'] = Field(primary_key=True, foreign_key='user.id', default=None)
-    family_id: Optional['int'] = Field(primary_key=True, foreign_key='family.id', default=None)
+    user_id: Optional['int'] = Field(primary_key=True, foreign_key='user.id', ondelete='CASCADE', default=None)
+    family_id: Optional['int'] = Field(primary_key=True, foreign_key='family.id', ondelete='CASCADE', index=True, default=None)
     role: 'str' = Field(max_length=20, default='member', nullable=False)
     joined_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
@@ -3,11 +3,18 @@ from uuid import UUID, uuid4
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import EmailStr
+from caramello.schemas.bulk import BulkItemError
+from sqlalchemy import Index
 from caramello.models.familymember import FamilyMember
 
 class User(SQLModel, table=True):
     """Represents a system user."""
     __tablename__ = "user"
+    __table_args__ = (
+        Index('ix_user_created_at_id', 'created_at', 'id'),
+        Index('ix_user_is_active_created_at_id', 'is_active', 'created_at', 'id'),
+        Index('ix_user_updated_at_id', 'updated_at', 'id'),
+    )
 
     id: Optional['int'] = Field(primary_key=True, default=None)
     uuid: UUID = Field(unique=True, default_factory=uuid4, nullable=False)
@@ -21,13 +28,13 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
-    families: list['Family'] = Relationship(back_populates='members', link_model=FamilyMember)
-    sent_invitations: list['FamilyInvitation'] = Relationship(back_populates='inviter')
+    families: list['Family'] = Relationship(back_populates='members', link_model=FamilyMember, passive_deletes=True)
+    sent_invitations: list['FamilyInvitation'] = Relationship(back_populates='inviter', passive_deletes=True)
 
 class UserRead(SQLModel):
     uuid: UUID
     full_name: 'str'
-    email: EmailStr
+    email: str = Field(schema_extra={'json_schema_extra': {'format': 'email'}})
     phone_number: Optional['str']
     google_id: Optional['str']
     avatar_url: Optional['str']
@@ -53,3 +60,21 @@ class UserUpdate(SQLModel):
     avatar_url: Optional['str'] = None
     is_active: Optional['bool'] = None
 
+class UserPage(SQLModel):
+    items: list[UserRead]
+    next_cursor: Optional[str] = None
+    next: Optional[str] = None
+
+class UserBulkResult(SQLModel):
+    created: list[UserRead]
+    errors: list[BulkItemError] = []
+
+class UserReadExpanded(UserRead):
+    families: Optional[list['FamilyRead']] = None
+    sent_invitations: Optional[list['FamilyInvitationRead']] = None
+
+class UserPageExpanded(SQLModel):
+    items: list[UserReadExpanded]
+    next_cursor: Optional[str] = None
+    next: Optional[str] = None
+
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, literal, update
+from sqlmodel import Session, select
+
+from caramello.models import Family, FamilyInvitation, User
+
+
+def expire_pending_batch(session: Session, now: datetime, batch_size: int) -> int:
+    """Marks up to `batch_size` pending invitations past `expires_at` as
+    expired; returns how many were updated.
+
+    Rows locked by another transaction (a concurrent sweep, an invitation
+    being accepted) are skipped, not waited for. `'pending'` is rendered
+    inline so the planner can match the partial index
+    ix_family_invitation_pending_expires_at even with prepared statements.
+    """
+    pending = literal("pending", literal_execute=True)
+    batch = (
+        select(FamilyInvitation.id)
+        .where(FamilyInvitation.status == pending, FamilyInvitation.expires_at <= now)
+        .order_by(FamilyInvitation.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(FamilyInvitation)
+        .where(FamilyInvitation.id.in_(batch.scalar_subquery()))
+        .values(status="expired")
+        .execution_options(synchronize_session=False)
+    )
+    return session.exec(statement).rowcount
+
+
+def list_pending_for_user(session: Session, user_uuid: UUID, now: datetime) -> Optional[list[dict[str, Any]]]:
+    """Pending, unexpired invitations addressed to the user's email
+    (case-insensitive), soonest expiry first, each with `family_name`.
+    Returns None when the user does not exist.
+
+    One query: the user row by uuid, outer-joined to its invitations through
+    ix_family_invitation_lower_invitee_email_status, so the cost follows the
+    user's invitations, not the table size.
+    """
+    live = and_(
+        func.lower(FamilyInvitation.invitee_email) == func.lower(User.email),
+        FamilyInvitation.status == literal("pending", literal_execute=True),
+        FamilyInvitation.expires_at > now,
+    )
+    statement = (
+        select(*FamilyInvitation.__table__.c, Family.name.label("family_name"))
+        .select_from(User)
+        .outerjoin(FamilyInvitation, live)
+        .outerjoin(Family, Family.id == FamilyInvitation.family_id)
+        .where(User.uuid == user_uuid)
+        .order_by(FamilyInvitation.expires_at)
+    )
+    rows = session.exec(statement).mappings().all()
+    if not rows:
+        return None
+    # The user without any live invitation still yields one all-NULL row.
+    return [dict(row) for row in rows if row["id"] is not None]
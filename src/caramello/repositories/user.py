@@ -0,0 +1,17 @@
+from typing import Optional
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from caramello.models import User
+
+
+async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
+    """Returns the user with this email (unique index), or None."""
+    return (await session.exec(select(User).where(User.email == email))).first()
+
+
+async def set_password_hash(session: AsyncSession, user_id: int, hashed_password: str) -> None:
+    """Replaces a user's password hash, without touching `updated_at`."""
+    await session.exec(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
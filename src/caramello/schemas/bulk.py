@@ -0,0 +1,7 @@
+from typing import Any
+from sqlmodel import SQLModel
+
+class BulkItemError(SQLModel):
+    """Why the payload item at `index` was not created."""
+    index: int
+    detail: Any
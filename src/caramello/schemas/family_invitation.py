@@ -0,0 +1,7 @@
+from caramello.models import FamilyInvitationRead
+
+
+class PendingInvitationRead(FamilyInvitationRead):
+    """A live invitation addressed to a user, with its family's name."""
+
+    family_name: str
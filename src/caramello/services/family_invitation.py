@@ -0,0 +1,60 @@
+"""Expiry of family invitations.
+
+Pending invitations past `expires_at` are flipped to `expired` in bounded
+batches, each in its own short transaction, so the sweep never holds many
+row locks or blocks writers for long. Run it from cron with
+`bin/sweep_invitations`, or in-process by setting INVITATION_SWEEP_INTERVAL;
+concurrent sweeps (several workers) skip each other's rows.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from anyio import to_thread
+from sqlmodel import Session
+
+from caramello.core.config import get_settings
+from caramello.database.session import get_engine
+from caramello.repositories.family_invitation import expire_pending_batch
+
+logger = logging.getLogger("caramello.invitations")
+
+
+def sweep_expired_invitations(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+    """Expires pending invitations until none is left (or `max_batches`
+    batches ran); returns how many were expired."""
+    batch_size = batch_size or get_settings().INVITATION_SWEEP_BATCH_SIZE
+    now = datetime.utcnow()
+    expired = batches = 0
+    with Session(get_engine()) as session:
+        while max_batches is None or batches < max_batches:
+            count = expire_pending_batch(session, now, batch_size)
+            session.commit()
+            expired += count
+            batches += 1
+            if count < batch_size:
+                break
+    if expired:
+        logger.info("Expired %d invitation(s) in %d batch(es)", expired, batches)
+    return expired
+
+
+async def run_invitation_sweeper(interval: float, batch_size: Optional[int] = None) -> None:
+    """Sweeps every `interval` seconds until cancelled (app lifespan).
+
+    A sweep running when the task is cancelled is finished first: its
+    thread cannot be interrupted, and the lifespan disposes the engines
+    right after awaiting this task.
+    """
+    while True:
+        sweep = asyncio.ensure_future(to_thread.run_sync(sweep_expired_invitations, batch_size))
+        try:
+            await asyncio.shield(sweep)
+        except asyncio.CancelledError:
+            await asyncio.wait([sweep])
+            raise
+        except Exception:
+            logger.exception("Invitation sweep failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,46 @@
+"""User authentication on top of the process-pool password hashing."""
+
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from caramello.core.config import get_settings
+from caramello.core.security import hash_password_async, needs_rehash, verify_password_async
+from caramello.models import User
+from caramello.repositories.user import get_user_by_email, set_password_hash
+
+# Hash verified when the email is unknown (or the user has no password, e.g.
+# OAuth), so those logins take as long as a wrong password. One per cost.
+_dummy_hashes: dict[tuple[int, int, int], str] = {}
+
+
+async def _dummy_hash() -> str:
+    settings = get_settings()
+    cost = (settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R, settings.PASSWORD_SCRYPT_P)
+    if cost not in _dummy_hashes:
+        _dummy_hashes[cost] = await hash_password_async("")
+    return _dummy_hashes[cost]
+
+
+async def authenticate(session: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Checks an email/password pair.
+
+    Both the lookup and the hashing stay off the threadpool: the query runs
+    on the async session and scrypt in the hashing pool. When the stored
+    hash was made with other cost settings than the current ones, it is
+    recomputed with the plain password at hand and saved (rehash-on-login).
+
+    Returns:
+        The user, or None if the email is unknown or the password is wrong.
+    """
+    user = await get_user_by_email(session, email)
+    if user is None or not user.hashed_password:
+        await verify_password_async(password, await _dummy_hash())
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(password)
+        await set_password_hash(session, user.id, user.hashed_password)
+        await session.commit()
+    return user
@@ -0,0 +1,23 @@
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Iterator
+
+import pytest
+
+from caramello.database.query_counter import QueryLog, count_queries
+
+
+@pytest.fixture
+def query_counter() -> Iterator[Callable[[], ContextManager[QueryLog]]]:
+    """`with query_counter() as queries:` records the SQL run inside the
+    block. Any N+1 pattern in a recorded block fails the test at teardown."""
+    logs: list[QueryLog] = []
+
+    @contextmanager
+    def counter() -> Iterator[QueryLog]:
+        with count_queries() as log:
+            yield log
+        logs.append(log)
+
+    yield counter
+    for log in logs:
+        log.assert_no_n_plus_one()
@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
@@ -5,9 +8,12 @@ from uuid import uuid4
 from caramello.main import app
 from caramello.models.family import Family
 
-@pytest.fixture(name="client")
+@pytest.fixture(name="client", scope="module")
 def client_fixture():
-    return TestClient(app)
+    # One event loop for the whole module: in async mode each loop gets its
+    # own engine and connection pool.
+    with TestClient(app) as client:
+        yield client
 
 def test_create_family(client: TestClient):
     # Dynamic sample data
@@ -25,6 +31,36 @@ def test_create_family(client: TestClient):
     data = response.json()
     assert data["uuid"] is not None
 
+def test_create_family_bulk(client: TestClient):
+    items = []
+    for _ in range(2):
+        data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+        if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+        items.append(data)
+
+    response = client.post("/family/bulk", json=items)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["created"]) == 2
+    assert body["errors"] == []
+
+def test_create_family_bulk_partial(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+
+    # Atomic mode rejects the whole batch...
+    response = client.post("/family/bulk", json=[data, {}])
+    assert response.status_code == 422
+
+    # ...partial mode creates the valid item and reports the other one.
+    response = client.post("/family/bulk", params={"mode": "partial"}, json=[data, {}])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["created"]) == 1
+    assert [error["index"] for error in body["errors"]] == [1]
+
 def test_read_family(client: TestClient):
     # Dynamic sample data
     data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
@@ -43,6 +79,24 @@ def test_read_family(client: TestClient):
     assert response.status_code == 200
     assert response.json()["uuid"] == uuid
 
+def test_read_family_not_modified(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/family/", json=data).json()["uuid"]
+
+    response = client.get(f"/family/{uuid}")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(f"/family/{uuid}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/family/", params={"limit": 5})
+    response = client.get("/family/", params={"limit": 5}, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
 def test_read_family_list(client: TestClient):
     # Dynamic sample data
     data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
@@ -52,4 +106,190 @@ def test_read_family_list(client: TestClient):
     client.post("/family/", json=data)
     response = client.get("/family/")
     assert response.status_code == 200
-    assert len(response.json()) > 0
+    assert len(response.json()["items"]) > 0
+
+def test_read_family_list_cursor(client: TestClient):
+    # Dynamic sample data
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    for _ in range(2):
+        if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+        client.post("/family/", json=data)
+
+    first = client.get("/family/", params={"limit": 1})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["items"]) == 1
+    assert page["next_cursor"] is not None
+    assert 'rel="next"' in first.headers["link"]
+
+    second = client.get("/family/", params={"limit": 1, "cursor": page["next_cursor"]})
+    assert second.status_code == 200
+    assert second.json()["items"][0]["uuid"] != page["items"][0]["uuid"]
+
+def test_read_family_list_sorted(client: TestClient):
+    for _ in range(2):
+        data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+        if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+        client.post("/family/", json=data)
+
+    for field in ['created_at']:
+        page = client.get("/family/", params={"limit": 1, "sort": f"-{field}"}).json()
+        second = client.get("/family/", params={"limit": 1, "sort": f"-{field}", "cursor": page["next_cursor"]})
+        assert second.status_code == 200
+        assert second.json()["items"][0][field] <= page["items"][0][field]
+        # A cursor only resumes the sort it was built for.
+        assert client.get("/family/", params={"sort": field, "cursor": page["next_cursor"]}).status_code == 400
+    assert client.get("/family/", params={"sort": "uuid"}).status_code == 422
+
+def test_read_family_list_filtered(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    client.post("/family/", json=data)
+
+    params = {name: data[name] for name in ['status']}
+    response = client.get("/family/", params=params)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items
+    assert all(item[name] == value for item in items for name, value in params.items())
+    for name in ['created_at']:
+        response = client.get("/family/", params={f"{name}_gte": "2999-01-01T00:00:00"})
+        assert response.json()["items"] == []
+
+def test_export_familys(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/family/", json=data).json()["uuid"]
+
+    response = client.get("/family/export", params={"sort": "-created_at"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert uuid in {row["uuid"] for row in rows}
+    assert client.get(f"/family/{uuid}").json() in rows
+
+    response = client.get("/family/export", params={"format": "csv"})
+    assert response.status_code == 200
+    header, *records = list(csv.reader(io.StringIO(response.text)))
+    assert header == list(client.get(f"/family/{uuid}").json())
+    assert len(records) == len(rows)
+
+def test_read_family_list_count(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    client.post("/family/", json=data)
+
+    assert "x-total-count" not in client.get("/family/").headers
+    exact = client.get("/family/", params={"count": "exact", "limit": 1})
+    assert int(exact.headers["x-total-count"]) >= 1
+    estimated = client.get("/family/", params={"count": "estimated", "limit": 1})
+    assert int(estimated.headers["x-total-count"]) >= 0
+    filtered = client.get("/family/", params={"count": "estimated", **{name: data[name] for name in ['status']}})
+    assert int(filtered.headers["x-total-count"]) >= 0
+
+def test_read_family_list_invalid_cursor(client: TestClient):
+    response = client.get("/family/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_read_family_fields(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/family/", json=data).json()["uuid"]
+
+    response = client.get(f"/family/{uuid}", params={"fields": "uuid"})
+    assert response.status_code == 200
+    assert response.json() == {"uuid": uuid}
+    # The full read fills the cache (if enabled); the sparse one is then projected from it.
+    full = client.get(f"/family/{uuid}")
+    cached = client.get(f"/family/{uuid}", params={"fields": "uuid"})
+    assert cached.json() == {"uuid": uuid}
+    assert cached.headers["etag"] == response.headers["etag"] != full.headers["etag"]
+
+    page = client.get("/family/", params={"fields": "uuid", "limit": 1})
+    assert page.status_code == 200
+    assert list(page.json()["items"][0]) == ["uuid"]
+    assert client.get("/family/", params={"fields": "uuid,nope"}).status_code == 400
+
+def test_delete_family(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/family/", json=data).json()["uuid"]
+
+    response = client.delete(f"/family/{uuid}")
+    assert response.status_code == 200
+    assert client.get(f"/family/{uuid}").status_code == 404
+    assert client.delete(f"/family/{uuid}").status_code == 404
+
+def test_update_family_not_found(client: TestClient):
+    response = client.patch(f"/family/{uuid4()}", json={})
+    assert response.status_code == 404
+
+def test_family_query_budget(client: TestClient, query_counter):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+
+    with query_counter() as queries:
+        uuid = client.post("/family/", json=data).json()["uuid"]
+    queries.assert_budget(1, "create")
+
+    with query_counter() as queries:
+        assert client.get(f"/family/{uuid}").status_code == 200
+    queries.assert_budget(1, "read")
+
+    with query_counter() as queries:
+        assert client.get(f"/family/{uuid}", params={"expand": ",".join(['members', 'invitations'])}).status_code == 200
+    queries.assert_budget(3, "read_expanded")
+
+    with query_counter() as queries:
+        assert client.get("/family/").status_code == 200
+    queries.assert_budget(1, "list")
+
+    with query_counter() as queries:
+        assert client.patch(f"/family/{uuid}", json={'name': 'budget'}).status_code == 200
+    queries.assert_budget(1, "update")
+
+    with query_counter() as queries:
+        assert client.delete(f"/family/{uuid}").status_code == 200
+    queries.assert_budget(1, "delete")
+
+def test_read_family_expanded(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/family/", json=data).json()["uuid"]
+    expand = ",".join(['members', 'invitations'])
+
+    response = client.get(f"/family/{uuid}", params={"expand": expand})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uuid"] == uuid
+    assert all(name in body for name in ['members', 'invitations'])
+    etag = response.headers["etag"]
+    not_modified = client.get(f"/family/{uuid}", params={"expand": expand}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    page = client.get("/family/", params={"expand": expand, "limit": 5}).json()
+    assert all(name in item for item in page["items"] for name in ['members', 'invitations'])
+    assert client.get("/family/", params={"expand": "nope"}).status_code == 400
+
+def test_update_family_invalidates_cache(client: TestClient):
+    data = {'name': 'test_string', 'description': 'test_string', 'status': 'test_string'}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/family/", json=data).json()["uuid"]
+
+    assert client.get(f"/family/{uuid}").status_code == 200  # cached
+    client.patch(f"/family/{uuid}", json={"name": "updated"})
+    response = client.get(f"/family/{uuid}")
+    assert response.json()["name"] == "updated"
+
+    client.delete(f"/family/{uuid}")
+    assert client.get(f"/family/{uuid}").status_code == 404
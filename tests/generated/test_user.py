@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
@@ -5,9 +8,12 @@ from uuid import uuid4
 from caramello.main import app
 from caramello.models.user import User
 
-@pytest.fixture(name="client")
+@pytest.fixture(name="client", scope="module")
 def client_fixture():
-    return TestClient(app)
+    # One event loop for the whole module: in async mode each loop gets its
+    # own engine and connection pool.
+    with TestClient(app) as client:
+        yield client
 
 def test_create_user(client: TestClient):
     # Dynamic sample data
@@ -25,6 +31,36 @@ def test_create_user(client: TestClient):
     data = response.json()
     assert data["uuid"] is not None
 
+def test_create_user_bulk(client: TestClient):
+    items = []
+    for _ in range(2):
+        data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+        if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+        items.append(data)
+
+    response = client.post("/user/bulk", json=items)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["created"]) == 2
+    assert body["errors"] == []
+
+def test_create_user_bulk_partial(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+
+    # Atomic mode rejects the whole batch...
+    response = client.post("/user/bulk", json=[data, {}])
+    assert response.status_code == 422
+
+    # ...partial mode creates the valid item and reports the other one.
+    response = client.post("/user/bulk", params={"mode": "partial"}, json=[data, {}])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["created"]) == 1
+    assert [error["index"] for error in body["errors"]] == [1]
+
 def test_read_user(client: TestClient):
     # Dynamic sample data
     data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
@@ -43,6 +79,24 @@ def test_read_user(client: TestClient):
     assert response.status_code == 200
     assert response.json()["uuid"] == uuid
 
+def test_read_user_not_modified(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/user/", json=data).json()["uuid"]
+
+    response = client.get(f"/user/{uuid}")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(f"/user/{uuid}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/user/", params={"limit": 5})
+    response = client.get("/user/", params={"limit": 5}, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
 def test_read_user_list(client: TestClient):
     # Dynamic sample data
     data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
@@ -52,4 +106,190 @@ def test_read_user_list(client: TestClient):
     client.post("/user/", json=data)
     response = client.get("/user/")
     assert response.status_code == 200
-    assert len(response.json()) > 0
+    assert len(response.json()["items"]) > 0
+
+def test_read_user_list_cursor(client: TestClient):
+    # Dynamic sample data
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    for _ in range(2):
+        if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+        client.post("/user/", json=data)
+
+    first = client.get("/user/", params={"limit": 1})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["items"]) == 1
+    assert page["next_cursor"] is not None
+    assert 'rel="next"' in first.headers["link"]
+
+    second = client.get("/user/", params={"limit": 1, "cursor": page["next_cursor"]})
+    assert second.status_code == 200
+    assert second.json()["items"][0]["uuid"] != page["items"][0]["uuid"]
+
+def test_read_user_list_sorted(client: TestClient):
+    for _ in range(2):
+        data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+        if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+        if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+        client.post("/user/", json=data)
+
+    for field in ['created_at', 'updated_at']:
+        page = client.get("/user/", params={"limit": 1, "sort": f"-{field}"}).json()
+        second = client.get("/user/", params={"limit": 1, "sort": f"-{field}", "cursor": page["next_cursor"]})
+        assert second.status_code == 200
+        assert second.json()["items"][0][field] <= page["items"][0][field]
+        # A cursor only resumes the sort it was built for.
+        assert client.get("/user/", params={"sort": field, "cursor": page["next_cursor"]}).status_code == 400
+    assert client.get("/user/", params={"sort": "uuid"}).status_code == 422
+
+def test_read_user_list_filtered(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    client.post("/user/", json=data)
+
+    params = {name: data[name] for name in ['email', 'is_active']}
+    response = client.get("/user/", params=params)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert items
+    assert all(item[name] == value for item in items for name, value in params.items())
+    for name in ['created_at']:
+        response = client.get("/user/", params={f"{name}_gte": "2999-01-01T00:00:00"})
+        assert response.json()["items"] == []
+
+def test_export_users(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/user/", json=data).json()["uuid"]
+
+    response = client.get("/user/export", params={"sort": "-created_at"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert uuid in {row["uuid"] for row in rows}
+    assert client.get(f"/user/{uuid}").json() in rows
+
+    response = client.get("/user/export", params={"format": "csv"})
+    assert response.status_code == 200
+    header, *records = list(csv.reader(io.StringIO(response.text)))
+    assert header == list(client.get(f"/user/{uuid}").json())
+    assert len(records) == len(rows)
+
+def test_read_user_list_count(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    client.post("/user/", json=data)
+
+    assert "x-total-count" not in client.get("/user/").headers
+    exact = client.get("/user/", params={"count": "exact", "limit": 1})
+    assert int(exact.headers["x-total-count"]) >= 1
+    estimated = client.get("/user/", params={"count": "estimated", "limit": 1})
+    assert int(estimated.headers["x-total-count"]) >= 0
+    filtered = client.get("/user/", params={"count": "estimated", **{name: data[name] for name in ['email', 'is_active']}})
+    assert int(filtered.headers["x-total-count"]) >= 0
+
+def test_read_user_list_invalid_cursor(client: TestClient):
+    response = client.get("/user/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_read_user_fields(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/user/", json=data).json()["uuid"]
+
+    response = client.get(f"/user/{uuid}", params={"fields": "uuid"})
+    assert response.status_code == 200
+    assert response.json() == {"uuid": uuid}
+    # The full read fills the cache (if enabled); the sparse one is then projected from it.
+    full = client.get(f"/user/{uuid}")
+    cached = client.get(f"/user/{uuid}", params={"fields": "uuid"})
+    assert cached.json() == {"uuid": uuid}
+    assert cached.headers["etag"] == response.headers["etag"] != full.headers["etag"]
+
+    page = client.get("/user/", params={"fields": "uuid", "limit": 1})
+    assert page.status_code == 200
+    assert list(page.json()["items"][0]) == ["uuid"]
+    assert client.get("/user/", params={"fields": "uuid,nope"}).status_code == 400
+
+def test_delete_user(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/user/", json=data).json()["uuid"]
+
+    response = client.delete(f"/user/{uuid}")
+    assert response.status_code == 200
+    assert client.get(f"/user/{uuid}").status_code == 404
+    assert client.delete(f"/user/{uuid}").status_code == 404
+
+def test_update_user_not_found(client: TestClient):
+    response = client.patch(f"/user/{uuid4()}", json={})
+    assert response.status_code == 404
+
+def test_user_query_budget(client: TestClient, query_counter):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+
+    with query_counter() as queries:
+        uuid = client.post("/user/", json=data).json()["uuid"]
+    queries.assert_budget(1, "create")
+
+    with query_counter() as queries:
+        assert client.get(f"/user/{uuid}").status_code == 200
+    queries.assert_budget(1, "read")
+
+    with query_counter() as queries:
+        assert client.get(f"/user/{uuid}", params={"expand": ",".join(['families', 'sent_invitations'])}).status_code == 200
+    queries.assert_budget(3, "read_expanded")
+
+    with query_counter() as queries:
+        assert client.get("/user/").status_code == 200
+    queries.assert_budget(1, "list")
+
+    with query_counter() as queries:
+        assert client.patch(f"/user/{uuid}", json={'full_name': 'budget'}).status_code == 200
+    queries.assert_budget(1, "update")
+
+    with query_counter() as queries:
+        assert client.delete(f"/user/{uuid}").status_code == 200
+    queries.assert_budget(1, "delete")
+
+def test_read_user_expanded(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/user/", json=data).json()["uuid"]
+    expand = ",".join(['families', 'sent_invitations'])
+
+    response = client.get(f"/user/{uuid}", params={"expand": expand})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["uuid"] == uuid
+    assert all(name in body for name in ['families', 'sent_invitations'])
+    etag = response.headers["etag"]
+    not_modified = client.get(f"/user/{uuid}", params={"expand": expand}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    page = client.get("/user/", params={"expand": expand, "limit": 5}).json()
+    assert all(name in item for item in page["items"] for name in ['families', 'sent_invitations'])
+    assert client.get("/user/", params={"expand": "nope"}).status_code == 400
+
+def test_update_user_invalidates_cache(client: TestClient):
+    data = {'full_name': 'test_string', 'email': 'test@example.com', 'phone_number': 'test_string', 'password': 'secret123', 'google_id': 'test_string', 'avatar_url': 'test_string', 'is_active': True}
+    if "email" in data: data["email"] = f"test_{uuid4()}@example.com"
+    if "google_id" in data: data["google_id"] = f"gid_{uuid4()}"
+    uuid = client.post("/user/", json=data).json()["uuid"]
+
+    assert client.get(f"/user/{uuid}").status_code == 200  # cached
+    client.patch(f"/user/{uuid}", json={"full_name": "updated"})
+    response = client.get(f"/user/{uuid}")
+    assert response.json()["full_name"] == "updated"
+
+    client.delete(f"/user/{uuid}")
+    assert client.get(f"/user/{uuid}").status_code == 404
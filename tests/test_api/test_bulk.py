@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from caramello.core.config import settings
+from caramello.database.bulk import bulk_insert
+from caramello.database.session import engine
+from caramello.main import app
+from caramello.models import Family, FamilyInvitation, User
+
+
+@pytest.fixture(autouse=True)
+def low_cost(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_SCRYPT_N", 1024)
+
+
+def user_item(email: str) -> dict:
+    return {"full_name": "Bulk User", "email": email, "password": "secret123"}
+
+
+def test_bulk_conflicts_are_reported_by_index():
+    email = f"bulk_{uuid4().hex}@example.com"
+    with TestClient(app) as client:
+        response = client.post("/user/bulk", json=[user_item(email), user_item(email)])
+        assert response.status_code == 409
+        assert response.json()["detail"] == [{"index": 1, "detail": "Conflicts with an existing row"}]
+        # Generic message: no constraint name or key value from the database
+        assert email not in response.text and "Key (" not in response.text
+
+        response = client.post("/user/bulk", params={"mode": "partial"}, json=[user_item(email), user_item(email)])
+    assert response.status_code == 200, response.text
+    assert [row["email"] for row in response.json()["created"]] == [email]
+    assert [error["index"] for error in response.json()["errors"]] == [1]
+    with Session(engine) as session:
+        session.exec(delete(User).where(User.email == email))
+        session.commit()
+
+
+def test_bulk_item_limit(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+    with TestClient(app) as client:
+        response = client.post("/family/bulk", json=[{"name": "a"}, {"name": "b"}, {"name": "c"}])
+    assert response.status_code == 422
+    assert response.json()["detail"] == "At most 2 items per request"
+
+
+def test_bulk_missing_reference_fails_only_its_item():
+    with Session(engine) as session:
+        family_id = session.exec(select(Family.id)).first()
+        user_id = session.exec(select(User.id)).first()
+    expires_at = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    items = [
+        {"family_id": family_id, "inviter_id": user_id, "invitee_email": "a@example.com", "expires_at": expires_at},
+        {"family_id": -1, "inviter_id": user_id, "invitee_email": "b@example.com", "expires_at": expires_at},
+    ]
+    with TestClient(app) as client:
+        response = client.post("/family_invitation/bulk", json=items)
+        assert response.status_code == 422
+        assert response.json()["detail"] == [{"index": 1, "detail": "References a missing family"}]
+
+        response = client.post("/family_invitation/bulk", params={"mode": "partial"}, json=items)
+    assert response.status_code == 200, response.text
+    created = response.json()["created"]
+    assert [row["invitee_email"] for row in created] == ["a@example.com"]
+    assert [error["index"] for error in response.json()["errors"]] == [1]
+    with Session(engine) as session:
+        session.exec(delete(FamilyInvitation).where(FamilyInvitation.uuid == created[0]["uuid"]))
+        session.commit()
+
+
+def test_copy_insert(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_COPY_THRESHOLD", 5)
+    run = uuid4().hex[:8]
+    rows = [
+        Family.model_validate({"name": f"copy {run} {i}", "description": "tab\there\nnewline"}).model_dump(exclude={"id"})
+        for i in range(8)
+    ]
+    with Session(engine) as session:
+        created = bulk_insert(session, Family, rows)
+        session.commit()
+    # RETURNING follows the input order
+    assert [row["name"] for row in created] == [row["name"] for row in rows]
+    assert created[0]["description"] == "tab\there\nnewline"
+
+    # Partial mode: rows already stored (same uuid) are skipped
+    retry = rows[:3] + [
+        Family.model_validate({"name": f"copy {run} {i}"}).model_dump(exclude={"id"}) for i in range(8, 11)
+    ]
+    with Session(engine) as session:
+        created_again = bulk_insert(session, Family, retry, skip_conflicts=True)
+        session.commit()
+        assert [row["name"] for row in created_again] == [f"copy {run} {i}" for i in range(8, 11)]
+        stored = session.exec(select(Family).where(Family.name.like(f"copy {run} %"))).all()
+        assert len(stored) == 11
+        session.exec(delete(Family).where(Family.name.like(f"copy {run} %")))
+        session.commit()
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from caramello.database.session import engine
+from caramello.main import app
+from caramello.models import Family, FamilyInvitation, FamilyMember, User
+
+
+def test_delete_family_cascades_in_database():
+    client = TestClient(app)
+    with Session(engine) as session:
+        user = User(full_name="Cascade", email=f"cascade_{uuid4()}@example.com")
+        family = Family(name="Cascade")
+        session.add_all([user, family])
+        session.commit()
+        session.add_all([
+            FamilyMember(user_id=user.id, family_id=family.id),
+            FamilyInvitation(
+                family_id=family.id,
+                inviter_id=user.id,
+                invitee_email="invitee@example.com",
+                expires_at=datetime.utcnow() + timedelta(days=7),
+            ),
+        ])
+        session.commit()
+        family_id, family_uuid, user_id = family.id, family.uuid, user.id
+
+    response = client.delete(f"/family/{family_uuid}")
+    assert response.status_code == 200
+
+    with Session(engine) as session:
+        assert session.exec(select(FamilyMember).where(FamilyMember.family_id == family_id)).first() is None
+        assert session.exec(select(FamilyInvitation).where(FamilyInvitation.family_id == family_id)).first() is None
+        assert session.get(User, user_id) is not None
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from caramello.database.session import engine
+from caramello.main import app
+from caramello.models import Family, FamilyInvitation, FamilyMember, User
+
+
+def test_expand_family_members_and_invitations():
+    client = TestClient(app)
+    with Session(engine) as session:
+        users = [User(full_name=f"Member {i}", email=f"member_{uuid4()}@example.com") for i in range(2)]
+        family = Family(name="Expanded")
+        session.add_all([*users, family])
+        session.commit()
+        session.add_all([FamilyMember(user_id=user.id, family_id=family.id) for user in users])
+        session.add(
+            FamilyInvitation(
+                family_id=family.id,
+                inviter_id=users[0].id,
+                invitee_email="invitee@example.com",
+                expires_at=datetime.utcnow() + timedelta(days=7),
+            )
+        )
+        session.commit()
+        family_uuid = str(family.uuid)
+        member_uuids = {str(user.uuid) for user in users}
+
+    response = client.get(f"/family/{family_uuid}", params={"expand": "members,invitations"})
+    assert response.status_code == 200
+    body = response.json()
+    assert {member["uuid"] for member in body["members"]} == member_uuids
+    assert "hashed_password" not in body["members"][0]
+    assert [invitation["invitee_email"] for invitation in body["invitations"]] == ["invitee@example.com"]
+
+    sparse = client.get(f"/family/{family_uuid}", params={"expand": "members", "fields": "name"}).json()
+    assert set(sparse) == {"name", "members"}
@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from caramello.core.config import settings
+from caramello.database.session import engine
+from caramello.database.slow_queries import redact_parameters, reset_slow_query_stats
+from caramello.main import app, create_app
+from caramello.models import User
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", True)
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def test_internal_endpoints_off_by_default():
+    with TestClient(app) as client:
+        for path in ("/metrics", "/internal/pool", "/internal/cache", "/internal/slow-queries"):
+            assert client.get(path).status_code == 404
+
+
+def test_read_pool_status(client):
+    client.get("/user/")
+    response = client.get("/internal/pool")
+    assert response.status_code == 200
+    data = response.json()
+    primary = data["database"]["primary"]
+    assert set(primary) == {"size", "checked_in", "checked_out", "overflow", "waiters"}
+    assert primary["waiters"] == 0
+    assert data["threadpool"]["total"] > 0
+
+
+def test_read_slow_queries(client, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 1.0)
+    reset_slow_query_stats()
+    client.get("/family/00000000-0000-0000-0000-000000000000")
+    response = client.get("/internal/slow-queries")
+    assert response.status_code == 200
+    entry = next(e for e in response.json() if e["last_route"] == "/family/{uuid}")
+    assert entry["statement"].startswith("SELECT")
+    assert entry["count"] >= 1 and entry["avg_ms"] > 0
+    assert entry["last_plan"][0]["Plan"]["Relation Name"] == "family"
+
+
+def test_redact_parameters():
+    redacted = redact_parameters({"invitee_email_1": "a@b.c", "google_id": "g-1", "limit_1": 10}, None, False)
+    assert redacted == {"invitee_email_1": "***", "google_id": "***", "limit_1": 10}
+    assert redact_parameters([1, 2], None, False) == ["***", "***"]
+
+
+def test_slow_update_masks_values(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    with Session(engine) as session:
+        user_uuid = session.exec(select(User.uuid)).first()
+        with caplog.at_level(logging.WARNING, logger="caramello.slow_queries"):
+            session.exec(update(User).where(User.uuid == user_uuid).values(full_name="Maria Sigilosa"))
+        session.rollback()
+    message = next(r.getMessage() for r in caplog.records if 'UPDATE "user"' in r.getMessage())
+    assert "Maria Sigilosa" not in message
+    assert "'full_name': '***'" in message and str(user_uuid) in message
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import DataError
+
+from caramello.core.config import settings
+from caramello.core.metrics import db_query_duration_seconds
+from caramello.database.metrics import _START_TIMES
+from caramello.database.session import engine
+from caramello.main import create_app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", True)
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def sample(text: str, name: str, **labels: str) -> float:
+    selector = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{name}\{{{re.escape(selector)}\}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_record_routes_and_queries(client):
+    before = client.get("/metrics").text
+    assert client.get("/family/", params={"limit": 1}).status_code == 200
+    assert client.get("/family/00000000-0000-0000-0000-000000000000").status_code == 404
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+    route = {"route": "/family/{uuid}", "method": "GET"}
+    assert sample(after, "http_requests_total", **route, status="404") == sample(
+        before, "http_requests_total", **route, status="404"
+    ) + 1
+    # Labelled by route template, with the SQL it ran (one SELECT)
+    route = {"route": "/family/", "method": "GET"}
+    assert sample(after, "http_request_db_queries_count", **route) == sample(
+        before, "http_request_db_queries_count", **route
+    ) + 1
+    assert sample(after, "http_request_db_queries_sum", **route) >= sample(
+        before, "http_request_db_queries_sum", **route
+    ) + 1
+    assert "# TYPE http_request_duration_seconds histogram" in after
+    assert 'db_pool_connections{engine="primary",state="size"}' in after
+    assert "db_pool_checkout_wait_seconds_count" in after
+
+
+def test_failed_statements_are_timed_and_not_leaked():
+    def observed() -> int:
+        entry = db_query_duration_seconds._values.get(("primary",))
+        return sum(entry[0]) if entry else 0
+
+    with engine.connect() as conn:
+        before = observed()
+        for _ in range(3):
+            with pytest.raises(DataError):
+                conn.execute(text("SELECT 1 / 0"))
+            conn.rollback()
+        assert conn.info[_START_TIMES] == {}
+        assert observed() == before + 3
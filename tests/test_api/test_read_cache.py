@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+from caramello.api.generated import family_router
+from caramello.core.cache import MemoryCache
+from caramello.main import app
+
+
+class RacingCache(MemoryCache):
+    """Invalidates the key right after the read takes its generation, as a
+    PATCH committing between the GET's SELECT and its cache fill would."""
+
+    def generation(self, key: str) -> int:
+        generation = super().generation(key)
+        self.delete(key)
+        return generation
+
+
+def test_read_does_not_cache_row_invalidated_meanwhile(monkeypatch):
+    cache = RacingCache("Family", ttl=60, max_entries=10)
+    with TestClient(app) as client:
+        uuid = client.post("/family/", json={"name": "racing"}).json()["uuid"]
+        monkeypatch.setattr(family_router, "family_cache", lambda: cache)
+        assert client.get(f"/family/{uuid}").json()["name"] == "racing"
+        assert cache.get(uuid) is None
+        assert client.delete(f"/family/{uuid}").status_code == 200
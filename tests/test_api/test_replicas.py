@@ -0,0 +1,123 @@
+import inspect
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from caramello.core.config import settings
+from caramello.core.metrics import db_query_duration_seconds
+from caramello.database import session as db_session
+from caramello.database.replicas import READ_YOUR_WRITES_COOKIE
+from caramello.main import create_app
+from caramello.models import User
+
+
+def replica_queries(index: int) -> int:
+    # Statements timed so far on the replica's sync or async engine.
+    entries = [db_query_duration_seconds._values.get((name,)) for name in (f"replica_{index}", f"replica_{index}_async")]
+    return sum(sum(entry[0]) for entry in entries if entry)
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    """The primary itself as replica 0, and an unreachable replica 1."""
+    monkeypatch.setattr(settings, "DB_REPLICA_URLS", [settings.DATABASE_URL, "postgresql://nobody@127.0.0.1:1/none"])
+    monkeypatch.setattr(settings, "DB_REPLICA_CONNECT_TIMEOUT", 1)
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 30)
+    monkeypatch.setattr(db_session, "_replica_set", None)
+    replica_set = db_session.get_replica_set()
+    # Health is set by each test; the monitor has its own test.
+    monkeypatch.setattr(replica_set, "start_monitor", lambda: None)
+    yield replica_set
+    replica_set.stop_monitor()
+
+
+def test_reads_fail_over_to_healthy_replica(replicas, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_ENDPOINTS_ENABLED", True)
+    replicas.check()
+    assert replicas.healthy == [True, False]
+    before = replica_queries(0)
+    with TestClient(create_app()) as client:
+        for _ in range(3):
+            assert client.get("/family/", params={"limit": 1}).status_code == 200
+        engines = client.get("/internal/pool").json()["database"]
+    assert replica_queries(0) >= before + 3
+    assert any(name.startswith("replica_0") for name in engines)
+
+
+def test_reads_after_write_use_primary(replicas):
+    with TestClient(create_app()) as client:
+        created = client.post("/family/", json={"name": "read your writes"})
+        assert created.status_code == 200
+        assert READ_YOUR_WRITES_COOKIE in created.cookies
+        before = replica_queries(0)
+        assert client.get(f"/family/{created.json()['uuid']}").status_code == 200
+        assert replica_queries(0) == before
+        assert client.delete(f"/family/{created.json()['uuid']}").status_code == 200
+
+
+def test_without_replicas_reads_use_primary(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_URLS", [])
+    monkeypatch.setattr(db_session, "_replica_set", None)
+    assert db_session.get_replica_set() is None
+    assert db_session.get_read_engine() is db_session.get_engine()
+
+
+def test_replica_failing_mid_request_falls_back_to_primary(replicas):
+    # Replica 1 is unreachable but not known to be down yet.
+    replicas.healthy = [False, True]
+    with TestClient(create_app()) as client:
+        assert client.get("/family/", params={"limit": 1}).status_code == 200
+    assert replicas.healthy == [False, False]
+
+
+def test_lagging_replica_does_not_fill_cache(replicas, monkeypatch):
+    from caramello.api.generated import user_router
+
+    if inspect.iscoroutinefunction(user_router.read_user):
+        pytest.skip("stub replica is a sync connection")
+    with Session(db_session.get_engine()) as session:
+        user = User(full_name="Before", email=f"lag_{uuid4().hex}@example.com")
+        session.add(user)
+        session.commit()
+        uuid = str(user.uuid)
+    user_router.user_cache().delete(uuid)
+
+    # The "replica" is a REPEATABLE READ snapshot taken before the PATCH.
+    lagging = db_session.get_engine().connect().execution_options(isolation_level="REPEATABLE READ")
+    lagging.begin()
+    lagging.execute(select(User.full_name).where(User.uuid == uuid)).all()
+    monkeypatch.setattr(replicas, "engine", lambda index: lagging)
+    replicas.healthy = [True, False]
+    try:
+        with TestClient(create_app()) as client:
+            assert client.patch(f"/user/{uuid}", json={"full_name": "After"}).status_code == 200
+            client.cookies.clear()
+            assert client.get(f"/user/{uuid}").json()["full_name"] == "Before"
+            assert user_router.user_cache().get(uuid) is None
+
+            # Within the read-your-writes window the primary answers and fills the cache.
+            pinned = {"cookie": f"{READ_YOUR_WRITES_COOKIE}={time.time() + 30}"}
+            assert client.get(f"/user/{uuid}", headers=pinned).json()["full_name"] == "After"
+            assert user_router.user_cache().get(uuid)["full_name"] == "After"
+    finally:
+        lagging.rollback()
+        lagging.close()
+        user_router.user_cache().delete(uuid)
+        with Session(db_session.get_engine()) as session:
+            session.exec(delete(User).where(User.uuid == uuid))
+            session.commit()
+
+
+def test_monitor_stops_on_shutdown(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_URLS", [settings.DATABASE_URL])
+    monkeypatch.setattr(db_session, "_replica_set", None)
+    with TestClient(create_app()) as client:
+        assert client.get("/family/", params={"limit": 1}).status_code == 200
+        monitor = db_session.get_replica_set()._monitor
+        assert monitor.is_alive()
+    monitor.join(timeout=5)
+    assert not monitor.is_alive()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from caramello.database.session import engine
+from caramello.main import app
+from caramello.models import Family, FamilyInvitation, User
+
+
+@pytest.fixture
+def invitee():
+    """A user with one live invitation, plus expired, accepted and unrelated ones."""
+    now = datetime.utcnow()
+    suffix = uuid4().hex[:8]
+    with Session(engine) as session:
+        user = User(full_name="Invitee", email=f"invitee_{suffix}@example.com")
+        family = Family(name=f"Family {suffix}")
+        session.add_all([user, family])
+        session.flush()
+
+        def invitation(email: str, expires_in: timedelta, status: str = "pending") -> FamilyInvitation:
+            return FamilyInvitation(
+                family_id=family.id, inviter_id=user.id, invitee_email=email,
+                status=status, expires_at=now + expires_in,
+            )
+
+        live = invitation(f"INVITEE_{suffix}@Example.com", timedelta(days=1))
+        session.add_all([
+            live,
+            invitation(user.email, timedelta(days=-1)),
+            invitation(user.email, timedelta(days=1), status="accepted"),
+            invitation(f"someone_{suffix}@example.com", timedelta(days=1)),
+        ])
+        session.commit()
+        yield {"user": user.uuid, "live": live.uuid, "family": family.name}
+        session.exec(delete(Family).where(Family.id == family.id))
+        session.exec(delete(User).where(User.id == user.id))
+        session.commit()
+
+
+def test_pending_invitations_of_user(invitee, query_counter):
+    with TestClient(app) as client:
+        with query_counter() as queries:
+            response = client.get(f"/v1/users/{invitee['user']}/invitations")
+    assert response.status_code == 200
+    assert [(item["uuid"], item["family_name"]) for item in response.json()] == [
+        (str(invitee["live"]), invitee["family"])
+    ]
+    queries.assert_budget(1, "pending invitations")
+
+
+def test_pending_invitations_unknown_user():
+    with TestClient(app) as client:
+        assert client.get(f"/v1/users/{uuid4()}/invitations").status_code == 404
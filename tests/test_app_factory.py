@@ -0,0 +1,57 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from anyio import to_thread
+from fastapi.testclient import TestClient
+
+import caramello
+from caramello.api.generated import ROUTERS
+from caramello.api.registry import LazyRouter
+from caramello.core.config import get_settings
+from caramello.database.session import configure_engines, get_engine
+from caramello.main import EXTRA_ROUTERS, create_app
+
+
+def test_lazy_routers_mount_on_first_request():
+    lazy_app = create_app(lazy_routers=True)
+    routes = [route.path for route in lazy_app.routes if not isinstance(route, LazyRouter)]
+    assert "/user/" not in routes
+
+    with TestClient(lazy_app) as lazy_client:
+        assert lazy_client.get("/user/", params={"limit": 1}).status_code == 200
+        routes = [route.path for route in lazy_app.routes if not isinstance(route, LazyRouter)]
+        assert "/user/" in routes
+        assert "/family/" not in routes
+
+        # The OpenAPI schema mounts everything that is still pending.
+        paths = lazy_client.get("/openapi.json").json()["paths"]
+        assert "/family/" in paths and "/family_invitation/" in paths
+        assert not any(isinstance(route, LazyRouter) for route in lazy_app.routes)
+
+
+def test_routers_import_without_environment(tmp_path):
+    # No DB_* variables and no .env in the working directory: importing a
+    # router must not build the Settings.
+    env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": str(Path(caramello.__file__).parents[1])}
+    code = "import importlib, sys\nfor name in sys.argv[1:]:\n    importlib.import_module(name)"
+    modules = [*ROUTERS.values(), *EXTRA_ROUTERS.values()]
+    result = subprocess.run(
+        [sys.executable, "-c", code, *modules], cwd=tmp_path, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_app_settings_reach_lifespan_and_engines():
+    custom = get_settings().model_copy(update={"DB_POOL_SIZE": 3, "THREADPOOL_MAX_WORKERS": 7})
+    try:
+        with TestClient(create_app(settings=custom)) as custom_client:
+            assert custom_client.get("/user/", params={"limit": 1}).status_code == 200
+            assert get_engine().pool.size() == 3
+            limit = custom_client.portal.call(lambda: to_thread.current_default_thread_limiter().total_tokens)
+            assert limit == 7
+    finally:
+        asyncio.run(configure_engines(get_settings()))
+    assert get_engine().pool.size() == get_settings().DB_POOL_SIZE
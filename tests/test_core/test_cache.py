@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from caramello.core.cache import MemoryCache
+
+def test_memory_cache_hit_and_miss():
+    cache = MemoryCache("test", ttl=60, max_entries=10)
+    assert cache.get("a") is None
+    cache.set("a", {"uuid": "a"})
+    assert cache.get("a") == {"uuid": "a"}
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "expirations": 0, "size": 1}
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache("test", ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache("test", ttl=10, max_entries=10)
+    with patch("caramello.core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("caramello.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+def test_memory_cache_delete():
+    cache = MemoryCache("test", ttl=60, max_entries=10)
+    cache.set("a", 1)
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+
+def test_memory_cache_drops_set_older_than_delete():
+    cache = MemoryCache("test", ttl=60, max_entries=10)
+    generation = cache.generation("a")
+    cache.delete("a")
+    cache.set("a", "stale", generation=generation)
+    assert cache.get("a") is None
+    cache.set("a", "fresh", generation=cache.generation("a"))
+    assert cache.get("a") == "fresh"
+    # Other keys are unaffected by the delete
+    cache.set("b", 2, generation=generation)
+    assert cache.get("b") == 2
+
+def test_memory_cache_forgotten_deletes_stay_conservative():
+    cache = MemoryCache("test", ttl=60, max_entries=1)
+    generation = cache.generation("a")
+    cache.delete("a")
+    cache.delete("b")  # pushes out the record of "a"
+    cache.set("a", "stale", generation=generation)
+    assert cache.get("a") is None
+    cache.set("a", "fresh", generation=cache.generation("a"))
+    assert cache.get("a") == "fresh"
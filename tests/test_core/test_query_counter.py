@@ -0,0 +1,28 @@
+import pytest
+from sqlmodel import Session, select
+
+from caramello.database.query_counter import count_queries, statement_shape
+from caramello.database.session import engine
+from caramello.models import Family
+
+
+def test_statement_shape_ignores_parameters():
+    assert statement_shape("SELECT 1 WHERE id IN (%(id_1)s, %(id_2)s)") == "SELECT 1 WHERE id IN (?)"
+    assert statement_shape("SELECT 1\nWHERE a = $1") == statement_shape("SELECT 1 WHERE a = $2")
+
+
+def test_lazy_loads_are_flagged_as_n_plus_one():
+    with Session(engine) as session:
+        for i in range(3):
+            session.add(Family(name=f"Lazy {i}"))
+        session.commit()
+
+        with count_queries() as queries:
+            families = session.exec(select(Family).order_by(Family.id.desc()).limit(3)).all()
+            for family in families:
+                family.members  # one lazy load per family
+        assert len(queries) == 4
+        [(shape, count)] = queries.repeated()
+        assert count == 3 and "family_member" in shape
+        with pytest.raises(AssertionError, match="N\\+1"):
+            queries.assert_budget(4)
@@ -11,7 +11,7 @@ def test_read_main():
 def test_routers_registered():
     # Check if routes are registered
     routes = [route.path for route in app.routes]
-    assert "/users/" in routes
+    assert "/user/" in routes
     assert "/family/" in routes
     assert "/family_members/" in routes
-    assert "/family_invitations/" in routes
+    assert "/family_invitation/" in routes
@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from caramello.core.config import settings
+from caramello.database.session import engine
+from caramello.main import create_app
+from caramello.models import Family, FamilyInvitation, User
+from caramello.services import family_invitation
+from caramello.services.family_invitation import sweep_expired_invitations
+
+
+@pytest.fixture
+def invitations():
+    """Three expired pending invitations, one still valid, one already accepted."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        family_id = session.exec(select(Family.id)).first()
+        user_id = session.exec(select(User.id)).first()
+        rows = [
+            # Older than anything other tests create, so swept first
+            {"expires_at": now - timedelta(days=3650)},
+            {"expires_at": now - timedelta(days=3649)},
+            {"expires_at": now - timedelta(days=3648)},
+            {"expires_at": now + timedelta(days=1)},
+            {"expires_at": now - timedelta(days=1), "status": "accepted"},
+        ]
+        values = [
+            {"family_id": family_id, "inviter_id": user_id, "invitee_email": f"sweep{i}@example.com", "status": "pending", **row}
+            for i, row in enumerate(rows)
+        ]
+        ids = session.exec(insert(FamilyInvitation).returning(FamilyInvitation.id), params=values).scalars().all()
+        session.commit()
+    yield ids
+    with Session(engine) as session:
+        session.exec(delete(FamilyInvitation).where(FamilyInvitation.id.in_(ids)))
+        session.commit()
+
+
+def statuses(ids: list[int]) -> list[str]:
+    with Session(engine) as session:
+        rows = session.exec(select(FamilyInvitation.id, FamilyInvitation.status).where(FamilyInvitation.id.in_(ids)))
+        return [status for _, status in sorted(rows)]
+
+
+def test_sweep_expires_pending_invitations_in_batches(invitations):
+    assert sweep_expired_invitations(batch_size=2) >= 3
+    assert statuses(invitations) == ["expired", "expired", "expired", "pending", "accepted"]
+    assert sweep_expired_invitations(batch_size=2) == 0
+
+
+def test_sweep_stops_after_max_batches(invitations):
+    assert sweep_expired_invitations(batch_size=1, max_batches=2) == 2
+    # Oldest expiry first
+    assert statuses(invitations)[:3] == ["expired", "expired", "pending"]
+
+
+def test_shutdown_waits_for_running_sweep(monkeypatch):
+    started, finished = threading.Event(), threading.Event()
+
+    def slow_sweep(batch_size=None):
+        started.set()
+        time.sleep(0.3)
+        finished.set()
+        return 0
+
+    monkeypatch.setattr(settings, "INVITATION_SWEEP_INTERVAL", 60)
+    monkeypatch.setattr(family_invitation, "sweep_expired_invitations", slow_sweep)
+    with TestClient(create_app()):
+        assert started.wait(5)
+    assert finished.is_set()
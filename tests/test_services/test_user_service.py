@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from caramello.core.config import settings
+from caramello.api.generated import user_router
+from caramello.core.security import (
+    get_password_executor,
+    hash_password,
+    hash_passwords_async,
+    needs_rehash,
+    shutdown_password_executor,
+    verify_password,
+)
+from caramello.database.session import engine, get_async_engine
+from caramello.main import app
+from caramello.models import User
+from caramello.services.user import authenticate
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def low_cost(monkeypatch):
+    # Keep scrypt cheap in tests; hashes still record their own cost.
+    monkeypatch.setattr(settings, "PASSWORD_SCRYPT_N", 1024)
+
+
+def stored_hash(email: str) -> str:
+    with Session(engine) as session:
+        return session.exec(select(User.hashed_password).where(User.email == email)).one()
+
+
+def test_hash_and_verify():
+    hashed = hash_password("secret123", 1024, 8, 1)
+    assert hashed.startswith("scrypt$1024$8$1$")
+    assert verify_password("secret123", hashed)
+    assert not verify_password("wrong", hashed)
+    assert not verify_password("secret123", "not-a-hash")
+    assert hash_password("secret123", 1024, 8, 1) != hashed  # salted
+
+
+def test_needs_rehash_follows_cost_settings(monkeypatch):
+    hashed = hash_password("secret123", 1024, 8, 1)
+    assert not needs_rehash(hashed)
+    monkeypatch.setattr(settings, "PASSWORD_SCRYPT_N", 2048)
+    assert needs_rehash(hashed)
+
+
+def test_create_and_update_hash_the_password():
+    email = f"hash_{uuid4()}@example.com"
+    with TestClient(app) as client:
+        response = client.post("/user/", json={"full_name": "Hashed", "email": email, "password": "secret123"})
+        assert response.status_code == 200
+        assert "hashed_password" not in response.json()
+        assert verify_password("secret123", stored_hash(email))
+
+        response = client.patch(f"/user/{response.json()['uuid']}", json={"password": "changed456"})
+        assert response.status_code == 200
+        assert verify_password("changed456", stored_hash(email))
+
+
+def test_password_bulk_limit_rejects_before_hashing(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_MAX_PASSWORD_ITEMS", 1)
+
+    async def no_hashing(passwords):
+        raise AssertionError("hashed an oversized batch")
+
+    monkeypatch.setattr(user_router, "hash_passwords_async", no_hashing)
+    items = [{"full_name": "Bulk", "email": f"bulk_{uuid4()}@example.com", "password": "secret123"} for _ in range(2)]
+    with TestClient(app) as client:
+        response = client.post("/user/bulk", json=items)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "At most 1 items per request"
+
+
+@pytest.mark.anyio
+async def test_hash_passwords_async_keeps_order(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 2)
+    passwords = ["first", None, "second", "third", ""]
+    hashes = await hash_passwords_async(passwords)
+    assert hashes[1] is None and hashes[4] is None
+    assert all(verify_password(password, hashes[i]) for i, password in enumerate(passwords) if password)
+
+
+def test_password_executor_created_once():
+    shutdown_password_executor()
+    barrier = threading.Barrier(8)
+
+    def first_call():
+        barrier.wait()
+        return get_password_executor()
+
+    with ThreadPoolExecutor(8) as threads:
+        executors = list(threads.map(lambda _: first_call(), range(8)))
+    assert all(executor is executors[0] for executor in executors)
+    shutdown_password_executor()
+
+
+@pytest.mark.anyio
+async def test_authenticate_rehashes_on_cost_change(monkeypatch):
+    email = f"login_{uuid4()}@example.com"
+    with Session(engine) as session:
+        session.add(User(full_name="Login", email=email, hashed_password=hash_password("secret123", 1024, 8, 1)))
+        session.commit()
+
+    async_engine = get_async_engine()
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            assert await authenticate(session, email, "wrong") is None
+            assert await authenticate(session, f"missing_{uuid4()}@example.com", "secret123") is None
+            assert await authenticate(session, email, "secret123") is not None
+            assert stored_hash(email).startswith("scrypt$1024$")
+
+            monkeypatch.setattr(settings, "PASSWORD_SCRYPT_N", 2048)
+            assert await authenticate(session, email, "secret123") is not None
+            assert stored_hash(email).startswith("scrypt$2048$")
+            assert verify_password("secret123", stored_hash(email))
+    finally:
+        await async_engine.dispose()